@@ -2,11 +2,12 @@
 
 from core.logging import configure_logging
 from core.settings import CoreSettings, load_dataclass_from_yaml
-from core.telemetry import configure_tracing
+from core.telemetry import configure_metrics, configure_tracing
 
 __all__ = [
     "CoreSettings",
     "configure_logging",
+    "configure_metrics",
     "configure_tracing",
     "load_dataclass_from_yaml",
 ]
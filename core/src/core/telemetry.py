@@ -5,13 +5,18 @@ from __future__ import annotations
 from typing import Final
 
 from fastapi import FastAPI
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    ConsoleMetricExporter,
+    PeriodicExportingMetricReader,
+)
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import ConsoleSpanExporter, SimpleSpanProcessor
 
-_PROVIDER_STATE: Final = {"configured": False}
+_PROVIDER_STATE: Final = {"configured": False, "metrics_configured": False}
 
 
 def configure_tracing(app: FastAPI, *, service_name: str = "documents-api") -> None:
@@ -27,3 +32,16 @@ def configure_tracing(app: FastAPI, *, service_name: str = "documents-api") -> N
         tracer_provider = trace.get_tracer_provider()
 
     FastAPIInstrumentor.instrument_app(app, tracer_provider=tracer_provider)
+
+
+def configure_metrics(*, service_name: str = "documents-api") -> None:
+    """Install a meter provider that periodically exports instruments to the console."""
+
+    if _PROVIDER_STATE["metrics_configured"]:
+        return
+    resource = Resource.create({"service.name": service_name})
+    reader = PeriodicExportingMetricReader(ConsoleMetricExporter())
+    metrics.set_meter_provider(
+        MeterProvider(resource=resource, metric_readers=[reader])
+    )
+    _PROVIDER_STATE["metrics_configured"] = True
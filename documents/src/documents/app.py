@@ -5,17 +5,25 @@ from __future__ import annotations
 import pydantic.dataclasses as pydantic_dataclasses
 import dataclasses
 import structlog
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Final, TypeVar
 
 from fastapi import FastAPI
 import asyncio
 import uvicorn
 
-from core import configure_logging, configure_tracing
+from core import configure_logging, configure_metrics, configure_tracing
 from core.cmd_utils import load_app_settings
 from core.settings import CoreSettings
 
-from documents.dependencies import configure_document_dependencies
+from documents.dependencies import (
+    configure_document_dependencies,
+    get_collection_manager,
+    get_cpu_executor,
+    get_warm_up,
+)
+from documents.routers.health import create_health_router
 from documents.routers.indexing import create_indexing_router
 from documents.routers.search import create_search_router
 from documents.services.settings import DocumentSettings
@@ -33,11 +41,24 @@ class AppSettings(CoreSettings):
     port: int = 8080
 
 
+@asynccontextmanager
+async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Models load in the background so the server answers /health/ready (503) meanwhile.
+    get_warm_up().start()
+    try:
+        yield
+    finally:
+        get_warm_up().stop()
+        get_cpu_executor().shutdown()
+        get_collection_manager().close()
+
+
 def create_app(settings: AppSettings) -> FastAPI:
     app = FastAPI(
         title=settings.title,
         description=settings.description,
         version=settings.version,
+        lifespan=_lifespan,
     )
 
     configure_document_dependencies(settings.documents)
@@ -48,6 +69,9 @@ def create_app(settings: AppSettings) -> FastAPI:
     search_router = create_search_router()
     app.include_router(search_router)
 
+    health_router = create_health_router()
+    app.include_router(health_router)
+
     configure_tracing(app, service_name="documents-api")
     return app
 
@@ -57,6 +81,7 @@ def serve() -> None:
 
     settings: AppSettings = load_app_settings(AppSettings, None)
     configure_logging(settings.logging)
+    configure_metrics(service_name="documents-api")
 
     LOGGER.debug("settings", settings=settings)
 
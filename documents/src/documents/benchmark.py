@@ -0,0 +1,404 @@
+"""Indexing and search benchmark of ``DocumentIndexService`` over a synthetic corpus."""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Final
+
+import numpy as np
+import structlog
+from core.settings import load_dataclass_from_yaml
+from llama_index.core.embeddings import BaseEmbedding
+from pydantic import PrivateAttr
+
+from documents.app import AppSettings
+from documents.schemas import DocumentPayload
+from documents.services.embedding_model import (
+    MODELS_DIRECTORY,
+    load_embed_model,
+    measure_embedding_parity,
+)
+from documents.services.indexing_service import DocumentIndexService
+from documents.services.settings import (
+    DocumentSettings,
+    LocalObjectStoreSettings,
+    ObjectStoreSettings,
+)
+
+EMBEDDING_MODES: Final = ("random", "fixed")
+
+_WORDS_PER_CHUNK: Final = 48
+_WORDS_PER_SUMMARY: Final = 12
+_WORDS_PER_QUERY: Final = 4
+_CHUNKS_PER_DOCUMENT: Final = 20
+# Norm of the noise added to a cluster centre, relative to the unit-length centre.
+_CLUSTER_NOISE: Final = 0.5
+
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkConfig:
+    """Corpus shape and workload of one benchmark run."""
+
+    rows: int = 10_000
+    dim: int = 384
+    embeddings: str = "random"
+    seed: int = 0
+    vocabulary_size: int = 20_000
+    build_batch_size: int = 10_000
+    inserts: int = 1_000
+    insert_batch_size: int = 100
+    queries: int = 200
+    query_batch_size: int = 32
+    limit: int = 10
+
+
+class SyntheticCorpus:
+    """Deterministic chunks with clustered random (or constant) embeddings.
+
+    Words are drawn from a Zipf-distributed synthetic vocabulary so BM25 sees realistic
+    posting-list lengths, and ``random`` vectors are drawn around ``sqrt(rows)`` cluster
+    centres so ANN partitions and recall behave roughly as on real embeddings. ``fixed``
+    gives every chunk and query the same vector, isolating the cost of everything but
+    vector scoring. Rows are generated batch by batch, so the corpus never has to fit in
+    memory as payloads.
+    """
+
+    def __init__(self, config: BenchmarkConfig) -> None:
+        if config.embeddings not in EMBEDDING_MODES:
+            raise ValueError(f"Unsupported embedding mode '{config.embeddings}'")
+        self._config = config
+        self._vocabulary = np.array([f"term{index}" for index in range(config.vocabulary_size)])
+        weights = 1.0 / np.arange(1, config.vocabulary_size + 1)
+        self._word_weights = weights / weights.sum()
+        rng = np.random.default_rng(config.seed)
+        clusters = max(1, int(np.sqrt(config.rows)))
+        self._centres = _normalize(rng.standard_normal((clusters, config.dim)))
+
+    def payloads(self, start: int, count: int) -> list[DocumentPayload]:
+        """Return chunks ``start`` to ``start + count`` with precomputed embeddings."""
+
+        rng = np.random.default_rng((self._config.seed, start))
+        contents = self._texts(rng, count, _WORDS_PER_CHUNK)
+        summaries = self._texts(rng, count, _WORDS_PER_SUMMARY)
+        content_vectors = self.vectors(rng, count)
+        summary_vectors = self.vectors(rng, count)
+        return [
+            DocumentPayload(
+                document_id=f"chunk-{row}",
+                content=contents[index],
+                metadata={
+                    "parent_document_id": f"doc-{row // _CHUNKS_PER_DOCUMENT}",
+                    "chunk_index": row % _CHUNKS_PER_DOCUMENT,
+                    "chunk_summary": summaries[index],
+                    "embedding": content_vectors[index],
+                    "summary_embedding": summary_vectors[index],
+                },
+            )
+            for index, row in enumerate(range(start, start + count))
+        ]
+
+    def queries(self, count: int, *, offset: int = 0) -> list[str]:
+        """Return ``count`` distinct queries; different offsets give disjoint sets."""
+
+        rng = np.random.default_rng((self._config.seed, self._config.rows, offset))
+        texts = self._texts(rng, count, _WORDS_PER_QUERY)
+        return [f"{text} q{offset + index}" for index, text in enumerate(texts)]
+
+    def vectors(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        dim = self._config.dim
+        if self._config.embeddings == "fixed":
+            return np.full((count, dim), 1.0 / np.sqrt(dim), dtype=np.float32)
+        centres = self._centres[rng.integers(len(self._centres), size=count)]
+        noise = rng.standard_normal((count, dim)) * (_CLUSTER_NOISE / np.sqrt(dim))
+        return _normalize(centres + noise)
+
+    def _texts(self, rng: np.random.Generator, count: int, words: int) -> list[str]:
+        choices = rng.choice(len(self._vocabulary), size=(count, words), p=self._word_weights)
+        return [" ".join(self._vocabulary[row]) for row in choices]
+
+
+class SyntheticEmbedding(BaseEmbedding):
+    """Embed text as a seeded draw from a synthetic corpus's vector distribution.
+
+    Equal texts get equal vectors, and no model is downloaded or run.
+    """
+
+    _corpus: SyntheticCorpus = PrivateAttr()
+
+    def __init__(self, corpus: SyntheticCorpus, **kwargs: Any) -> None:
+        super().__init__(model_name="synthetic", **kwargs)
+        self._corpus = corpus
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "SyntheticEmbedding"
+
+    def _vector(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return self._corpus.vectors(np.random.default_rng(seed), 1)[0].tolist()
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        return self._vector(query)
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        return self._vector(query)
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._vector(text)
+
+
+def run_benchmark(
+    config: BenchmarkConfig, settings: DocumentSettings, directory: Path
+) -> dict[str, Any]:
+    """Build an index of ``config.rows`` synthetic chunks in ``directory`` and measure it.
+
+    Reports index build and incremental insert throughput, single-query and batch-query
+    latency percentiles, recall@``limit`` of the ANN or quantized first pass against exact
+    search (``None`` when search is exact) and the peak resident set size of the process.
+    The result cache and the persistent text-embedding cache are disabled so every search
+    and insert does its full work; ``settings`` select everything else (fusion, ANN,
+    quantization, reranking).
+    """
+
+    corpus = SyntheticCorpus(config)
+    settings = dataclasses.replace(
+        settings,
+        store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(directory))),
+        embed=dataclasses.replace(
+            settings.embed,
+            model_name=f"synthetic-{config.embeddings}-{config.dim}",
+            cache_max_entries=0,
+        ),
+        cache=dataclasses.replace(settings.cache, result_size=0),
+    )
+    service = DocumentIndexService(settings, embed_model=SyntheticEmbedding(corpus))
+    try:
+        build_seconds = sum(
+            _timed(service.index_documents, batch)
+            for batch in _batches(corpus, 0, config.rows, config.build_batch_size)
+        )
+        insert_latencies = [
+            _timed(service.index_documents, batch)
+            for batch in _batches(corpus, config.rows, config.inserts, config.insert_batch_size)
+        ]
+
+        search_latencies = [
+            _timed(service.search, query, limit=config.limit)
+            for query in corpus.queries(config.queries)
+        ]
+        batch_queries = corpus.queries(config.queries, offset=config.queries)
+        batch_latencies = [
+            _timed(
+                service.search_many,
+                batch_queries[start : start + config.query_batch_size],
+                limit=config.limit,
+            )
+            for start in range(0, len(batch_queries), config.query_batch_size)
+        ]
+        recall = service.check_ann_recall(limit=config.limit)
+        indexed_rows = service.indexed_count
+    finally:
+        service.close()
+
+    return {
+        "config": dataclasses.asdict(config),
+        "settings": {
+            "fusion": settings.search.fusion,
+            "ann_backend": settings.ann.backend,
+            "quantization": settings.quantization.mode,
+            "rerank_model": settings.rerank.model_name,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "build": _throughput(config.rows, build_seconds),
+        "insert": {
+            **_throughput(config.inserts, sum(insert_latencies)),
+            "batch_latency_ms": _percentiles(insert_latencies),
+        },
+        "search": {
+            **_throughput(len(search_latencies), sum(search_latencies), unit="queries"),
+            "latency_ms": _percentiles(search_latencies),
+        },
+        "batch_search": {
+            **_throughput(len(batch_queries), sum(batch_latencies), unit="queries"),
+            "batch_latency_ms": _percentiles(batch_latencies),
+        },
+        "recall": {"limit": config.limit, "value": recall},
+        "indexed_rows": indexed_rows,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_embedding_parity(settings: DocumentSettings, texts: Sequence[str]) -> dict[str, Any]:
+    """Compare the configured embedding backend with the PyTorch model on ``texts``.
+
+    Reports the cosine agreement of the vectors and the embedding throughput of both. The
+    quantized export is kept under ``<store path>/models`` so later runs and the service
+    reuse it.
+    """
+
+    models = Path(settings.store.settings.path) / MODELS_DIRECTORY
+    baseline = load_embed_model(
+        dataclasses.replace(settings.embed, backend="torch", quantization="none"), models
+    )
+    candidate = load_embed_model(settings.embed, models)
+    parity = measure_embedding_parity(candidate, baseline, texts)
+    return {
+        "settings": {
+            "model_name": settings.embed.model_name,
+            "backend": settings.embed.backend,
+            "quantization": settings.embed.quantization,
+            "num_threads": settings.embed.num_threads,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "cosine": {"min": parity.min_cosine, "mean": parity.mean_cosine},
+        "baseline": _throughput(parity.texts, parity.baseline_seconds, unit="texts"),
+        "candidate": _throughput(parity.texts, parity.candidate_seconds, unit="texts"),
+        "speedup": parity.speedup,
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the benchmark from the command line and write its JSON report."""
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    for field in dataclasses.fields(BenchmarkConfig):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=type(field.default),
+            default=field.default,
+            choices=EMBEDDING_MODES if field.name == "embeddings" else None,
+        )
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=None,
+        help="Service YAML config whose documents settings (ANN, quantization, ...) to use.",
+    )
+    parser.add_argument(
+        "--directory",
+        type=Path,
+        default=None,
+        help="Directory for the index files; a temporary directory by default.",
+    )
+    parser.add_argument(
+        "--output", type=Path, default=None, help="Write the JSON report here instead of stdout."
+    )
+    parser.add_argument(
+        "--embedding-parity",
+        type=Path,
+        default=None,
+        metavar="TEXTS",
+        help="Instead of the index benchmark, compare the configured embedding backend with "
+        "PyTorch on the texts of this file (one per line).",
+    )
+    parser.add_argument(
+        "--min-cosine",
+        type=float,
+        default=0.99,
+        help="Exit with status 1 when the mean parity cosine falls below this value.",
+    )
+    args = parser.parse_args(argv)
+    # Keep stdout for the JSON report; per-query debug logs would also skew the latencies.
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING),
+        logger_factory=structlog.PrintLoggerFactory(sys.stderr),
+    )
+
+    config = BenchmarkConfig(
+        **{field.name: getattr(args, field.name) for field in dataclasses.fields(BenchmarkConfig)}
+    )
+    settings = (
+        load_dataclass_from_yaml(AppSettings, args.config).documents
+        if args.config is not None
+        else DocumentSettings()
+    )
+    if args.embedding_parity is not None:
+        texts = args.embedding_parity.read_text(encoding="utf-8").splitlines()
+        report = run_embedding_parity(settings, [text for text in texts if text.strip()])
+    elif args.directory is not None:
+        report = run_benchmark(config, settings, args.directory)
+    else:
+        with tempfile.TemporaryDirectory(prefix="documents-benchmark-") as directory:
+            report = run_benchmark(config, settings, Path(directory))
+
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    if args.embedding_parity is not None and report["cosine"]["mean"] < args.min_cosine:
+        sys.exit(1)
+
+
+def _batches(
+    corpus: SyntheticCorpus, start: int, count: int, batch_size: int
+) -> Iterator[list[DocumentPayload]]:
+    for offset in range(start, start + count, batch_size):
+        yield corpus.payloads(offset, min(batch_size, start + count - offset))
+
+
+def _timed(func: Callable[..., Any], *args: Any, **kwargs: Any) -> float:
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - started
+
+
+def _throughput(count: int, seconds: float, *, unit: str = "rows") -> dict[str, float]:
+    return {
+        unit: count,
+        "seconds": seconds,
+        f"{unit}_per_second": count / seconds if seconds > 0 else 0.0,
+    }
+
+
+def _percentiles(seconds: Sequence[float]) -> dict[str, float] | None:
+    if not seconds:
+        return None
+    values = np.asarray(seconds) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "mean": float(values.mean()),
+        "max": float(values.max()),
+    }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux but in bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024
+    return peak * scale / (1024 * 1024)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+if __name__ == "__main__":
+    main()
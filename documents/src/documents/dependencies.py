@@ -1,10 +1,20 @@
 """Dependency providers for the documents service."""
 
+from collections.abc import Iterator
 from functools import lru_cache
-from typing import Optional
+from typing import Annotated, Optional
 
+from fastapi import Query
+
+from documents.services.collection_manager import (
+    COLLECTION_NAME_PATTERN,
+    DEFAULT_COLLECTION,
+    CollectionManager,
+)
+from documents.services.executor import CpuExecutor
 from documents.services.indexing_service import DocumentIndexService
 from documents.services.settings import DocumentSettings
+from documents.services.warm_up import WarmUp, build_warm_up
 
 _DOCUMENT_SETTINGS: Optional[DocumentSettings] = None
 
@@ -14,13 +24,51 @@ def configure_document_dependencies(settings: DocumentSettings) -> None:
 
     global _DOCUMENT_SETTINGS
     _DOCUMENT_SETTINGS = settings
-    get_document_index_service.cache_clear()
+    get_collection_manager.cache_clear()
+    get_cpu_executor.cache_clear()
+    get_warm_up.cache_clear()
+
+
+CollectionName = Annotated[
+    str,
+    Query(
+        pattern=COLLECTION_NAME_PATTERN,
+        description="Index collection to use; created on first use",
+    ),
+]
+
+
+@lru_cache(maxsize=1)
+def get_collection_manager() -> CollectionManager:
+    """Return the singleton manager of the named index collections."""
+
+    if _DOCUMENT_SETTINGS is None:
+        raise RuntimeError("Document settings have not been configured.")
+    return CollectionManager(_DOCUMENT_SETTINGS)
+
+
+def get_document_index_service(
+    collection: CollectionName = DEFAULT_COLLECTION,
+) -> Iterator[DocumentIndexService]:
+    """Lease the index service of the requested collection for the duration of a request."""
+
+    with get_collection_manager().lease(collection) as service:
+        yield service
+
+
+@lru_cache(maxsize=1)
+def get_cpu_executor() -> CpuExecutor:
+    """Return the shared executor for CPU-bound index work."""
+
+    if _DOCUMENT_SETTINGS is None:
+        raise RuntimeError("Document settings have not been configured.")
+    return CpuExecutor(max_workers=_DOCUMENT_SETTINGS.executor.max_workers)
 
 
 @lru_cache(maxsize=1)
-def get_document_index_service() -> DocumentIndexService:
-    """Return a singleton instance of the document index service."""
+def get_warm_up() -> WarmUp:
+    """Return the startup warm-up that gates readiness."""
 
     if _DOCUMENT_SETTINGS is None:
         raise RuntimeError("Document settings have not been configured.")
-    return DocumentIndexService(_DOCUMENT_SETTINGS)
+    return build_warm_up(_DOCUMENT_SETTINGS, get_collection_manager())
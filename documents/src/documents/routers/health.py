@@ -0,0 +1,42 @@
+"""Liveness and readiness endpoints for the orchestrator."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Response, status
+
+from documents.dependencies import get_warm_up
+from documents.schemas import ReadinessResponse
+from documents.services.warm_up import WarmUp
+
+
+def create_health_router() -> APIRouter:
+    router = APIRouter(prefix="/health", tags=["health"])
+
+    WarmUpDependency = Annotated[WarmUp, Depends(get_warm_up)]
+
+    @router.get("/live", summary="Liveness check")
+    async def live() -> dict[str, str]:
+        """Report that the process is up and serving HTTP, warmed up or not."""
+
+        return {"status": "ok"}
+
+    @router.get(
+        "/ready",
+        response_model=ReadinessResponse,
+        responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ReadinessResponse}},
+        summary="Readiness check",
+    )
+    async def ready(warm_up: WarmUpDependency, response: Response) -> ReadinessResponse:
+        """Answer 200 once models and collections are warm, 503 until then or after a failure."""
+
+        warm_up_status = warm_up.status()
+        if warm_up_status.state != "ready":
+            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return ReadinessResponse(
+            status=warm_up_status.state,
+            completed=warm_up_status.completed,
+            pending=warm_up_status.pending,
+            error=warm_up_status.error,
+        )
+
+    return router
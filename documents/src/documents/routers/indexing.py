@@ -1,5 +1,8 @@
 """Document ingestion endpoints."""
 
+import os
+import tempfile
+from pathlib import Path
 from typing import Annotated
 
 from fastapi import (
@@ -9,15 +12,31 @@ from fastapi import (
     File,
     Form,
     HTTPException,
+    Request,
     UploadFile,
     status,
 )
-
-from documents.dependencies import get_document_index_service
-from documents.schemas import DocumentUploadResponse, IndexDocumentsRequest, IndexDocumentsResponse
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
+
+from documents.dependencies import (
+    CollectionName,
+    get_collection_manager,
+    get_cpu_executor,
+    get_document_index_service,
+)
+from documents.schemas import (
+    DeleteDocumentResponse,
+    DocumentUploadResponse,
+    IndexDocumentsRequest,
+    IndexDocumentsResponse,
+)
+from documents.services.collection_manager import DEFAULT_COLLECTION, CollectionManager
+from documents.services.executor import CpuExecutor
 from documents.services.indexing_service import DocumentIndexService
-from documents.services.pdf_ingestion import process_pdf_for_indexing, DocumentsStore
+from documents.services.pdf_ingestion import process_pdf_for_collection, DocumentsStore
 from documents.services.settings import DocumentSettings
+from documents.services.snapshot import SnapshotError
 
 
 def create_indexing_router(document_settings: DocumentSettings) -> APIRouter:
@@ -26,6 +45,8 @@ def create_indexing_router(document_settings: DocumentSettings) -> APIRouter:
     documents_store = DocumentsStore(settings=document_settings)
 
     ServiceDependency = Annotated[DocumentIndexService, Depends(get_document_index_service)]
+    ExecutorDependency = Annotated[CpuExecutor, Depends(get_cpu_executor)]
+    CollectionsDependency = Annotated[CollectionManager, Depends(get_collection_manager)]
     UploadFileDependency = Annotated[UploadFile, File(...)]
     DocumentIdForm = Annotated[str | None, Form()]
 
@@ -33,12 +54,92 @@ def create_indexing_router(document_settings: DocumentSettings) -> APIRouter:
     async def index_documents(
         request: IndexDocumentsRequest,
         service: ServiceDependency,
+        executor: ExecutorDependency,
+    ) -> IndexDocumentsResponse:
+        """Ingest new or changed documents into the LlamaIndex vector stores."""
+
+        indexed_count = await executor.run(service.index_documents, request.documents)
+        return IndexDocumentsResponse(indexed_count=indexed_count)
+
+    @router.put(
+        "/{document_id}", response_model=IndexDocumentsResponse, summary="Replace a document"
+    )
+    async def replace_document(
+        document_id: str,
+        request: IndexDocumentsRequest,
+        service: ServiceDependency,
+        executor: ExecutorDependency,
     ) -> IndexDocumentsResponse:
-        """Ingest new documents and rebuild the LlamaIndex vector store."""
+        """Replace every chunk of a parent document with the provided chunks."""
 
-        indexed_count = service.index_documents(request.documents)
+        indexed_count = await executor.run(service.replace_document, document_id, request.documents)
         return IndexDocumentsResponse(indexed_count=indexed_count)
 
+    @router.delete(
+        "/{document_id}", response_model=DeleteDocumentResponse, summary="Delete a document"
+    )
+    async def delete_document(
+        document_id: str,
+        service: ServiceDependency,
+        executor: ExecutorDependency,
+    ) -> DeleteDocumentResponse:
+        """Remove every chunk of a parent document from the index."""
+
+        deleted_count = await executor.run(service.delete_document, document_id)
+        if deleted_count == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Document '{document_id}' is not indexed.",
+            )
+        return DeleteDocumentResponse(document_id=document_id, deleted_count=deleted_count)
+
+    @router.get(
+        "/index/snapshot",
+        response_class=FileResponse,
+        summary="Export the index as a binary snapshot",
+    )
+    async def export_snapshot(
+        service: ServiceDependency,
+        executor: ExecutorDependency,
+    ) -> FileResponse:
+        """Download a snapshot of the index, e.g. to seed a new replica without re-ingesting."""
+
+        path = _temporary_path()
+        try:
+            await executor.run(service.export_snapshot, path)
+        except BaseException:
+            path.unlink(missing_ok=True)
+            raise
+        return FileResponse(
+            path,
+            media_type="application/octet-stream",
+            filename="index.snapshot",
+            background=BackgroundTask(path.unlink, missing_ok=True),
+        )
+
+    @router.put(
+        "/index/snapshot",
+        response_model=IndexDocumentsResponse,
+        summary="Replace the index with a binary snapshot",
+    )
+    async def import_snapshot(
+        request: Request,
+        service: ServiceDependency,
+        executor: ExecutorDependency,
+    ) -> IndexDocumentsResponse:
+        """Load a snapshot sent as the raw request body; searches continue until the swap."""
+
+        path = _temporary_path()
+        try:
+            with path.open("wb") as handle:
+                async for chunk in request.stream():
+                    handle.write(chunk)
+            indexed_count = await executor.run(service.import_snapshot, path)
+        except SnapshotError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+        finally:
+            path.unlink(missing_ok=True)
+        return IndexDocumentsResponse(indexed_count=indexed_count)
 
     @router.post(
         "/index/pdf",
@@ -48,9 +149,11 @@ def create_indexing_router(document_settings: DocumentSettings) -> APIRouter:
     )
     async def index_pdf_document(
         background_tasks: BackgroundTasks,
-        service: ServiceDependency,
+        collections: CollectionsDependency,
+        executor: ExecutorDependency,
         file: UploadFileDependency,
         document_id: DocumentIdForm = None,
+        collection: CollectionName = DEFAULT_COLLECTION,
     ) -> DocumentUploadResponse:
         """Persist a PDF upload then extract and index its contents asynchronously."""
 
@@ -65,11 +168,14 @@ def create_indexing_router(document_settings: DocumentSettings) -> APIRouter:
         except ValueError as exc:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
+        # The task leases the collection itself: the request's lease ends before it runs.
         background_tasks.add_task(
-            process_pdf_for_indexing,
+            executor.run,
+            process_pdf_for_collection,
             file_path,
             document_id=resolved_id,
-            service=service,
+            collections=collections,
+            collection=collection,
             original_filename=file.filename,
             document_settings=document_settings,
         )
@@ -81,3 +187,9 @@ def create_indexing_router(document_settings: DocumentSettings) -> APIRouter:
         )
 
     return router
+
+
+def _temporary_path() -> Path:
+    handle, name = tempfile.mkstemp(prefix="documents-snapshot-")
+    os.close(handle)
+    return Path(name)
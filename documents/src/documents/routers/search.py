@@ -4,29 +4,114 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from documents.dependencies import get_document_index_service
-from documents.schemas import SearchRequest, SearchResponse
+from documents.dependencies import get_cpu_executor, get_document_index_service
+from documents.schemas import (
+    BatchSearchRequest,
+    BatchSearchResponse,
+    CacheStatistics,
+    ExecutorStatistics,
+    SearchRequest,
+    SearchResponse,
+    SearchStatsResponse,
+)
+from documents.services.executor import CpuExecutor
 from documents.services.indexing_service import DocumentIndexNotReadyError, DocumentIndexService
 
 
 def create_search_router() -> APIRouter:
     router = APIRouter(prefix="/documents", tags=["search"])
 
+    ServiceDependency = Annotated[DocumentIndexService, Depends(get_document_index_service)]
+    ExecutorDependency = Annotated[CpuExecutor, Depends(get_cpu_executor)]
+
     @router.post("/search", response_model=SearchResponse, summary="Search documents")
     async def search_documents(
         request: SearchRequest,
-        service: Annotated[DocumentIndexService, Depends(get_document_index_service)],
+        service: ServiceDependency,
+        executor: ExecutorDependency,
     ) -> SearchResponse:
-        """Query the index and return matches produced by LlamaIndex."""
+        """Query the index and return the nodes matched by the LlamaIndex retrievers.
+
+        The search runs on the CPU executor so concurrent searches proceed in parallel (and
+        their query embeddings can be micro-batched) while the event loop stays responsive.
+        With ``debug`` set, the response carries the milliseconds spent per search stage.
+        """
 
+        timings: dict[str, float] | None = {} if request.debug else None
         try:
-            results = service.search(request.query, limit=request.limit)
+            results = await executor.run(
+                service.search,
+                request.query,
+                limit=request.limit,
+                filters=request.filters,
+                mmr_lambda=request.mmr_lambda,
+                expand_window=request.expand_window,
+                timings=timings,
+            )
         except DocumentIndexNotReadyError as exc:
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail=str(exc),
             ) from exc
 
-        return SearchResponse(results=results)
+        return SearchResponse(results=results, timings_ms=timings)
+
+    @router.post(
+        "/search/batch", response_model=BatchSearchResponse, summary="Search documents in bulk"
+    )
+    async def search_documents_batch(
+        request: BatchSearchRequest,
+        service: ServiceDependency,
+        executor: ExecutorDependency,
+    ) -> BatchSearchResponse:
+        """Run several queries with one embedding pass and one scoring pass over the index."""
+
+        timings: dict[str, float] | None = {} if request.debug else None
+        try:
+            results = await executor.run(
+                service.search_many,
+                request.queries,
+                limit=request.limit,
+                filters=request.filters,
+                mmr_lambda=request.mmr_lambda,
+                expand_window=request.expand_window,
+                timings=timings,
+            )
+        except DocumentIndexNotReadyError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(exc),
+            ) from exc
+
+        return BatchSearchResponse(
+            results=[SearchResponse(results=hits) for hits in results], timings_ms=timings
+        )
+
+    @router.get("/search/stats", response_model=SearchStatsResponse, summary="Search statistics")
+    async def search_stats(
+        service: ServiceDependency,
+        executor: ExecutorDependency,
+    ) -> SearchStatsResponse:
+        """Report cache hit rates and the CPU executor queue depth."""
+
+        caches = {
+            name: CacheStatistics(
+                hits=stats.hits,
+                misses=stats.misses,
+                size=stats.size,
+                max_size=stats.max_size,
+                hit_rate=stats.hit_rate,
+            )
+            for name, stats in service.cache_stats().items()
+        }
+        executor_stats = executor.stats()
+        return SearchStatsResponse(
+            caches=caches,
+            executor=ExecutorStatistics(
+                max_workers=executor_stats.max_workers,
+                active=executor_stats.active,
+                queued=executor_stats.queued,
+            ),
+        )
 
     return router
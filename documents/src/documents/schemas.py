@@ -2,7 +2,11 @@
 
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+MAX_SEARCH_LIMIT = 20
+MAX_BATCH_QUERIES = 128
+MAX_EXPAND_WINDOW = 5
 
 
 class DocumentPayload(BaseModel):
@@ -29,6 +33,13 @@ class IndexDocumentsResponse(BaseModel):
     indexed_count: int = Field(..., description="Number of documents now tracked by the index")
 
 
+class DeleteDocumentResponse(BaseModel):
+    """Response body returned after deleting a document."""
+
+    document_id: str = Field(..., description="Parent document identifier that was deleted")
+    deleted_count: int = Field(..., description="Number of chunks removed from the index")
+
+
 class DocumentUploadResponse(BaseModel):
     """Response returned after accepting a PDF upload for indexing."""
 
@@ -40,6 +51,25 @@ class DocumentUploadResponse(BaseModel):
     )
 
 
+class SearchFilters(BaseModel):
+    """Restrict a search to chunks whose attributes match every field that is set."""
+
+    model_config = ConfigDict(frozen=True)
+
+    parent_document_id: str | None = Field(
+        default=None, description="Only search the chunks of this parent document (e.g. one PDF)"
+    )
+    original_filename: str | None = Field(
+        default=None, description="Only search chunks ingested from this uploaded file name"
+    )
+    page_from: int | None = Field(
+        default=None, ge=1, description="Only search chunks on this page or later"
+    )
+    page_to: int | None = Field(
+        default=None, ge=1, description="Only search chunks on this page or earlier"
+    )
+
+
 class SearchRequest(BaseModel):
     """Request body for free-text document search."""
 
@@ -47,16 +77,39 @@ class SearchRequest(BaseModel):
     limit: int = Field(
         5,
         ge=1,
-        le=20,
+        le=MAX_SEARCH_LIMIT,
         description="Maximum number of matches returned by the search endpoint",
     )
+    filters: SearchFilters | None = Field(
+        default=None, description="Restrict the search to matching chunks before ranking"
+    )
+    mmr_lambda: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description=(
+            "Pick results by maximal marginal relevance: 1.0 ranks purely by relevance, lower "
+            "values favour chunks unlike those already picked; omit to disable"
+        ),
+    )
+    expand_window: int = Field(
+        0,
+        ge=0,
+        le=MAX_EXPAND_WINDOW,
+        description="Return each hit stitched with this many chunks before and after it",
+    )
+    debug: bool = Field(
+        default=False, description="Include the time spent per search stage in the response"
+    )
 
 
 class SearchResult(BaseModel):
-    """A single search hit returned by LlamaIndex."""
+    """A single search hit fused from the vector and BM25 retrievers."""
 
     document_id: str = Field(..., description="Identifier of the source document")
-    score: float = Field(..., description="Relevance score for the result")
+    score: float = Field(
+        ..., description="Fused relevance score, or the cross-encoder score when reranked"
+    )
     content: str | None = Field(
         default=None,
         description="Snippet pulled from the source node that matched the query",
@@ -64,9 +117,113 @@ class SearchResult(BaseModel):
     metadata: dict[str, Any] = Field(
         default_factory=dict, description="Metadata associated with the matched node"
     )
+    scores: dict[str, float] = Field(
+        default_factory=dict,
+        description=(
+            "Raw score from every retriever (content, summary, bm25) that matched, "
+            "plus the cross-encoder score (rerank) when reranked"
+        ),
+    )
+    context: str | None = Field(
+        default=None,
+        description="The hit stitched with its neighbouring chunks when expand_window is set",
+    )
+    context_document_ids: list[str] = Field(
+        default_factory=list,
+        description="Chunks stitched into context, in document order",
+    )
 
 
 class SearchResponse(BaseModel):
     """Response body returned after executing a search query."""
 
     results: list[SearchResult] = Field(..., description="Ordered list of search hits")
+    timings_ms: dict[str, float] | None = Field(
+        default=None, description="Milliseconds spent per search stage; only set with debug"
+    )
+
+
+class BatchSearchRequest(BaseModel):
+    """Request body for running several searches in one call."""
+
+    queries: list[str] = Field(
+        ...,
+        min_length=1,
+        max_length=MAX_BATCH_QUERIES,
+        description="Queries to run against the index",
+    )
+    limit: int = Field(
+        5,
+        ge=1,
+        le=MAX_SEARCH_LIMIT,
+        description="Maximum number of matches returned per query",
+    )
+    filters: SearchFilters | None = Field(
+        default=None, description="Filters applied to every query of the batch"
+    )
+    mmr_lambda: float | None = Field(
+        default=None,
+        ge=0.0,
+        le=1.0,
+        description="Maximal marginal relevance trade-off applied to every query of the batch",
+    )
+    expand_window: int = Field(
+        0,
+        ge=0,
+        le=MAX_EXPAND_WINDOW,
+        description="Neighbouring chunks stitched around every hit of the batch",
+    )
+    debug: bool = Field(
+        default=False, description="Include the time spent per search stage in the response"
+    )
+
+
+class BatchSearchResponse(BaseModel):
+    """Response body returned after executing a batch of search queries."""
+
+    results: list[SearchResponse] = Field(
+        ..., description="Search responses in the same order as the request queries"
+    )
+    timings_ms: dict[str, float] | None = Field(
+        default=None,
+        description="Milliseconds spent per search stage over the whole batch; only set with debug",
+    )
+
+
+class CacheStatistics(BaseModel):
+    """Hit/miss counters of one search cache."""
+
+    hits: int = Field(..., description="Lookups answered from the cache")
+    misses: int = Field(..., description="Lookups that had to be computed")
+    size: int = Field(..., description="Entries currently cached")
+    max_size: int = Field(..., description="Configured capacity; 0 means disabled")
+    hit_rate: float = Field(..., description="hits / (hits + misses)")
+
+
+class ExecutorStatistics(BaseModel):
+    """Load of the executor running CPU-bound index work."""
+
+    max_workers: int = Field(..., description="Configured number of worker threads")
+    active: int = Field(..., description="Calls currently running")
+    queued: int = Field(..., description="Calls waiting for a free worker")
+
+
+class SearchStatsResponse(BaseModel):
+    """Runtime statistics of the search path used to size its caches and executor."""
+
+    caches: dict[str, CacheStatistics] = Field(
+        ...,
+        description="Statistics keyed by cache (query_embeddings, results, text_embeddings)",
+    )
+    executor: ExecutorStatistics = Field(..., description="CPU executor load")
+
+
+class ReadinessResponse(BaseModel):
+    """Progress of the startup warm-up that gates traffic to this instance."""
+
+    status: Literal["warming_up", "ready", "failed"] = Field(
+        ..., description="ready once every warm-up step has succeeded"
+    )
+    completed: list[str] = Field(..., description="Warm-up steps that have finished")
+    pending: list[str] = Field(..., description="Warm-up steps still to run")
+    error: str | None = Field(default=None, description="Why the warm-up failed, if it did")
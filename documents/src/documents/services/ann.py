@@ -0,0 +1,255 @@
+"""Approximate nearest-neighbour indexes that generate candidates for the vector store.
+
+An ANN index never returns scores itself: it proposes candidate rows per vector kind and
+``PersistentVectorStore.search`` re-scores them exactly, so retired rows and summary-less
+rows are filtered the same way as in brute-force search.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Final, Protocol
+
+import numpy as np
+import structlog
+
+from documents.services.settings import AnnSettings
+from documents.services.vector_store import VECTOR_KINDS, PersistentVectorStore
+
+if TYPE_CHECKING:
+    import hnswlib
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+_MIN_POINTS_PER_LIST: Final = 4
+_TRAIN_POINTS_PER_LIST: Final = 64
+_KMEANS_ITERATIONS: Final = 10
+_RETRAIN_GROWTH: Final = 4
+_ASSIGN_BATCH: Final = 65536
+
+
+class AnnIndex(Protocol):
+    """Candidate generator kept in sync with the rows of a ``PersistentVectorStore``."""
+
+    def add(self, start: int, stop: int) -> None:
+        """Index the store rows in ``[start, stop)``."""
+
+    def candidates(self, query: np.ndarray, *, limit: int) -> dict[str, np.ndarray] | None:
+        """Return candidate rows per vector kind, or ``None`` to fall back to exact search."""
+
+
+def build_ann_index(settings: AnnSettings, store: PersistentVectorStore) -> AnnIndex | None:
+    """Create the ANN backend selected by ``settings`` or ``None`` for exact search."""
+
+    if settings.backend == "exact":
+        return None
+    if settings.backend == "ivf":
+        return IvfFlatIndex(store, nlist=settings.nlist, nprobe=settings.nprobe)
+    if settings.backend == "hnsw":
+        return HnswIndex(
+            store,
+            m=settings.hnsw_m,
+            ef_construction=settings.ef_construction,
+            ef_search=settings.ef_search,
+            candidate_factor=settings.candidate_factor,
+        )
+    raise ValueError(f"Unsupported ANN backend '{settings.backend}'")
+
+
+def measure_recall(
+    store: PersistentVectorStore,
+    index: AnnIndex,
+    *,
+    sample_size: int,
+    limit: int,
+    seed: int = 0,
+) -> float:
+    """Return the mean recall@``limit`` of ``index`` against exact content search.
+
+    Queries are stored content vectors with a little Gaussian noise, so the check needs no
+    embedding model and exercises the same re-scoring path as live searches.
+    """
+
+    rows = np.flatnonzero(store.eligible("content"))
+    if rows.size == 0:
+        return 1.0
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(rows, size=min(sample_size, rows.size), replace=False)
+    vectors = store.vectors("content")
+    noise_scale = 0.5 / np.sqrt(vectors.shape[1])
+
+    found = expected = 0
+    for row in sample:
+        query = np.asarray(vectors[row]) + rng.normal(scale=noise_scale, size=vectors.shape[1])
+        exact = {hit for hit, _ in store.search(query, limit=limit)["content"]}
+        candidates = index.candidates(query, limit=limit)
+        approximate = store.search(query, limit=limit, candidates=candidates)["content"]
+        found += len(exact.intersection(hit for hit, _ in approximate))
+        expected += len(exact)
+    return found / expected if expected else 1.0
+
+
+class IvfFlatIndex:
+    """Inverted-file index: k-means lists probed by centroid similarity.
+
+    Training runs once enough rows exist (until then searches fall back to exact scoring)
+    and again whenever the store has grown ``_RETRAIN_GROWTH`` times since the last run.
+    """
+
+    def __init__(self, store: PersistentVectorStore, *, nlist: int, nprobe: int) -> None:
+        self._store = store
+        self._nlist = nlist
+        self._nprobe = nprobe
+        self._centroids: dict[str, np.ndarray] = {}
+        self._lists: dict[str, list[np.ndarray]] = {}
+        self._retrain_at = nlist * _MIN_POINTS_PER_LIST
+
+    @property
+    def trained(self) -> bool:
+        return bool(self._centroids)
+
+    def add(self, start: int, stop: int) -> None:
+        if self._store.rows >= self._retrain_at:
+            self._train()
+        elif self.trained:
+            for kind in VECTOR_KINDS:
+                self._assign(kind, start, stop)
+
+    def candidates(self, query: np.ndarray, *, limit: int) -> dict[str, np.ndarray] | None:
+        if not self.trained:
+            return None
+
+        query = np.asarray(query, dtype=np.float32)
+        candidates: dict[str, np.ndarray] = {}
+        for kind in VECTOR_KINDS:
+            similarities = self._centroids[kind] @ query
+            if similarities.size == 0:
+                candidates[kind] = np.zeros(0, dtype=np.int64)
+                continue
+            nprobe = min(self._nprobe, similarities.size)
+            probed = np.argpartition(-similarities, nprobe - 1)[:nprobe]
+            candidates[kind] = np.concatenate([self._lists[kind][index] for index in probed])
+        return candidates
+
+    def _train(self) -> None:
+        rng = np.random.default_rng(0)
+        for kind in VECTOR_KINDS:
+            rows = np.flatnonzero(self._store.eligible(kind))
+            nlist = max(1, min(self._nlist, rows.size // _MIN_POINTS_PER_LIST))
+            sample_rows = rng.choice(
+                rows, size=min(rows.size, nlist * _TRAIN_POINTS_PER_LIST), replace=False
+            )
+            sample = np.asarray(self._store.vectors(kind)[np.sort(sample_rows)])
+            self._centroids[kind] = _kmeans(sample, nlist, rng) if rows.size else sample
+            self._lists[kind] = [np.zeros(0, dtype=np.int64) for _ in range(nlist)]
+            self._assign(kind, 0, self._store.rows)
+
+        self._retrain_at = self._store.rows * _RETRAIN_GROWTH
+        LOGGER.info("Trained IVF index", rows=self._store.rows, nlist=self._nlist)
+
+    def _assign(self, kind: str, start: int, stop: int) -> None:
+        centroids = self._centroids[kind]
+        if centroids.shape[0] == 0:
+            return
+
+        eligible = self._store.eligible(kind)
+        vectors = self._store.vectors(kind)
+        lists = self._lists[kind]
+        for batch_start in range(start, stop, _ASSIGN_BATCH):
+            batch_stop = min(stop, batch_start + _ASSIGN_BATCH)
+            rows = batch_start + np.flatnonzero(eligible[batch_start:batch_stop])
+            if rows.size == 0:
+                continue
+            assignments = np.argmax(np.asarray(vectors[rows]) @ centroids.T, axis=1)
+            order = np.argsort(assignments, kind="stable")
+            boundaries = np.flatnonzero(np.diff(assignments[order])) + 1
+            for group in np.split(order, boundaries):
+                list_index = assignments[group[0]]
+                lists[list_index] = np.concatenate([lists[list_index], rows[group]])
+
+
+class HnswIndex:
+    """Hierarchical navigable small-world graphs built with the optional ``hnswlib``."""
+
+    def __init__(
+        self,
+        store: PersistentVectorStore,
+        *,
+        m: int,
+        ef_construction: int,
+        ef_search: int,
+        candidate_factor: int,
+    ) -> None:
+        try:
+            import hnswlib  # noqa: F401
+        except ImportError as exc:  # pragma: no cover - depends on optional extra
+            raise ImportError(
+                "The 'hnsw' ANN backend requires hnswlib; install the 'documents[ann]' extra."
+            ) from exc
+
+        self._store = store
+        self._m = m
+        self._ef_construction = ef_construction
+        self._ef_search = ef_search
+        self._candidate_factor = candidate_factor
+        self._graphs: dict[str, hnswlib.Index] = {}
+
+    def add(self, start: int, stop: int) -> None:
+        if self._store.dim is None or stop <= start:
+            return
+
+        for kind in VECTOR_KINDS:
+            rows = start + np.flatnonzero(self._store.eligible(kind)[start:stop])
+            if rows.size == 0:
+                continue
+            graph = self._graph(kind, rows.size)
+            graph.add_items(np.asarray(self._store.vectors(kind)[rows]), rows)
+
+    def candidates(self, query: np.ndarray, *, limit: int) -> dict[str, np.ndarray] | None:
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        candidates: dict[str, np.ndarray] = {}
+        for kind in VECTOR_KINDS:
+            graph = self._graphs.get(kind)
+            count = graph.get_current_count() if graph is not None else 0
+            if count == 0:
+                candidates[kind] = np.zeros(0, dtype=np.int64)
+                continue
+            k = min(count, limit * self._candidate_factor)
+            if k > graph.ef:
+                graph.set_ef(k)
+            labels, _ = graph.knn_query(query, k=k)
+            candidates[kind] = labels[0].astype(np.int64)
+        return candidates
+
+    def _graph(self, kind: str, additional: int) -> hnswlib.Index:
+        import hnswlib
+
+        graph = self._graphs.get(kind)
+        if graph is None:
+            graph = hnswlib.Index(space="ip", dim=self._store.dim)
+            graph.init_index(
+                max_elements=max(additional, 1024),
+                ef_construction=self._ef_construction,
+                M=self._m,
+            )
+            graph.set_ef(self._ef_search)
+            self._graphs[kind] = graph
+        required = graph.get_current_count() + additional
+        if required > graph.get_max_elements():
+            graph.resize_index(max(required, 2 * graph.get_max_elements()))
+        return graph
+
+
+def _kmeans(sample: np.ndarray, nlist: int, rng: np.random.Generator) -> np.ndarray:
+    """Run spherical k-means on unit-length ``sample`` rows and return the centroids."""
+
+    centroids = sample[rng.choice(sample.shape[0], size=nlist, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        empty = np.bincount(assignments, minlength=nlist) == 0
+        sums[empty] = centroids[empty]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = (sums / np.where(norms == 0, 1.0, norms)).astype(np.float32)
+    return centroids
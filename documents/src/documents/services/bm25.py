@@ -0,0 +1,182 @@
+"""Incrementally maintained Okapi BM25 inverted index."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from collections.abc import Container, Sequence
+
+import numpy as np
+
+from documents.services.snapshot import SnapshotError, SnapshotReader, SnapshotWriter, offsets
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split ``text`` into lower-cased word tokens."""
+
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """In-process BM25 index supporting per-document add, replace, and remove.
+
+    Postings map each term to the term frequency of every document containing it, so adding
+    or removing a document only touches the postings of its own terms.
+    """
+
+    def __init__(self, *, k1: float = 1.5, b: float = 0.75) -> None:
+        self._k1 = k1
+        self._b = b
+        self._postings: dict[str, dict[str, int]] = {}
+        self._doc_lengths: dict[str, int] = {}
+        self._doc_terms: dict[str, tuple[str, ...]] = {}
+        self._total_length = 0
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index ``text`` under ``doc_id``, replacing any previous version."""
+
+        self.remove(doc_id)
+        term_counts = Counter(tokenize(text))
+        if not term_counts:
+            return
+
+        for term, count in term_counts.items():
+            self._postings.setdefault(term, {})[doc_id] = count
+        length = sum(term_counts.values())
+        self._doc_lengths[doc_id] = length
+        self._doc_terms[doc_id] = tuple(term_counts)
+        self._total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        """Drop ``doc_id`` from the index if present."""
+
+        length = self._doc_lengths.pop(doc_id, None)
+        if length is None:
+            return
+
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(
+        self, query: str, *, limit: int, allowed: Container[str] | None = None
+    ) -> list[tuple[str, float]]:
+        """Return up to ``limit`` ``(doc_id, score)`` pairs ordered by descending score.
+
+        When ``allowed`` is given, only those documents are scored; corpus statistics still
+        cover every indexed document so scores do not depend on the filter.
+        """
+
+        doc_count = len(self._doc_lengths)
+        if doc_count == 0:
+            return []
+
+        average_length = self._total_length / doc_count
+        k1, b = self._k1, self._b
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+            for doc_id, tf in postings.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = k1 * (1.0 - b + b * self._doc_lengths[doc_id] / average_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def write_snapshot(self, writer: SnapshotWriter, doc_ids: Sequence[str]) -> None:
+        """Write the postings as CSR arrays that refer to documents by position in ``doc_ids``."""
+
+        positions = {doc_id: position for position, doc_id in enumerate(doc_ids)}
+        terms = list(self._postings)
+        entries = sum(len(postings) for postings in self._postings.values())
+        writer.write_strings("bm25.terms", terms)
+        writer.write_array(
+            "bm25.term_offsets", offsets(len(self._postings[term]) for term in terms)
+        )
+        writer.write_array(
+            "bm25.documents",
+            np.fromiter(
+                (positions[doc_id] for term in terms for doc_id in self._postings[term]),
+                dtype=np.int64,
+                count=entries,
+            ),
+        )
+        writer.write_array(
+            "bm25.frequencies",
+            np.fromiter(
+                (tf for term in terms for tf in self._postings[term].values()),
+                dtype=np.int64,
+                count=entries,
+            ),
+        )
+        writer.write_array(
+            "bm25.lengths",
+            np.fromiter(
+                (self._doc_lengths.get(doc_id, 0) for doc_id in doc_ids),
+                dtype=np.int64,
+                count=len(doc_ids),
+            ),
+        )
+
+    @classmethod
+    def read_snapshot(
+        cls, reader: SnapshotReader, doc_ids: Sequence[str], *, k1: float, b: float
+    ) -> BM25Index:
+        """Load an index from ``write_snapshot`` sections without tokenizing any text."""
+
+        terms = reader.read_strings("bm25.terms")
+        term_offsets = reader.read_array("bm25.term_offsets", np.int64)
+        documents = reader.read_array("bm25.documents", np.int64)
+        frequencies = reader.read_array("bm25.frequencies", np.int64)
+        lengths = reader.read_array("bm25.lengths", np.int64)
+        if not (
+            len(term_offsets) == len(terms) + 1
+            and term_offsets[-1] == len(documents) == len(frequencies)
+            and len(lengths) == len(doc_ids)
+            and (documents.size == 0 or 0 <= documents.min() <= documents.max() < len(doc_ids))
+        ):
+            raise SnapshotError("Inconsistent BM25 sections in snapshot")
+
+        index = cls(k1=k1, b=b)
+        posting_ids = [doc_ids[position] for position in documents.tolist()]
+        posting_tfs = frequencies.tolist()
+        bounds = term_offsets.tolist()
+        for term, start, end in zip(terms, bounds, bounds[1:], strict=False):
+            index._postings[term] = dict(
+                zip(posting_ids[start:end], posting_tfs[start:end], strict=True)
+            )
+
+        # Group the term of every posting by document to recover each document's term list.
+        term_ids = np.repeat(np.arange(len(terms)), np.diff(term_offsets))
+        by_document = term_ids[np.argsort(documents, kind="stable")].tolist()
+        document_bounds = offsets(np.bincount(documents, minlength=len(doc_ids))).tolist()
+        for position, length in enumerate(lengths.tolist()):
+            if length:
+                doc_id = doc_ids[position]
+                index._doc_lengths[doc_id] = length
+                index._doc_terms[doc_id] = tuple(
+                    map(
+                        terms.__getitem__,
+                        by_document[document_bounds[position] : document_bounds[position + 1]],
+                    )
+                )
+        index._total_length = int(lengths.sum())
+        return index
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._doc_lengths
@@ -0,0 +1,312 @@
+"""Compact in-memory table of indexed chunks."""
+
+from __future__ import annotations
+
+import json
+import sys
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, Final
+
+import numpy as np
+
+from documents.schemas import DocumentPayload
+from documents.services.snapshot import SnapshotError, SnapshotReader, SnapshotWriter, offsets
+
+# Rebuild the buffers once removed rows outnumber live ones (and there are at least this many).
+_MIN_RECLAIM_ROWS: Final = 1024
+# Larger ``chunk_index`` values are not slotted, so a bogus index cannot allocate a huge array.
+_MAX_CHUNK_INDEX: Final = 1 << 20
+
+
+class ChunkTable:
+    """Columnar store of chunk text and metadata addressed by integer row.
+
+    Content and metadata are kept once, as UTF-8 and compact JSON in two append-only byte
+    buffers indexed by parallel offset arrays, instead of one ``DocumentPayload`` and its
+    metadata dict per chunk. Document and parent ids are interned, so the many chunks of a
+    parent share one string. Payloads are only materialized on request, e.g. for the top-k
+    hits of a search. Replacing or removing a chunk leaves its bytes behind until removed
+    rows outnumber live ones, at which point the buffers are rewritten.
+
+    Chunks carrying a ``chunk_index`` are also slotted into a per-parent array ordered by
+    that index, so the neighbours of a chunk are a slice away.
+    """
+
+    def __init__(self) -> None:
+        self._text = bytearray()
+        self._metadata = bytearray()
+        # Row ``r`` spans ``_text[_text_offsets[r]:_text_offsets[r + 1]]``; same for metadata.
+        self._text_offsets = array("q", [0])
+        self._metadata_offsets = array("q", [0])
+        self._document_ids: list[str | None] = []
+        self._parent_ids: list[str] = []
+        self._chunk_indexes = array("q")
+        self._row_by_id: dict[str, int] = {}
+        self._children: dict[str, set[str]] = {}
+        # parent id -> chunk ids at their ``chunk_index`` position (``None`` for gaps)
+        self._sequences: dict[str, list[str | None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    def __contains__(self, document_id: object) -> bool:
+        return document_id in self._row_by_id
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._row_by_id)
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the text and metadata buffers, including reclaimable bytes."""
+
+        return len(self._text) + len(self._metadata)
+
+    def add(self, payload: DocumentPayload) -> None:
+        """Store ``payload``, replacing the row previously stored for its ``document_id``."""
+
+        self.remove(payload.document_id)
+        document_id = sys.intern(payload.document_id)
+        parent_id = sys.intern(_parent_id(payload.document_id, payload.metadata))
+        chunk_index = _chunk_index(payload.metadata)
+        self._append(
+            document_id,
+            parent_id,
+            chunk_index,
+            payload.content.encode("utf-8"),
+            _encode_metadata(payload.metadata),
+        )
+        self._group(document_id, parent_id, chunk_index)
+
+    def remove(self, document_id: str) -> bool:
+        """Drop ``document_id`` and return whether it was stored."""
+
+        row = self._row_by_id.pop(document_id, None)
+        if row is None:
+            return False
+        self._document_ids[row] = None
+        parent_id = self._parent_ids[row]
+        siblings = self._children[parent_id]
+        siblings.discard(document_id)
+        if not siblings:
+            del self._children[parent_id]
+        self._unslot(parent_id, self._chunk_indexes[row], document_id)
+
+        removed = len(self._document_ids) - len(self._row_by_id)
+        if removed >= _MIN_RECLAIM_ROWS and removed > len(self._row_by_id):
+            self._reclaim()
+        return True
+
+    def matches(self, payload: DocumentPayload) -> bool:
+        """Return whether ``payload`` equals the stored row, without decoding the row."""
+
+        row = self._row_by_id.get(payload.document_id)
+        return (
+            row is not None
+            and self._text_bytes(row) == payload.content.encode("utf-8")
+            and self._metadata_bytes(row) == _encode_metadata(payload.metadata)
+        )
+
+    def children(self, parent_id: str) -> set[str]:
+        """Return the ids of the chunks grouped under ``parent_id``."""
+
+        return set(self._children.get(parent_id, ()))
+
+    def neighbours(self, document_id: str, window: int) -> list[str]:
+        """Return the ids of the chunks up to ``window`` positions around ``document_id``.
+
+        The result is ordered by ``chunk_index`` and includes ``document_id`` itself; a chunk
+        without a ``chunk_index`` has no neighbours, and an unknown id gives an empty list.
+        """
+
+        row = self._row_by_id.get(document_id)
+        if row is None:
+            return []
+        chunk_index = self._chunk_indexes[row]
+        if chunk_index < 0:
+            return [document_id]
+        sequence = self._sequences[self._parent_ids[row]]
+        start = max(chunk_index - window, 0)
+        return [
+            neighbour
+            for neighbour in sequence[start : chunk_index + window + 1]
+            if neighbour is not None
+        ]
+
+    def content(self, document_id: str) -> str:
+        return self._text_bytes(self._row_by_id[document_id]).decode("utf-8")
+
+    def metadata(self, document_id: str) -> dict[str, Any]:
+        return json.loads(self._metadata_bytes(self._row_by_id[document_id]))
+
+    def payload(self, document_id: str) -> DocumentPayload | None:
+        """Materialize the stored chunk as a ``DocumentPayload``, or ``None`` if unknown."""
+
+        if document_id not in self._row_by_id:
+            return None
+        return DocumentPayload(
+            document_id=document_id,
+            content=self.content(document_id),
+            metadata=self.metadata(document_id),
+        )
+
+    def write_snapshot(self, writer: SnapshotWriter, document_ids: Sequence[str]) -> None:
+        """Write the chunks ``document_ids``, in that order, as snapshot sections."""
+
+        rows = [self._row_by_id[document_id] for document_id in document_ids]
+        parent_positions: dict[str, int] = {}
+        for row in rows:
+            parent_positions.setdefault(self._parent_ids[row], len(parent_positions))
+        texts = [self._text_bytes(row) for row in rows]
+        metadata = [self._metadata_bytes(row) for row in rows]
+
+        writer.write_strings("chunks.document_ids", document_ids)
+        writer.write_strings("chunks.parent_ids", parent_positions)
+        writer.write_array(
+            "chunks.parents",
+            np.fromiter(
+                (parent_positions[self._parent_ids[row]] for row in rows),
+                dtype=np.int64,
+                count=len(rows),
+            ),
+        )
+        writer.write_array(
+            "chunks.chunk_indexes",
+            np.fromiter((self._chunk_indexes[row] for row in rows), np.int64, count=len(rows)),
+        )
+        writer.write_array("chunks.text_offsets", offsets(map(len, texts)))
+        writer.write_bytes("chunks.text", b"".join(texts))
+        writer.write_array("chunks.metadata_offsets", offsets(map(len, metadata)))
+        writer.write_bytes("chunks.metadata", b"".join(metadata))
+
+    @classmethod
+    def read_snapshot(cls, reader: SnapshotReader) -> ChunkTable:
+        """Load a table from the sections written by ``write_snapshot``.
+
+        The buffers and offset arrays are taken over as they are; only the id lookups and
+        parent groupings are rebuilt, without decoding any text or metadata.
+        """
+
+        document_ids = [sys.intern(value) for value in reader.read_strings("chunks.document_ids")]
+        parent_ids = [sys.intern(value) for value in reader.read_strings("chunks.parent_ids")]
+        parents = reader.read_array("chunks.parents", np.int64)
+        chunk_indexes = reader.read_array("chunks.chunk_indexes", np.int64)
+        text_offsets = reader.read_array("chunks.text_offsets", np.int64)
+        text = reader.read_bytes("chunks.text")
+        metadata_offsets = reader.read_array("chunks.metadata_offsets", np.int64)
+        metadata = reader.read_bytes("chunks.metadata")
+        rows = len(document_ids)
+        if not (
+            len(parents) == len(chunk_indexes) == rows
+            and len(text_offsets) == len(metadata_offsets) == rows + 1
+            and _delimits(text_offsets, len(text))
+            and _delimits(metadata_offsets, len(metadata))
+            and (parents.size == 0 or 0 <= parents.min() <= parents.max() < len(parent_ids))
+            # ``_chunk_index`` stores out-of-range indexes as -1; a larger one would make
+            # ``_group`` allocate a sequence slot per index up to it.
+            and (
+                chunk_indexes.size == 0
+                or -1 <= chunk_indexes.min() <= chunk_indexes.max() < _MAX_CHUNK_INDEX
+            )
+        ):
+            raise SnapshotError("Inconsistent chunk table sections in snapshot")
+
+        table = cls()
+        table._text = bytearray(text)
+        table._metadata = bytearray(metadata)
+        table._text_offsets = array("q", text_offsets.tobytes())
+        table._metadata_offsets = array("q", metadata_offsets.tobytes())
+        table._document_ids = list(document_ids)
+        table._parent_ids = [parent_ids[parent] for parent in parents.tolist()]
+        table._chunk_indexes = array("q", chunk_indexes.tobytes())
+        table._row_by_id = dict(zip(document_ids, range(rows), strict=True))
+        for document_id, parent_id, chunk_index in zip(
+            document_ids, table._parent_ids, table._chunk_indexes, strict=True
+        ):
+            table._group(document_id, parent_id, chunk_index)
+        return table
+
+    def _append(
+        self, document_id: str, parent_id: str, chunk_index: int, text: bytes, metadata: bytes
+    ) -> None:
+        self._row_by_id[document_id] = len(self._document_ids)
+        self._document_ids.append(document_id)
+        self._parent_ids.append(parent_id)
+        self._chunk_indexes.append(chunk_index)
+        self._text += text
+        self._text_offsets.append(len(self._text))
+        self._metadata += metadata
+        self._metadata_offsets.append(len(self._metadata))
+
+    def _group(self, document_id: str, parent_id: str, chunk_index: int) -> None:
+        self._children.setdefault(parent_id, set()).add(document_id)
+        if chunk_index >= 0:
+            sequence = self._sequences.setdefault(parent_id, [])
+            if len(sequence) <= chunk_index:
+                sequence.extend([None] * (chunk_index + 1 - len(sequence)))
+            sequence[chunk_index] = document_id
+
+    def _unslot(self, parent_id: str, chunk_index: int, document_id: str) -> None:
+        sequence = self._sequences.get(parent_id)
+        if sequence is None or chunk_index < 0 or sequence[chunk_index] != document_id:
+            return
+        sequence[chunk_index] = None
+        while sequence and sequence[-1] is None:
+            sequence.pop()
+        if not sequence:
+            del self._sequences[parent_id]
+
+    def _text_bytes(self, row: int) -> bytes:
+        return bytes(self._text[self._text_offsets[row] : self._text_offsets[row + 1]])
+
+    def _metadata_bytes(self, row: int) -> bytes:
+        return bytes(self._metadata[self._metadata_offsets[row] : self._metadata_offsets[row + 1]])
+
+    def _reclaim(self) -> None:
+        """Rewrite the buffers with the live rows only, preserving their order."""
+
+        live = [
+            (
+                document_id,
+                self._parent_ids[row],
+                self._chunk_indexes[row],
+                self._text_bytes(row),
+                self._metadata_bytes(row),
+            )
+            for row, document_id in enumerate(self._document_ids)
+            if document_id is not None
+        ]
+        self._text = bytearray()
+        self._metadata = bytearray()
+        self._text_offsets = array("q", [0])
+        self._metadata_offsets = array("q", [0])
+        self._document_ids = []
+        self._parent_ids = []
+        self._chunk_indexes = array("q")
+        self._row_by_id = {}
+        for row in live:
+            self._append(*row)
+
+
+def _parent_id(document_id: str, metadata: Mapping[str, Any]) -> str:
+    return str(metadata.get("parent_document_id", document_id))
+
+
+def _delimits(bounds: np.ndarray, size: int) -> bool:
+    """Return whether ``bounds`` are non-decreasing offsets from 0 to ``size``."""
+
+    return bool(bounds[0] == 0 and bounds[-1] == size and np.all(bounds[1:] >= bounds[:-1]))
+
+
+def _chunk_index(metadata: Mapping[str, Any]) -> int:
+    chunk_index = metadata.get("chunk_index")
+    if isinstance(chunk_index, int) and 0 <= chunk_index < _MAX_CHUNK_INDEX:
+        return chunk_index
+    return -1
+
+
+def _encode_metadata(metadata: Mapping[str, Any]) -> bytes:
+    # ``default=str`` mirrors the vector store's sidecar, so reloaded rows still compare equal.
+    return json.dumps(metadata, ensure_ascii=False, default=str, separators=(",", ":")).encode(
+        "utf-8"
+    )
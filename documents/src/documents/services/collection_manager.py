@@ -0,0 +1,215 @@
+"""Named index collections loaded on demand and unloaded under a memory budget."""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Final
+
+import structlog
+from llama_index.core.embeddings import BaseEmbedding
+
+from documents.services.indexing_service import (
+    INDEX_DIRECTORY,
+    DocumentIndexService,
+    create_embed_model,
+)
+from documents.services.rerank import CrossEncoderReranker, build_reranker
+from documents.services.settings import DocumentSettings
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+DEFAULT_COLLECTION: Final = "default"
+COLLECTION_NAME_PATTERN: Final = r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$"
+COLLECTIONS_DIRECTORY: Final = "collections"
+
+
+@dataclass(slots=True)
+class _LoadedCollection:
+    # Resolves to the service once loaded; requests for a loading collection wait on it.
+    loading: Future[DocumentIndexService] = field(default_factory=Future)
+    leases: int = 0
+
+    @property
+    def service(self) -> DocumentIndexService | None:
+        if self.loading.done() and self.loading.exception() is None:
+            return self.loading.result()
+        return None
+
+
+class CollectionManager:
+    """Per-tenant ``DocumentIndexService`` instances sharing one embedding and rerank model.
+
+    A collection is created on first use and stored under
+    ``<store path>/collections/<name>``; the default collection keeps the original
+    ``<store path>/index`` location. When the estimated memory of the loaded collections
+    exceeds ``collections.memory_budget_mb``, the least recently used collections that no
+    request is using are closed. Their files on disk are always complete, so the next
+    access simply reopens them.
+
+    ``_lock`` only guards the bookkeeping: collections are loaded and closed outside it, so
+    opening a cold collection never stalls requests to the others. Requests for a
+    collection being loaded wait for that load, and reopening a collection waits until its
+    previous instance has finished closing.
+    """
+
+    def __init__(self, settings: DocumentSettings) -> None:
+        self._settings = settings
+        self._budget_bytes = settings.collections.memory_budget_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._models_lock = threading.Lock()
+        self._loaded: OrderedDict[str, _LoadedCollection] = OrderedDict()
+        # name -> set once the evicted instance of that collection is closed
+        self._closing: dict[str, threading.Event] = {}
+        self._embed_model: BaseEmbedding | None = None
+        self._reranker: CrossEncoderReranker | None = None
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[DocumentIndexService]:
+        """Yield the service of collection ``name``, which stays loaded until released."""
+
+        if not re.fullmatch(COLLECTION_NAME_PATTERN, name):
+            raise ValueError(f"Invalid collection name '{name}'")
+
+        with self._lock:
+            collection = self._loaded.get(name)
+            opening = collection is None
+            if collection is None:
+                collection = _LoadedCollection()
+                self._loaded[name] = collection
+            self._loaded.move_to_end(name)
+            collection.leases += 1
+            closing = self._closing.get(name)
+        try:
+            if opening:
+                self._load(name, collection, closing)
+            service = collection.loading.result()
+        except BaseException:
+            with self._lock:
+                collection.leases -= 1
+            raise
+        self._unload_over_budget()
+        try:
+            yield service
+        finally:
+            with self._lock:
+                collection.leases -= 1
+            # Indexing may have grown the collection past the budget.
+            self._unload_over_budget()
+
+    def loaded(self) -> list[str]:
+        """Return the names of the loaded collections, least recently used first."""
+
+        with self._lock:
+            return [name for name, loaded in self._loaded.items() if loaded.service is not None]
+
+    def close(self) -> None:
+        """Unload every collection and stop the shared reranker."""
+
+        with self._lock:
+            services = [loaded.service for loaded in self._loaded.values()]
+            self._loaded.clear()
+        for service in services:
+            if service is not None:
+                service.close()
+        if self._reranker is not None:
+            self._reranker.close()
+
+    def embed_model(self) -> BaseEmbedding:
+        """Return the embedding model shared by every collection, loading it on first use."""
+
+        return self._models()[0]
+
+    def warm_up(self) -> None:
+        """Load the shared models and run a dummy query through them.
+
+        The first embedding (and rerank) call pays for lazy initialization inside the model
+        libraries, so running one here keeps that cost off the first search.
+        """
+
+        embed_model, reranker = self._models()
+        embed_model.get_query_embedding("warm-up")
+        if reranker is not None:
+            reranker.warm_up()
+
+    def _models(self) -> tuple[BaseEmbedding, CrossEncoderReranker | None]:
+        with self._models_lock:
+            if self._embed_model is None:
+                self._embed_model = create_embed_model(self._settings)
+                self._reranker = build_reranker(self._settings.rerank)
+            return self._embed_model, self._reranker
+
+    def _load(
+        self, name: str, collection: _LoadedCollection, closing: threading.Event | None
+    ) -> None:
+        """Open collection ``name`` into ``collection``, dropping the entry if that fails."""
+
+        try:
+            if closing is not None:
+                closing.wait()
+            collection.loading.set_result(self._open(name))
+        except BaseException as exc:
+            with self._lock:
+                if self._loaded.get(name) is collection:
+                    del self._loaded[name]
+            collection.loading.set_exception(exc)
+            raise
+
+    def _open(self, name: str) -> DocumentIndexService:
+        embed_model, reranker = self._models()
+        root = Path(self._settings.store.settings.path)
+        directory = (
+            root / INDEX_DIRECTORY
+            if name == DEFAULT_COLLECTION
+            else root / COLLECTIONS_DIRECTORY / name
+        )
+        LOGGER.info("Loading collection", collection=name, directory=str(directory))
+        return DocumentIndexService(
+            self._settings,
+            index_directory=directory,
+            embed_model=embed_model,
+            reranker=reranker,
+        )
+
+    def _unload_over_budget(self) -> None:
+        """Close idle collections, oldest first, until the loaded ones fit the budget.
+
+        Victims are picked and unlisted under ``_lock`` and closed after releasing it; a
+        request reopening one of them meanwhile waits in ``_load`` for the close to finish.
+        """
+
+        if self._budget_bytes <= 0:
+            return
+        evicted: list[tuple[str, DocumentIndexService, int, threading.Event]] = []
+        with self._lock:
+            resident = {
+                name: loaded.service.resident_bytes if loaded.service is not None else 0
+                for name, loaded in self._loaded.items()
+            }
+            total = sum(resident.values())
+            for name, collection in list(self._loaded.items()):
+                if total <= self._budget_bytes:
+                    break
+                service = collection.service
+                if collection.leases or service is None:
+                    continue
+                del self._loaded[name]
+                closed = threading.Event()
+                self._closing[name] = closed
+                evicted.append((name, service, resident[name], closed))
+                total -= resident[name]
+        for name, service, freed, closed in evicted:
+            try:
+                service.close()
+            finally:
+                with self._lock:
+                    if self._closing.get(name) is closed:
+                        del self._closing[name]
+                closed.set()
+            LOGGER.info("Unloaded collection", collection=name, freed_bytes=freed)
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Any, Iterable, Iterator, Mapping, Sequence
 
@@ -13,6 +13,7 @@ from docling.document_converter import DocumentConverter, FormatOption
 from docling.pipeline.standard_pdf_pipeline import StandardPdfPipeline
 
 import structlog
+from llama_index.core.embeddings import BaseEmbedding
 from llama_index.core.extractors import SummaryExtractor
 from llama_index.core.ingestion import IngestionPipeline
 from llama_index.core.schema import MetadataMode, TextNode
@@ -20,6 +21,8 @@ from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.node_parser.docling import DoclingNodeParser
 from llama_index.readers.docling import DoclingReader
 
+from documents.services.embedding_cache import EmbeddingCache
+
 LOGGER = structlog.get_logger(__name__)
 
 
@@ -31,6 +34,7 @@ class PdfChunk:
     text: str
     summary: str
     embedding: list[float]
+    summary_embedding: list[float]
     metadata: dict[str, Any]
     images: tuple[str, ...]
 
@@ -47,9 +51,12 @@ class DoclingPdfPipeline:
         artifacts_dir: Path | None = None,
         pdf_options: PdfPipelineOptions | None = None,
         node_parser: DoclingNodeParser | None = None,
+        embedding_cache: EmbeddingCache | None = None,
+        embed_model: BaseEmbedding | None = None,
     ) -> None:
         self._summary_llm = summary_llm
-        self._embed_model = HuggingFaceEmbedding(model_name=sentence_transformer)
+        self._embed_model = embed_model or HuggingFaceEmbedding(model_name=sentence_transformer)
+        self._embedding_cache = embedding_cache
         self._include_images = include_images
         self._artifacts_dir = artifacts_dir
         self._base_pdf_options = pdf_options or PdfPipelineOptions()
@@ -82,32 +89,71 @@ class DoclingPdfPipeline:
             transformations=[
                 self._node_parser,
                 self._summary_extractor,
-                self._embed_model,
             ]
         )
         nodes = pipeline.run(documents=documents)
 
-        return [
+        chunks = [
             self._build_chunk(node)
             for node in nodes
             if isinstance(node, TextNode)
         ]
+        return self._embed_chunks(chunks)
+
+    def _embed_chunks(self, chunks: list[PdfChunk]) -> list[PdfChunk]:
+        """Embed chunk texts and summaries, each distinct text once, so indexing never has to.
+
+        Chunks are embedded from their plain text, which is what the index embeds for
+        payloads without a precomputed vector, so both share embedding-cache entries.
+        """
+
+        summaries = [chunk.summary.strip() for chunk in chunks if chunk.summary.strip()]
+        texts = list(dict.fromkeys([chunk.text for chunk in chunks] + summaries))
+        if not texts:
+            return chunks
+
+        if self._embedding_cache is not None:
+            vectors = self._embedding_cache.embed(texts, self._embed_model.get_text_embedding_batch)
+        else:
+            vectors = self._embed_model.get_text_embedding_batch(texts)
+        embeddings = {
+            text: [float(value) for value in vector]
+            for text, vector in zip(texts, vectors, strict=True)
+        }
+        return [
+            replace(
+                chunk,
+                embedding=embeddings[chunk.text],
+                summary_embedding=embeddings.get(chunk.summary.strip(), []),
+            )
+            for chunk in chunks
+        ]
+
+    def warm_up(self) -> None:
+        """Load the Docling PDF models and the embedding model without processing a file."""
+
+        self._converter(self._base_pdf_options).initialize_pipeline(InputFormat.PDF)
+        self._embed_model.get_text_embedding("warm-up")
 
     def _load_docling_documents(self, pdf_path: Path, *, include_images: bool) -> Iterable[Any]:
-        converter = DocumentConverter(
+        converter = self._converter(self._configured_pdf_options(pdf_path, include_images))
+        reader = DoclingReader(
+            export_type=DoclingReader.ExportType.JSON,
+            doc_converter=converter,
+        )
+        return reader.load_data(file_path=pdf_path)
+
+    @staticmethod
+    def _converter(pipeline_options: PdfPipelineOptions) -> DocumentConverter:
+        return DocumentConverter(
             format_options={
                 InputFormat.PDF: FormatOption(
-                    pipeline_options=self._configured_pdf_options(pdf_path, include_images),
+                    pipeline_options=pipeline_options,
                     backend=DoclingParseV4DocumentBackend,
                     pipeline_cls=StandardPdfPipeline,
                 )
             }
         )
-        reader = DoclingReader(
-            export_type=DoclingReader.ExportType.JSON,
-            doc_converter=converter,
-        )
-        return reader.load_data(file_path=pdf_path)
 
     def _configured_pdf_options(self, pdf_path: Path, include_images: bool) -> PdfPipelineOptions:
         if not include_images:
@@ -136,13 +182,12 @@ class DoclingPdfPipeline:
         metadata: dict[str, Any] = dict(node.metadata or {})
         summary = metadata.get("section_summary") or ""
         images = DoclingPdfPipeline._extract_image_paths(metadata)
-        embedding_vector = list(node.embedding or [])
-
         return PdfChunk(
             chunk_id=node.node_id,
             text=node.get_content(metadata_mode=MetadataMode.NONE),
             summary=summary,
-            embedding=embedding_vector,
+            embedding=[],
+            summary_embedding=[],
             metadata=metadata,
             images=images,
         )
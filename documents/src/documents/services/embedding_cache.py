@@ -0,0 +1,181 @@
+"""Persistent text-embedding cache shared by PDF ingestion and indexing."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Final
+
+import numpy as np
+import structlog
+
+from documents.services.cache import CacheStats
+from documents.services.embedding_model import embedding_model_id
+from documents.services.settings import DocumentSettings
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+CACHE_FILE: Final = "embedding_cache.sqlite3"
+
+# Evict a little more than needed so eviction runs once per batch of inserts, not per insert.
+_EVICTION_SLACK: Final = 0.05
+
+_SCHEMA: Final = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    vector BLOB NOT NULL,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (model, digest)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used);
+"""
+
+EmbedBatch = Callable[[list[str]], Sequence[Sequence[float]]]
+
+
+def open_embedding_cache(settings: DocumentSettings) -> EmbeddingCache | None:
+    """Return the process-wide cache for ``settings``, or ``None`` when it is disabled."""
+
+    if settings.embed.cache_max_entries <= 0:
+        return None
+    return _shared_cache(
+        str(Path(settings.store.settings.path) / CACHE_FILE),
+        embedding_model_id(settings.embed),
+        settings.embed.cache_max_entries,
+    )
+
+
+@lru_cache(maxsize=4)
+def _shared_cache(path: str, model_name: str, max_entries: int) -> EmbeddingCache:
+    return EmbeddingCache(path, model_name=model_name, max_entries=max_entries)
+
+
+class EmbeddingCache:
+    """SQLite table of float32 embeddings keyed by (model name, SHA-256 of the text).
+
+    Entries are evicted least-recently-used once more than ``max_entries`` are stored, and
+    every lookup is counted so the hit rate can be used to size the cache.
+    """
+
+    def __init__(self, path: str | Path, *, model_name: str, max_entries: int) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._model_name = model_name
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        size, clock = self._connection.execute(
+            "SELECT COUNT(*), COALESCE(MAX(used), 0) FROM embeddings"
+        ).fetchone()
+        self._size = size
+        self._clock = clock
+        self._hits = 0
+        self._misses = 0
+
+    def embed(self, texts: Sequence[str], embed_batch: EmbedBatch) -> np.ndarray:
+        """Return one embedding per text, calling ``embed_batch`` once for distinct misses."""
+
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        cached = dict(zip(texts, self.get_many(texts), strict=True))
+        missing = [text for text, vector in cached.items() if vector is None]
+        if missing:
+            computed = np.asarray(embed_batch(missing), dtype=np.float32)
+            self.put_many(missing, computed)
+            cached.update(zip(missing, computed, strict=True))
+        return np.stack([cached[text] for text in texts])
+
+    def get_many(self, texts: Sequence[str]) -> list[np.ndarray | None]:
+        """Look up ``texts`` and mark the hits as recently used."""
+
+        digests = [_digest(text) for text in texts]
+        with self._lock:
+            found: dict[bytes, np.ndarray] = {}
+            for digest in dict.fromkeys(digests):
+                row = self._connection.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND digest = ?",
+                    (self._model_name, digest),
+                ).fetchone()
+                if row is not None:
+                    found[digest] = np.frombuffer(row[0], dtype=np.float32)
+
+            if found:
+                self._clock += 1
+                with self._transaction():
+                    self._connection.executemany(
+                        "UPDATE embeddings SET used = ? WHERE model = ? AND digest = ?",
+                        [(self._clock, self._model_name, digest) for digest in found],
+                    )
+            results = [found.get(digest) for digest in digests]
+            hits = sum(vector is not None for vector in results)
+            self._hits += hits
+            self._misses += len(results) - hits
+            return results
+
+    def put_many(self, texts: Sequence[str], vectors: np.ndarray) -> None:
+        """Store ``vectors`` for ``texts`` and evict the least recently used overflow."""
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._clock += 1
+            with self._transaction():
+                before = self._connection.total_changes
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO embeddings (model, digest, vector, used) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (self._model_name, _digest(text), vector.tobytes(), self._clock)
+                        for text, vector in zip(texts, vectors, strict=True)
+                    ],
+                )
+                self._size += self._connection.total_changes - before
+                if self._size > self._max_entries:
+                    self._evict()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                size=self._size,
+                max_size=self._max_entries,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._connection.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+
+    def _evict(self) -> None:
+        excess = self._size - int(self._max_entries * (1 - _EVICTION_SLACK))
+        before = self._connection.total_changes
+        self._connection.execute(
+            "DELETE FROM embeddings WHERE (model, digest) IN "
+            "(SELECT model, digest FROM embeddings ORDER BY used LIMIT ?)",
+            (excess,),
+        )
+        evicted = self._connection.total_changes - before
+        self._size -= evicted
+        LOGGER.debug("Evicted cached embeddings", evicted=evicted, size=self._size)
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
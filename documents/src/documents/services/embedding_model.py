@@ -0,0 +1,183 @@
+"""Text embedding model loading on the configured inference backend."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Final
+
+import numpy as np
+import structlog
+from llama_index.core.embeddings import BaseEmbedding
+
+from documents.services.settings import EmbedSettings
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+MODELS_DIRECTORY: Final = "models"
+EMBED_BACKENDS: Final = ("torch", "onnx")
+EMBED_QUANTIZATIONS: Final = ("none", "int8")
+
+
+def load_embed_model(settings: EmbedSettings, model_directory: Path) -> BaseEmbedding:
+    """Load ``settings.model_name`` as a ``HuggingFaceEmbedding`` on ``settings.backend``.
+
+    ``torch`` runs the published PyTorch weights. ``onnx`` runs the model's ONNX graph with
+    ONNX Runtime on CPU; with ``quantization: int8`` the graph is dynamically quantized
+    once, saved under ``model_directory`` and reused by later starts. Query and text
+    instructions are taken from the original model name, so a quantized copy embeds the
+    same inputs as the model it was made from.
+    """
+
+    if settings.backend not in EMBED_BACKENDS:
+        raise ValueError(f"Unsupported embedding backend '{settings.backend}'")
+    if settings.quantization not in EMBED_QUANTIZATIONS:
+        raise ValueError(f"Unsupported embedding quantization '{settings.quantization}'")
+    if settings.quantization != "none" and settings.backend != "onnx":
+        raise ValueError("Embedding quantization requires the onnx backend.")
+
+    # Imported here: it pulls in PyTorch, which only the warm-up or first request should pay.
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    if settings.backend == "torch":
+        if settings.num_threads > 0:
+            import torch
+
+            torch.set_num_threads(settings.num_threads)
+        return HuggingFaceEmbedding(model_name=settings.model_name)
+
+    from llama_index.embeddings.huggingface.utils import (
+        get_query_instruct_for_model_name,
+        get_text_instruct_for_model_name,
+    )
+
+    model_kwargs: dict[str, Any] = {"provider": "CPUExecutionProvider"}
+    if settings.num_threads > 0:
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = settings.num_threads
+        model_kwargs["session_options"] = session_options
+    model_name = settings.model_name
+    if settings.quantization == "int8":
+        model_name = str(
+            _quantized_onnx_model(
+                settings.model_name, settings.onnx_quantization_config, model_directory
+            )
+        )
+        model_kwargs["file_name"] = _quantized_file_name(settings.onnx_quantization_config)
+    return HuggingFaceEmbedding(
+        model_name=model_name,
+        backend="onnx",
+        model_kwargs=model_kwargs,
+        query_instruction=get_query_instruct_for_model_name(settings.model_name),
+        text_instruction=get_text_instruct_for_model_name(settings.model_name),
+    )
+
+
+def embedding_model_id(settings: EmbedSettings) -> str:
+    """Return the identity of the vectors ``settings`` produce, e.g. for cache keys.
+
+    The PyTorch model is identified by its name alone; other backends and quantizations
+    produce slightly different vectors, so their identity also names the backend and the
+    quantization target.
+    """
+
+    if settings.backend == "torch":
+        return settings.model_name
+    if settings.quantization == "none":
+        return f"{settings.model_name}@{settings.backend}"
+    return (
+        f"{settings.model_name}@{settings.backend}-{settings.quantization}"
+        f"-{settings.onnx_quantization_config}"
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class EmbeddingParity:
+    """Agreement and relative speed of a candidate embedding model against a baseline."""
+
+    texts: int
+    min_cosine: float
+    mean_cosine: float
+    baseline_seconds: float
+    candidate_seconds: float
+
+    @property
+    def speedup(self) -> float:
+        return self.baseline_seconds / self.candidate_seconds if self.candidate_seconds else 0.0
+
+
+def measure_embedding_parity(
+    candidate: BaseEmbedding, baseline: BaseEmbedding, texts: Sequence[str]
+) -> EmbeddingParity:
+    """Embed ``texts`` with both models and compare the vectors row by row.
+
+    Use it before switching a deployment to another backend or quantization: the index keeps
+    the vectors it already stored, so queries embedded by the new model must land close to
+    them. Each model embeds the texts once, untimed, first so timings exclude model loading.
+    """
+
+    texts = list(texts)
+    if not texts:
+        raise ValueError("Embedding parity needs at least one text.")
+    for model in (baseline, candidate):
+        model.get_text_embedding_batch(texts[:1])
+    baseline_seconds, expected = _timed_embeddings(baseline, texts)
+    candidate_seconds, actual = _timed_embeddings(candidate, texts)
+    if expected.shape != actual.shape:
+        raise ValueError(f"Embedding shapes differ: {expected.shape} != {actual.shape}")
+    cosines = np.sum(_normalize(expected) * _normalize(actual), axis=1)
+    return EmbeddingParity(
+        texts=len(texts),
+        min_cosine=float(cosines.min()),
+        mean_cosine=float(cosines.mean()),
+        baseline_seconds=baseline_seconds,
+        candidate_seconds=candidate_seconds,
+    )
+
+
+def _quantized_onnx_model(model_name: str, config: str, model_directory: Path) -> Path:
+    """Return the directory of the int8 ONNX export of ``model_name``, creating it once."""
+
+    directory = model_directory / f"{model_name.replace('/', '--')}-onnx-qint8-{config}"
+    if directory.exists():
+        return directory
+
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    LOGGER.info("Quantizing embedding model", model=model_name, config=config)
+    model_directory.mkdir(parents=True, exist_ok=True)
+    # Export next to the target and rename, so concurrent workers never see a partial copy.
+    staging = Path(tempfile.mkdtemp(prefix=f".{directory.name}-", dir=model_directory))
+    try:
+        model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+        model.save_pretrained(str(staging))
+        export_dynamic_quantized_onnx_model(model, config, str(staging))
+        os.rename(staging, directory)
+    except OSError:
+        if not directory.exists():
+            raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return directory
+
+
+def _quantized_file_name(config: str) -> str:
+    return f"onnx/model_qint8_{config}.onnx"
+
+
+def _timed_embeddings(model: BaseEmbedding, texts: list[str]) -> tuple[float, np.ndarray]:
+    started = time.perf_counter()
+    vectors = model.get_text_embedding_batch(texts)
+    return time.perf_counter() - started, np.asarray(vectors, dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
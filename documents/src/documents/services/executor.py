@@ -0,0 +1,83 @@
+"""Bounded executor that keeps CPU-bound index work off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Final, ParamSpec, TypeVar
+
+import structlog
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+_P = ParamSpec("_P")
+_R = TypeVar("_R")
+
+
+@dataclass(frozen=True, slots=True)
+class ExecutorStats:
+    """Point-in-time load of a ``CpuExecutor``."""
+
+    max_workers: int
+    active: int
+    queued: int
+
+
+class CpuExecutor:
+    """Thread pool for embedding, scoring and indexing calls made from async routes.
+
+    NumPy matrix products and the embedding model release the GIL, so threads run searches
+    in parallel while the event loop keeps serving other requests. ``queued`` counts calls
+    waiting for a free worker and is the signal to size ``max_workers`` against.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="documents-cpu")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+
+    async def run(self, func: Callable[_P, _R], *args: _P.args, **kwargs: _P.kwargs) -> _R:
+        """Run ``func`` on the pool and await its result without blocking the loop.
+
+        ``func`` runs in a copy of the caller's context, so spans it starts nest under the
+        request span.
+        """
+
+        with self._lock:
+            self._queued += 1
+        context = contextvars.copy_context()
+        future = self._pool.submit(context.run, self._call, func, *args, **kwargs)
+        future.add_done_callback(self._dequeue_cancelled)
+        # Cancelling the awaiting task (e.g. on client disconnect) cancels a queued call.
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> ExecutorStats:
+        with self._lock:
+            return ExecutorStats(
+                max_workers=self._max_workers, active=self._active, queued=self._queued
+            )
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _dequeue_cancelled(self, future: Future[object]) -> None:
+        # A call cancelled while queued never reaches ``_call``, which dequeues the others.
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def _call(self, func: Callable[_P, _R], *args: _P.args, **kwargs: _P.kwargs) -> _R:
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
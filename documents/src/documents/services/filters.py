@@ -0,0 +1,133 @@
+"""Inverted indexes over chunk attributes used to pre-filter searches."""
+
+from __future__ import annotations
+
+from array import array
+from collections.abc import Iterable, Mapping
+from typing import Any, Final
+
+import numpy as np
+
+from documents.schemas import SearchFilters
+from documents.services.snapshot import SnapshotError, SnapshotReader, SnapshotWriter, offsets
+
+_FIELDS: Final = ("parents", "filenames", "pages")
+
+
+class MetadataFilterIndex:
+    """Postings from ``parent_document_id``, ``original_filename`` and page to store rows.
+
+    Every field maps each value to the vector-store rows carrying it, kept as ``int64`` row
+    arrays. A query turns the postings of the requested values into one boolean row bitmap
+    per field and intersects them, so similarity scoring only touches matching rows.
+    Postings are append-only: rows retired by a re-index or delete stay listed until the
+    store is compacted and the index rebuilt, and callers mask them with the live rows.
+
+    Pages come from the ``page_numbers`` metadata list (set by PDF ingestion); a chunk
+    matches a page range when any of its pages falls inside it.
+    """
+
+    def __init__(self) -> None:
+        self._parents: dict[str, array] = {}
+        self._filenames: dict[str, array] = {}
+        self._pages: dict[int, array] = {}
+
+    def add(self, row: int, document_id: str, metadata: Mapping[str, Any]) -> None:
+        """Index the attributes of the chunk stored at ``row``."""
+
+        parent_id = str(metadata.get("parent_document_id", document_id))
+        self._parents.setdefault(parent_id, array("q")).append(row)
+        filename = metadata.get("original_filename")
+        if filename is not None:
+            self._filenames.setdefault(str(filename), array("q")).append(row)
+        for page in _pages(metadata):
+            self._pages.setdefault(page, array("q")).append(row)
+
+    def mask(self, filters: SearchFilters, rows: int) -> np.ndarray | None:
+        """Return the bitmap of rows matching ``filters``, or ``None`` if nothing is set."""
+
+        selected: np.ndarray | None = None
+        if filters.parent_document_id is not None:
+            selected = _restrict(selected, [self._parents.get(filters.parent_document_id)], rows)
+        if filters.original_filename is not None:
+            selected = _restrict(selected, [self._filenames.get(filters.original_filename)], rows)
+        if filters.page_from is not None or filters.page_to is not None:
+            first = filters.page_from or 1
+            last = filters.page_to if filters.page_to is not None else float("inf")
+            postings = [posting for page, posting in self._pages.items() if first <= page <= last]
+            selected = _restrict(selected, postings, rows)
+        return selected
+
+    def write_snapshot(self, writer: SnapshotWriter, row_map: np.ndarray) -> None:
+        """Write the postings with every row ``r`` renumbered to ``row_map[r]``.
+
+        Rows mapped to ``-1`` (retired rows) are dropped, as are values left without rows.
+        """
+
+        for field in _FIELDS:
+            postings: dict[Any, np.ndarray] = {}
+            for value, posting in getattr(self, f"_{field}").items():
+                rows = row_map[np.frombuffer(posting, dtype=np.int64)]
+                rows = rows[rows >= 0]
+                if rows.size:
+                    postings[value] = rows
+            if field == "pages":
+                writer.write_array(
+                    "filters.pages.values", np.fromiter(postings, np.int64, count=len(postings))
+                )
+            else:
+                writer.write_strings(f"filters.{field}.values", postings)
+            writer.write_array(
+                f"filters.{field}.offsets", offsets(posting.size for posting in postings.values())
+            )
+            writer.write_array(
+                f"filters.{field}.rows",
+                np.concatenate(list(postings.values())) if postings else np.zeros(0, np.int64),
+            )
+
+    @classmethod
+    def read_snapshot(cls, reader: SnapshotReader, rows: int) -> MetadataFilterIndex:
+        """Load an index from the sections written by ``write_snapshot`` for ``rows`` chunks."""
+
+        index = cls()
+        for field in _FIELDS:
+            if field == "pages":
+                values: list[Any] = reader.read_array("filters.pages.values", np.int64).tolist()
+            else:
+                values = reader.read_strings(f"filters.{field}.values")
+            bounds = reader.read_array(f"filters.{field}.offsets", np.int64).tolist()
+            postings = reader.read_array(f"filters.{field}.rows", np.int64)
+            if not (
+                len(bounds) == len(values) + 1
+                and bounds[-1] == postings.size
+                and (postings.size == 0 or 0 <= postings.min() <= postings.max() < rows)
+            ):
+                raise SnapshotError(f"Inconsistent {field} filter sections in snapshot")
+            setattr(
+                index,
+                f"_{field}",
+                {
+                    value: array("q", postings[start:end].tobytes())
+                    for value, start, end in zip(values, bounds, bounds[1:], strict=False)
+                },
+            )
+        return index
+
+
+def _restrict(
+    selected: np.ndarray | None, postings: Iterable[array | None], rows: int
+) -> np.ndarray:
+    """Intersect ``selected`` with the union of ``postings`` as a bitmap of ``rows`` bits."""
+
+    bitmap = np.zeros(rows, dtype=bool)
+    for posting in postings:
+        if posting:
+            bitmap[np.frombuffer(posting, dtype=np.int64)] = True
+    return bitmap if selected is None else selected & bitmap
+
+
+def _pages(metadata: Mapping[str, Any]) -> set[int]:
+    pages = metadata.get("page_numbers") or ()
+    if isinstance(pages, (int, str)):
+        pages = (pages,)
+    return {int(page) for page in pages if str(page).isdigit()}
@@ -0,0 +1,85 @@
+"""Rank fusion strategies for combining the output of several retrievers."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+
+RankedList = Sequence[tuple[str, float]]
+
+
+@dataclass(slots=True)
+class FusedHit:
+    """A document ranked by fusion together with the raw score of every retriever."""
+
+    doc_id: str
+    score: float
+    best_retriever: str
+    sub_scores: dict[str, float] = field(default_factory=dict)
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Mapping[str, RankedList],
+    *,
+    k: int = 60,
+    weights: Mapping[str, float] | None = None,
+) -> list[FusedHit]:
+    """Fuse ranked lists with (weighted) reciprocal rank fusion.
+
+    Each retriever contributes ``weight / (k + rank)`` for every document it returned, so
+    only ranks matter and scores on incomparable scales can be combined.
+    """
+
+    def contributions(name: str, ranked: RankedList) -> list[float]:
+        weight = _weight(weights, name)
+        return [weight / (k + rank) for rank in range(1, len(ranked) + 1)]
+
+    return _fuse(ranked_lists, contributions)
+
+
+def weighted_score_fusion(
+    ranked_lists: Mapping[str, RankedList],
+    *,
+    weights: Mapping[str, float] | None = None,
+) -> list[FusedHit]:
+    """Fuse ranked lists by summing min-max normalized, weighted scores."""
+
+    def contributions(name: str, ranked: RankedList) -> list[float]:
+        weight = _weight(weights, name)
+        scores = [score for _, score in ranked]
+        low, high = min(scores, default=0.0), max(scores, default=0.0)
+        if high <= low:
+            return [weight] * len(scores)
+        return [weight * (score - low) / (high - low) for score in scores]
+
+    return _fuse(ranked_lists, contributions)
+
+
+def _fuse(
+    ranked_lists: Mapping[str, RankedList],
+    contributions: Callable[[str, RankedList], list[float]],
+) -> list[FusedHit]:
+    hits: dict[str, FusedHit] = {}
+    best_ranks: dict[str, int] = {}
+
+    for name, ranked in ranked_lists.items():
+        for rank, ((doc_id, score), gain) in enumerate(
+            zip(ranked, contributions(name, ranked), strict=True), start=1
+        ):
+            hit = hits.get(doc_id)
+            if hit is None:
+                hit = hits[doc_id] = FusedHit(doc_id=doc_id, score=0.0, best_retriever=name)
+                best_ranks[doc_id] = rank
+            elif rank < best_ranks[doc_id]:
+                hit.best_retriever = name
+                best_ranks[doc_id] = rank
+            hit.sub_scores[name] = float(score)
+            hit.score += gain
+
+    return sorted(hits.values(), key=lambda hit: hit.score, reverse=True)
+
+
+def _weight(weights: Mapping[str, float] | None, name: str) -> float:
+    if weights is None:
+        return 1.0
+    return weights.get(name, 1.0)
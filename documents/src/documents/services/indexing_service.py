@@ -1,16 +1,54 @@
-"""Minimal in-memory document indexing service built on top of LlamaIndex."""
+"""Persistent hybrid document indexing service using LlamaIndex embedding models."""
 
 from __future__ import annotations
 
-from collections.abc import Iterable
-from typing import Any
-
-from llama_index.core import Settings, VectorStoreIndex
-from llama_index.core.schema import TextNode
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-
-from documents.schemas import DocumentPayload, SearchResult
-from documents.services.settings import DocumentSettings
+import os
+import threading
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Final
+
+import numpy as np
+import structlog
+from llama_index.core import Settings
+from llama_index.core.embeddings import BaseEmbedding
+
+from documents.schemas import MAX_SEARCH_LIMIT, DocumentPayload, SearchFilters, SearchResult
+from documents.services.ann import AnnIndex, build_ann_index, measure_recall
+from documents.services.bm25 import BM25Index
+from documents.services.cache import CacheStats, LruCache
+from documents.services.chunk_table import ChunkTable
+from documents.services.embedding_cache import open_embedding_cache
+from documents.services.embedding_model import (
+    MODELS_DIRECTORY,
+    embedding_model_id,
+    load_embed_model,
+)
+from documents.services.filters import MetadataFilterIndex
+from documents.services.fusion import FusedHit, reciprocal_rank_fusion, weighted_score_fusion
+from documents.services.locks import ReadWriteLock
+from documents.services.mmr import mmr_select
+from documents.services.quantization import build_quantized_index
+from documents.services.query_batcher import QueryEmbeddingBatcher
+from documents.services.rerank import CrossEncoderReranker, build_reranker
+from documents.services.settings import (
+    AnnSettings,
+    CompactionSettings,
+    DocumentSettings,
+    QuantizationSettings,
+    SearchSettings,
+)
+from documents.services.snapshot import SnapshotError, SnapshotReader, SnapshotWriter
+from documents.services.timing import StageTimer
+from documents.services.vector_store import VECTOR_KINDS, PersistentVectorStore, StoredRecord
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+INDEX_DIRECTORY: Final = "index"
+# Metadata keys that carry embeddings computed at ingestion, per vector kind.
+PRECOMPUTED_EMBEDDING_KEYS: Final = {"content": "embedding", "summary": "summary_embedding"}
+
+_PendingItem = tuple[DocumentPayload, dict[str, list[float]]]
 
 
 class DocumentIndexNotReadyError(RuntimeError):
@@ -18,138 +56,823 @@ class DocumentIndexNotReadyError(RuntimeError):
 
 
 class DocumentIndexService:
-    """Coordinates document ingestion and querying through LlamaIndex."""
-
-    def __init__(self, settings: DocumentSettings) -> None:
-        self._documents: dict[str, DocumentPayload] = {}
-        self._content_index: VectorStoreIndex | None = None
-        self._summary_index: VectorStoreIndex | None = None
-        self._embed_model = HuggingFaceEmbedding(model_name=settings.embed.model_name)
+    """Coordinates document ingestion and hybrid querying over a persistent vector store.
+
+    The service is safe to call from several threads: searches run concurrently, indexing
+    calls are serialized, and an indexing call only excludes searches while it appends the
+    already embedded rows.
+
+    Chunks are grouped by their ``parent_document_id`` metadata (a payload without one is
+    its own parent), which is the key for ``replace_document`` and ``delete_document``.
+
+    The index lives in ``index_directory`` (``<store path>/index`` by default); services of
+    several collections can share one loaded ``embed_model`` and ``reranker``.
+    """
+
+    def __init__(
+        self,
+        settings: DocumentSettings,
+        *,
+        index_directory: Path | None = None,
+        embed_model: BaseEmbedding | None = None,
+        reranker: CrossEncoderReranker | None = None,
+    ) -> None:
+        self._index_lock = threading.Lock()
+        self._rw_lock = ReadWriteLock()
+        self._search_settings: SearchSettings = settings.search
+        self._ann_settings: AnnSettings = settings.ann
+        self._quantization_settings: QuantizationSettings = settings.quantization
+        self._compaction_settings: CompactionSettings = settings.compaction
+        self._compaction_thread: threading.Thread | None = None
+        self._chunks = ChunkTable()
+        self._filter_index = MetadataFilterIndex()
+        self._bm25_index = BM25Index(k1=settings.search.bm25_k1, b=settings.search.bm25_b)
+        self._generation = 0
+        self._model_name = embedding_model_id(settings.embed)
+        self._embedding_cache: LruCache[tuple[str, str], np.ndarray] = LruCache(
+            settings.cache.query_embedding_size
+        )
+        self._result_cache: LruCache[
+            tuple[str, int, int, SearchFilters | None, float | None], list[SearchResult]
+        ] = LruCache(settings.cache.result_size)
+        self._text_embeddings = open_embedding_cache(settings)
+        self._embed_model = embed_model or create_embed_model(settings)
         Settings.embed_model = self._embed_model
+        self._reranker = reranker or build_reranker(settings.rerank)
+        self._rerank_candidates = settings.rerank.candidates
+        self._query_batcher = QueryEmbeddingBatcher(
+            self._embed_queries,
+            max_batch_size=settings.embed.query_batch_size,
+            max_wait_ms=settings.embed.query_batch_wait_ms,
+        )
+
+        self._store = PersistentVectorStore(
+            index_directory or Path(settings.store.settings.path) / INDEX_DIRECTORY
+        )
+        for record in self._store.open():
+            self._remember(
+                DocumentPayload(
+                    document_id=record.document_id,
+                    content=record.content,
+                    metadata=record.metadata,
+                )
+            )
+            self._filter_index.add(
+                self._store.row(record.document_id), record.document_id, record.metadata
+            )
+        if settings.ann.backend != "exact" and settings.quantization.mode != "none":
+            raise ValueError("Configure either an ANN backend or quantization, not both.")
+        self._candidate_index = self._build_candidate_index(self._store)
 
     def index_documents(self, documents: Iterable[DocumentPayload]) -> int:
-        """Persist the provided documents in-memory and rebuild the index."""
+        """Upsert the provided documents and index only what changed.
+
+        Payloads are keyed by ``document_id``: a payload identical to the stored one is a
+        no-op, while a different payload replaces the previously indexed rows. Indexing
+        cost therefore scales with the size of the batch rather than the whole corpus.
+        """
+
+        with self._index_lock:
+            pending = self._pending(documents)
+            if pending:
+                self._upsert(pending)
+            indexed_count = len(self._chunks)
+        self._maybe_compact()
+        return indexed_count
+
+    def replace_document(self, document_id: str, documents: Iterable[DocumentPayload]) -> int:
+        """Make ``documents`` the complete set of chunks of the parent ``document_id``.
+
+        Every payload is tagged with ``parent_document_id``; chunks of the previous version
+        missing from ``documents`` are tombstoned in the same write that appends the changed
+        ones, so searches never observe a mix of both versions. Returns the number of
+        documents tracked afterwards.
+        """
+
+        payloads = [
+            payload.model_copy(
+                update={"metadata": {**payload.metadata, "parent_document_id": document_id}}
+            )
+            for payload in documents
+        ]
+        with self._index_lock:
+            current = {payload.document_id for payload in payloads}
+            stale = self._chunks.children(document_id) - current
+            pending = self._pending(payloads)
+            if pending or stale:
+                self._upsert(pending, deleted=stale)
+            indexed_count = len(self._chunks)
+        self._maybe_compact()
+        return indexed_count
+
+    def delete_document(self, document_id: str) -> int:
+        """Tombstone every chunk of the parent ``document_id`` and return how many there were.
+
+        Removal only flags rows in the vector store and drops the chunks from BM25, so it
+        costs time proportional to the chunks removed; space is reclaimed by compaction.
+        """
+
+        with self._index_lock:
+            chunk_ids = self._chunks.children(document_id)
+            if chunk_ids:
+                self._upsert([], deleted=chunk_ids)
+        self._maybe_compact()
+        return len(chunk_ids)
+
+    def compact(self) -> None:
+        """Rewrite the vector store without retired rows and rebuild the candidate index.
+
+        Searches keep running against the current files while the copy is made; they are
+        only paused for the swap. Triggered in the background once the share of retired
+        rows reaches ``compaction.tombstone_ratio``.
+        """
+
+        with self._index_lock:
+            if self._store.retired_rows == 0:
+                return
+            store = self._store.compact()
+            candidate_index = self._build_candidate_index(store)
+            filter_index = MetadataFilterIndex()
+            for document_id in self._chunks:
+                filter_index.add(
+                    store.row(document_id), document_id, self._chunks.metadata(document_id)
+                )
+            with self._rw_lock.write():
+                self._store = store
+                self._candidate_index = candidate_index
+                self._filter_index = filter_index
+
+    def export_snapshot(self, path: str | Path) -> int:
+        """Write the live index to ``path`` as a snapshot and return how many chunks it holds.
+
+        The snapshot carries the embedding matrix, chunk table, BM25 postings and filter
+        postings of the live rows, renumbered densely as by a compaction, so importing it
+        needs no embedding, tokenizing or JSON parsing. Indexing waits while it is written;
+        searches do not. The file is written next to ``path`` and renamed into place.
+        """
+
+        path = Path(path)
+        with self._index_lock:
+            store = self._store
+            rows = np.flatnonzero(store.eligible("content"))
+            document_ids = [store.document_id(row) for row in rows]
+            row_map = np.full(store.rows, -1, dtype=np.int64)
+            row_map[rows] = np.arange(rows.size)
+
+            temporary = path.with_name(f"{path.name}.tmp")
+            with temporary.open("wb") as handle:
+                writer = SnapshotWriter(handle)
+                writer.write_json("manifest", self._snapshot_manifest(store.dim or 0))
+                self._chunks.write_snapshot(writer, document_ids)
+                self._bm25_index.write_snapshot(writer, document_ids)
+                self._filter_index.write_snapshot(writer, row_map)
+                store.write_snapshot(writer, rows)
+                writer.close()
+                handle.flush()
+                os.fsync(handle.fileno())
+            os.replace(temporary, path)
+        LOGGER.info("Exported index snapshot", path=str(path), chunks=len(document_ids))
+        return len(document_ids)
+
+    def import_snapshot(self, path: str | Path) -> int:
+        """Replace the whole index with the snapshot at ``path`` and return its chunk count.
+
+        The snapshot must come from a service with the same embedding model and BM25 text
+        settings. Its store sections become the files of the next store epoch (vectors are
+        read straight into the new mapping) and the in-memory structures are rebuilt from
+        their arrays; only the ANN or quantized candidate index is built anew. The current
+        index keeps serving searches until the swap, and a corrupt snapshot leaves it intact.
+        """
+
+        with self._index_lock:
+            with Path(path).open("rb") as handle:
+                reader = SnapshotReader(handle)
+                manifest = reader.read_json("manifest")
+                dim = manifest.get("dim") if isinstance(manifest, dict) else None
+                if not isinstance(dim, int) or isinstance(dim, bool) or dim < 0:
+                    raise SnapshotError(f"Snapshot manifest has no valid embedding dim: {dim!r}")
+                expected = self._snapshot_manifest(dim)
+                for key in ("model_name", "bm25_include_content"):
+                    if manifest.get(key) != expected[key]:
+                        raise SnapshotError(
+                            f"Snapshot {key} {manifest.get(key)!r} does not match "
+                            f"this index ({expected[key]!r})"
+                        )
+                chunks = ChunkTable.read_snapshot(reader)
+                document_ids = list(chunks)
+                bm25_index = BM25Index.read_snapshot(
+                    reader,
+                    document_ids,
+                    k1=self._search_settings.bm25_k1,
+                    b=self._search_settings.bm25_b,
+                )
+                filter_index = MetadataFilterIndex.read_snapshot(reader, len(document_ids))
+                store = self._store.restore_snapshot(reader, document_ids, dim=dim)
+            candidate_index = self._build_candidate_index(store)
+            with self._rw_lock.write():
+                self._store = store
+                self._chunks = chunks
+                self._bm25_index = bm25_index
+                self._filter_index = filter_index
+                self._candidate_index = candidate_index
+                self._generation += 1
+        LOGGER.info("Imported index snapshot", path=str(path), chunks=len(document_ids))
+        return len(document_ids)
+
+    def close(self) -> None:
+        """Release the in-memory index; the on-disk files stay complete and reopenable.
+
+        Waits for a running compaction, stops the query batcher and unmaps the vectors.
+        The service must not be used afterwards.
+        """
+
+        if self._compaction_thread is not None:
+            self._compaction_thread.join()
+        self._query_batcher.close()
+        with self._index_lock, self._rw_lock.write():
+            self._store.close()
+            self._candidate_index = None
 
-        for payload in documents:
-            self._documents[payload.document_id] = payload
+    @property
+    def resident_bytes(self) -> int:
+        """Estimate the memory held by this index: chunk text, metadata and scanned vectors."""
 
-        if not self._documents:
-            self._content_index = None
-            self._summary_index = None
-            return 0
+        candidate_bytes = getattr(self._candidate_index, "nbytes", 0)
+        return self._chunks.nbytes + self._store.nbytes + candidate_bytes
 
-        payloads = list(self._documents.values())
-        content_nodes = [self._payload_to_node(payload) for payload in payloads]
-        summary_nodes = []
-        for payload in payloads:
-            summary_text = str(payload.metadata.get("chunk_summary", "")).strip()
-            if summary_text:
-                summary_nodes.append(self._summary_to_node(payload, summary_text))
+    def _snapshot_manifest(self, dim: int) -> dict[str, object]:
+        return {
+            "model_name": self._model_name,
+            "bm25_include_content": self._search_settings.bm25_include_content,
+            "dim": dim,
+        }
 
-        self._content_index = VectorStoreIndex(nodes=content_nodes)
-        self._summary_index = VectorStoreIndex(nodes=summary_nodes) if summary_nodes else None
-        return len(self._documents)
+    def _pending(self, documents: Iterable[DocumentPayload]) -> list[_PendingItem]:
+        """Return the payloads that differ from what is indexed, with their embeddings."""
 
-    def search(self, query: str, *, limit: int) -> list[SearchResult]:
-        """Execute a semantic search against the stored index."""
+        pending: dict[str, _PendingItem] = {}
+        for payload in documents:
+            stored, embeddings = self._split_embeddings(payload)
+            if not self._chunks.matches(stored):
+                pending[stored.document_id] = (stored, embeddings)
+        return list(pending.values())
+
+    def _upsert(
+        self,
+        items: list[_PendingItem],
+        *,
+        deleted: Iterable[str] = (),
+    ) -> None:
+        """Embed and append ``items`` and tombstone ``deleted`` in one write to the store."""
+
+        payloads = [payload for payload, _ in items]
+        records = [
+            StoredRecord(
+                document_id=payload.document_id,
+                content=payload.content,
+                metadata=payload.metadata,
+            )
+            for payload in payloads
+        ]
+        if items:
+            content_vectors, summary_vectors = self._item_embeddings(items)
+
+        deleted = list(deleted)
+        with self._rw_lock.write():
+            if deleted:
+                self._store.delete(deleted)
+                for document_id in deleted:
+                    self._forget(document_id)
+            if items:
+                first_row = self._store.rows
+                self._store.append(records, content_vectors, summary_vectors)
+                if self._candidate_index is not None:
+                    self._candidate_index.add(first_row, self._store.rows)
+                for row, payload in enumerate(payloads, start=first_row):
+                    self._remember(payload)
+                    self._filter_index.add(row, payload.document_id, payload.metadata)
+            self._generation += 1
+
+    def _remember(self, payload: DocumentPayload) -> None:
+        self._chunks.add(payload)
+        self._bm25_index.add(payload.document_id, self._bm25_text(payload))
+
+    def _forget(self, document_id: str) -> None:
+        if self._chunks.remove(document_id):
+            self._bm25_index.remove(document_id)
+
+    def _maybe_compact(self) -> None:
+        """Start a background compaction once enough rows are retired."""
+
+        settings = self._compaction_settings
+        rows = self._store.rows
+        if rows < settings.min_rows or self._store.retired_rows < settings.tombstone_ratio * rows:
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(
+            target=self._compact_in_background, name="index-compaction", daemon=True
+        )
+        self._compaction_thread.start()
 
-        if self._content_index is None and self._summary_index is None:
-            raise DocumentIndexNotReadyError("Document index has not been built yet.")
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception:  # pragma: no cover - defensive logging
+            LOGGER.exception("Index compaction failed")
 
-        results: list[tuple[SearchResult, float]] = []
+    def _build_candidate_index(self, store: PersistentVectorStore) -> AnnIndex | None:
+        candidate_index = build_ann_index(self._ann_settings, store) or build_quantized_index(
+            self._quantization_settings, store
+        )
+        if candidate_index is not None:
+            candidate_index.add(0, store.rows)
+        return candidate_index
+
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int,
+        filters: SearchFilters | None = None,
+        mmr_lambda: float | None = None,
+        expand_window: int = 0,
+        timings: dict[str, float] | None = None,
+    ) -> list[SearchResult]:
+        """Execute a hybrid vector + BM25 search and fuse the rankings into one list.
+
+        ``filters`` restrict both retrievers to matching chunks before scoring, so ``limit``
+        results are returned whenever that many chunks match. Filtered vector search scores
+        the matching rows exactly, bypassing the ANN or quantized first pass. With a
+        reranker configured, the best fused candidates are re-ordered by cross-encoder score.
+        With ``mmr_lambda`` set, results are picked from those candidates by maximal marginal
+        relevance, trading relevance (1.0) against diversity (0.0). ``expand_window`` adds
+        each hit's neighbouring chunks as ``context``, looked up by ``chunk_index`` without
+        any further embedding or scoring.
+
+        Every stage is traced and recorded as a latency histogram; pass a ``timings`` dict
+        to also receive the milliseconds spent per stage.
+        """
+
+        self._ensure_ready()
+        timer = StageTimer("search")
+        query = _normalize_query(query)
+        result_key = (query, limit, self._generation, filters, mmr_lambda)
+        with timer.stage("result_cache"):
+            cached = self._result_cache.get(result_key)
+        if cached is None:
+            with timer.stage("query_embedding"):
+                query_vector = self._query_embedding(query)
+            with self._rw_lock.read():
+                with timer.stage("filter"):
+                    rows = self._filtered_rows(filters)
+                    allowed = self._row_ids(rows)
+                depth = self._candidate_depth(limit, mmr_lambda)
+                with timer.stage("vector_scan"):
+                    vector_hits = self._vector_hits(query_vector[np.newaxis], depth, rows)[0]
+                candidates = self._rank(query, vector_hits, depth, allowed, timer)
+                embeddings = self._candidate_embeddings(candidates, mmr_lambda)
+            with timer.stage("rerank"):
+                [(ranked, final)] = self._rerank([query], [candidates])
+            with timer.stage("select"):
+                cached = self._select(ranked, limit, mmr_lambda, embeddings)
+            if final:
+                self._result_cache.put(result_key, cached)
+        with timer.stage("expand"):
+            results = self._expand(cached, expand_window)
+        if timings is not None:
+            timings.update(timer.timings)
+        return results
 
-        if self._content_index is not None:
-            content_engine = self._content_index.as_query_engine(similarity_top_k=limit)
-            content_response = content_engine.query(query)
-            results.extend(
-                (result, result.score)
-                for result in self._convert_response(content_response, match_type="content")
+    def search_many(
+        self,
+        queries: Sequence[str],
+        *,
+        limit: int,
+        filters: SearchFilters | None = None,
+        mmr_lambda: float | None = None,
+        expand_window: int = 0,
+        timings: dict[str, float] | None = None,
+    ) -> list[list[SearchResult]]:
+        """Run ``search`` for every query, embedding and scoring them together.
+
+        Uncached queries are embedded in a single forward pass and, for exact unfiltered
+        search, scored with one matrix-matrix product against the stored vectors.
+        ``timings`` receives the milliseconds per stage summed over the batch.
+        """
+
+        self._ensure_ready()
+        timer = StageTimer("search_many")
+        normalized = [_normalize_query(query) for query in queries]
+        generation = self._generation
+        with timer.stage("result_cache"):
+            results = [
+                self._result_cache.get((query, limit, generation, filters, mmr_lambda))
+                for query in normalized
+            ]
+
+        pending = [index for index, cached in enumerate(results) if cached is None]
+        if pending:
+            pending_queries = [normalized[index] for index in pending]
+            with timer.stage("query_embedding"):
+                query_vectors = self._query_embeddings(pending_queries)
+            with self._rw_lock.read():
+                with timer.stage("filter"):
+                    rows = self._filtered_rows(filters)
+                    allowed = self._row_ids(rows)
+                depth = self._candidate_depth(limit, mmr_lambda)
+                with timer.stage("vector_scan"):
+                    batch_hits = self._vector_hits(query_vectors, depth, rows)
+                candidate_batch = [
+                    self._rank(query, vector_hits, depth, allowed, timer)
+                    for query, vector_hits in zip(pending_queries, batch_hits, strict=True)
+                ]
+                embeddings = [
+                    self._candidate_embeddings(candidates, mmr_lambda)
+                    for candidates in candidate_batch
+                ]
+            with timer.stage("rerank"):
+                ranked_batch = self._rerank(pending_queries, candidate_batch)
+            with timer.stage("select"):
+                for index, query, (ranked, final), query_embeddings in zip(
+                    pending, pending_queries, ranked_batch, embeddings, strict=True
+                ):
+                    selected = self._select(ranked, limit, mmr_lambda, query_embeddings)
+                    if final:
+                        self._result_cache.put(
+                            (query, limit, generation, filters, mmr_lambda), selected
+                        )
+                    results[index] = selected
+        with timer.stage("expand"):
+            expanded = [
+                self._expand(ranked, expand_window) for ranked in results if ranked is not None
+            ]
+        if timings is not None:
+            timings.update(timer.timings)
+        return expanded
+
+    def cache_stats(self) -> dict[str, CacheStats]:
+        """Return hit/miss counters of the embedding and search result caches."""
+
+        stats = {
+            "query_embeddings": self._embedding_cache.stats(),
+            "results": self._result_cache.stats(),
+        }
+        if self._text_embeddings is not None:
+            stats["text_embeddings"] = self._text_embeddings.stats()
+        if self._reranker is not None:
+            stats["rerank_scores"] = self._reranker.stats()
+        return stats
+
+    def check_ann_recall(self, *, limit: int = 10) -> float | None:
+        """Return recall@``limit`` of the ANN or quantized first pass against exact search.
+
+        Returns ``None`` when search is exact. Use it to tune ``nprobe``/``ef_search`` or
+        ``rescore_factor`` against latency before switching a deployment to approximate search.
+        """
+
+        if self._candidate_index is None:
+            return None
+        with self._rw_lock.read():
+            return measure_recall(
+                self._store,
+                self._candidate_index,
+                sample_size=self._ann_settings.recall_sample_size,
+                limit=limit,
             )
 
-        if self._summary_index is not None:
-            summary_engine = self._summary_index.as_query_engine(similarity_top_k=limit)
-            summary_response = summary_engine.query(query)
-            results.extend(
-                (result, result.score)
-                for result in self._convert_response(summary_response, match_type="summary")
-            )
+    def _ensure_ready(self) -> None:
+        if not self._chunks:
+            raise DocumentIndexNotReadyError("Document index has not been built yet.")
 
-        # Deduplicate by (document_id, chunk_index, match_type) while preserving highest score.
-        ranked: dict[tuple[str, Any, str], tuple[SearchResult, float]] = {}
-        for result, score in results:
-            key = (
-                result.document_id,
-                result.metadata.get("chunk_index"),
-                result.metadata.get("match_type"),
+    def _filtered_rows(self, filters: SearchFilters | None) -> np.ndarray | None:
+        """Return the live store rows matching ``filters``, or ``None`` when unfiltered."""
+
+        if filters is None:
+            return None
+        mask = self._filter_index.mask(filters, self._store.rows)
+        if mask is None:
+            return None
+        return np.flatnonzero(mask & self._store.eligible("content"))
+
+    def _row_ids(self, rows: np.ndarray | None) -> set[str] | None:
+        if rows is None:
+            return None
+        return {self._store.document_id(row) for row in rows}
+
+    def _vector_hits(
+        self, query_vectors: np.ndarray, depth: int, rows: np.ndarray | None = None
+    ) -> list[dict[str, list[tuple[int, float]]]]:
+        """Return the vector-store hits per kind for each query, using candidates if any.
+
+        Each kind returns up to ``_retriever_depth(depth)`` hits. ``rows`` restricts scoring
+        to those rows, e.g. the matches of a search filter.
+        """
+
+        limit = _retriever_depth(depth)
+        if rows is not None:
+            candidates = dict.fromkeys(VECTOR_KINDS, rows)
+            return [
+                self._store.search(query_vector, limit=limit, candidates=candidates)
+                for query_vector in query_vectors
+            ]
+        if self._candidate_index is None:
+            return self._store.search_many(query_vectors, limit=limit)
+        return [
+            self._store.search(
+                query_vector,
+                limit=limit,
+                candidates=self._candidate_index.candidates(query_vector, limit=limit),
             )
-            if key not in ranked or score > ranked[key][1]:
-                ranked[key] = (result, score)
-
-        ordered = sorted(ranked.values(), key=lambda item: item[1], reverse=True)
-        return [item[0] for item in ordered[:limit]]
+            for query_vector in query_vectors
+        ]
+
+    def _rank(
+        self,
+        query: str,
+        vector_hits: dict[str, list[tuple[int, float]]],
+        limit: int,
+        allowed: set[str] | None,
+        timer: StageTimer,
+    ) -> list[SearchResult]:
+        """Fuse the vector hits of ``query`` with its BM25 ranking into API results."""
+
+        ranked_lists: dict[str, list[tuple[str, float]]] = {
+            kind: [(self._store.document_id(row), score) for row, score in hits]
+            for kind, hits in vector_hits.items()
+        }
+        with timer.stage("bm25"):
+            ranked_lists["bm25"] = self._bm25_index.search(
+                query, limit=_retriever_depth(limit), allowed=allowed
+            )
+        with timer.stage("fusion"):
+            fused = self._fuse(ranked_lists)[:limit]
+        with timer.stage("materialize"):
+            return [self._hit_to_result(hit) for hit in fused]
+
+    def _expand(self, results: list[SearchResult], window: int) -> list[SearchResult]:
+        """Return copies of ``results`` carrying their hit stitched with its neighbours.
+
+        Expansion runs after the result cache, so cached results serve every window.
+        """
+
+        if window <= 0:
+            return list(results)
+        expanded: list[SearchResult] = []
+        with self._rw_lock.read():
+            for result in results:
+                neighbours = self._chunks.neighbours(result.document_id, window)
+                if not neighbours:
+                    expanded.append(result)
+                    continue
+                context = "\n\n".join(self._chunks.content(neighbour) for neighbour in neighbours)
+                expanded.append(
+                    result.model_copy(
+                        update={"context": context, "context_document_ids": neighbours}
+                    )
+                )
+        return expanded
+
+    def _candidate_depth(self, limit: int, mmr_lambda: float | None) -> int:
+        depth = limit
+        if self._reranker is not None:
+            depth = max(depth, self._rerank_candidates)
+        if mmr_lambda is not None:
+            depth = max(depth, self._search_settings.mmr_candidates)
+        return depth
+
+    def _candidate_embeddings(
+        self, candidates: list[SearchResult], mmr_lambda: float | None
+    ) -> dict[str, np.ndarray]:
+        """Copy the content vectors of ``candidates`` for MMR while the store is locked."""
+
+        if mmr_lambda is None or not candidates:
+            return {}
+        rows = [self._store.row(candidate.document_id) for candidate in candidates]
+        vectors = self._store.vectors("content")[rows]
+        return {
+            candidate.document_id: vector
+            for candidate, vector in zip(candidates, vectors, strict=True)
+        }
 
-    def _payload_to_node(self, payload: DocumentPayload) -> TextNode:
-        metadata = dict(payload.metadata or {})
-        embedding = metadata.pop("embedding", None)
-        metadata["document_id"] = payload.document_id
+    @staticmethod
+    def _select(
+        ranked: list[SearchResult],
+        limit: int,
+        mmr_lambda: float | None,
+        embeddings: dict[str, np.ndarray],
+    ) -> list[SearchResult]:
+        """Keep the top ``limit`` results, or pick them by MMR when ``mmr_lambda`` is set."""
+
+        if mmr_lambda is None or not ranked:
+            return ranked[:limit]
+        order = mmr_select(
+            np.array([result.score for result in ranked]),
+            np.stack([embeddings[result.document_id] for result in ranked]),
+            limit=limit,
+            mmr_lambda=mmr_lambda,
+        )
+        return [ranked[index] for index in order]
 
-        node_kwargs: dict[str, Any] = {
-            "id_": payload.document_id,
-            "text": payload.content,
-            "metadata": metadata,
-        }
-        if embedding is not None:
-            node_kwargs["embedding"] = embedding
+    def _rerank(
+        self, queries: Sequence[str], candidate_lists: Sequence[list[SearchResult]]
+    ) -> list[tuple[list[SearchResult], bool]]:
+        """Order each query's candidates by cross-encoder score.
 
-        node = TextNode(**node_kwargs)
-        return node
+        All pairs of the batch are scored in one model call. The flag is ``False`` where the
+        rerank time budget ran out and the fused order was kept; those results are not cached.
+        """
 
-    def _summary_to_node(self, payload: DocumentPayload, summary_text: str) -> TextNode:
-        metadata = dict(payload.metadata or {})
-        metadata["document_id"] = payload.document_id
-        metadata["match_type"] = "summary"
+        if self._reranker is None:
+            return [(candidates, True) for candidates in candidate_lists]
 
-        node = TextNode(
-            id_=f"{payload.document_id}__summary",
-            text=summary_text,
-            metadata=metadata,
+        batch_scores = self._reranker.score_many(
+            [
+                (query, [candidate.content or "" for candidate in candidates])
+                for query, candidates in zip(queries, candidate_lists, strict=True)
+            ]
         )
-        return node
-
-    def _convert_response(self, response: Any, *, match_type: str) -> list[SearchResult]:
-        """Map a LlamaIndex response object into API response models."""
-
-        results: list[SearchResult] = []
-        source_nodes = getattr(response, "source_nodes", []) or []
-
-        for node in source_nodes:
-            metadata = getattr(node, "metadata", {}) or {}
-            score = float(getattr(node, "score", 0.0) or 0.0)
-            content = getattr(node, "text", None)
-            document_id = metadata.get("document_id") or getattr(node, "node_id", "unknown")
-
-            if document_id in self._documents:
-                payload = self._documents[document_id]
-                metadata = {**payload.metadata, **metadata}
-                metadata["match_type"] = match_type
-                if content is None:
-                    content = payload.content
-            else:
-                metadata = {**metadata, "match_type": match_type}
-
-            results.append(
-                SearchResult(
-                    document_id=document_id,
-                    score=score,
-                    content=content,
-                    metadata=metadata,
+        reranked: list[tuple[list[SearchResult], bool]] = []
+        for candidates, scores in zip(candidate_lists, batch_scores, strict=True):
+            if scores is None:
+                reranked.append((candidates, False))
+                continue
+            order = sorted(range(len(candidates)), key=lambda index: -scores[index])
+            reranked.append(
+                (
+                    [
+                        candidates[index].model_copy(
+                            update={
+                                "score": scores[index],
+                                "scores": {**candidates[index].scores, "rerank": scores[index]},
+                            }
+                        )
+                        for index in order
+                    ],
+                    True,
                 )
             )
+        return reranked
+
+    def _fuse(self, ranked_lists: dict[str, list[tuple[str, float]]]) -> list[FusedHit]:
+        settings = self._search_settings
+        weights = {
+            "content": settings.content_weight,
+            "summary": settings.summary_weight,
+            "bm25": settings.bm25_weight,
+        }
+        if settings.fusion == "rrf":
+            return reciprocal_rank_fusion(ranked_lists, k=settings.rrf_k, weights=weights)
+        if settings.fusion == "weighted":
+            return weighted_score_fusion(ranked_lists, weights=weights)
+        raise ValueError(f"Unsupported fusion strategy '{settings.fusion}'")
+
+    def _item_embeddings(self, items: Sequence[_PendingItem]) -> tuple[np.ndarray, np.ndarray]:
+        """Return content and summary vectors, calling the model only for unseen text.
+
+        Each vector comes from the first available source: the embedding precomputed at
+        ingestion, the stored row of the previous version when its text is unchanged (e.g.
+        only metadata changed), or one batched model call over the remaining distinct texts.
+        Items without a summary get an all-zero summary vector; empty content is embedded.
+        """
+
+        vectors: dict[str, list[Sequence[float] | None]] = {
+            kind: [None] * len(items) for kind in VECTOR_KINDS
+        }
+        missing: dict[str, list[tuple[str, int]]] = {}
+        for index, (payload, precomputed) in enumerate(items):
+            row = self._store.row(payload.document_id)
+            previous = self._chunks.payload(payload.document_id) if row is not None else None
+            for kind in VECTOR_KINDS:
+                text = self._vector_text(payload, kind)
+                # Empty content (e.g. an image-only chunk) is still embedded like any text.
+                if kind == "summary" and not text:
+                    continue
+                if kind in precomputed:
+                    vectors[kind][index] = precomputed[kind]
+                elif previous is not None and self._vector_text(previous, kind) == text:
+                    vectors[kind][index] = self._store.vectors(kind)[row]
+                else:
+                    missing.setdefault(text, []).append((kind, index))
+
+        if missing:
+            computed = self._embed_texts(list(missing))
+            for targets, vector in zip(missing.values(), computed, strict=True):
+                for kind, index in targets:
+                    vectors[kind][index] = vector
+
+        content_vectors = np.asarray(vectors["content"], dtype=np.float32)
+        summary_vectors = np.zeros_like(content_vectors)
+        for index, vector in enumerate(vectors["summary"]):
+            if vector is not None:
+                summary_vectors[index] = vector
+        return content_vectors, summary_vectors
+
+    def _query_embedding(self, query: str) -> np.ndarray:
+        key = (self._model_name, query)
+        vector = self._embedding_cache.get(key)
+        if vector is None:
+            vector = self._query_batcher.embed(query)
+            self._embedding_cache.put(key, vector)
+        return vector
+
+    def _query_embeddings(self, queries: list[str]) -> np.ndarray:
+        """Return embeddings for ``queries``, embedding the uncached ones in one batch."""
+
+        vectors = {query: self._embedding_cache.get((self._model_name, query)) for query in queries}
+        missing = [query for query, vector in vectors.items() if vector is None]
+        if missing:
+            computed = np.asarray(self._embed_queries(missing), dtype=np.float32)
+            for query, vector in zip(missing, computed, strict=True):
+                vectors[query] = vector
+                self._embedding_cache.put((self._model_name, query), vector)
+        return np.stack([vectors[query] for query in queries])
+
+    def _embed_queries(self, queries: list[str]) -> Sequence[Sequence[float]]:
+        """Embed ``queries`` with the model's query prompt, in one forward pass if possible."""
+
+        # HuggingFaceEmbedding only exposes batched encoding with the query prompt privately.
+        embed = getattr(self._embed_model, "_embed", None)
+        if embed is not None:
+            return embed(queries, prompt_name="query")
+        return [self._embed_model.get_query_embedding(query) for query in queries]
+
+    def _embed_texts(self, texts: list[str]) -> np.ndarray:
+        if self._text_embeddings is not None:
+            return self._text_embeddings.embed(texts, self._embed_model.get_text_embedding_batch)
+        return np.asarray(self._embed_model.get_text_embedding_batch(texts), dtype=np.float32)
+
+    @staticmethod
+    def _split_embeddings(payload: DocumentPayload) -> _PendingItem:
+        """Separate precomputed embeddings from the metadata persisted with a payload."""
+
+        if not any(key in payload.metadata for key in PRECOMPUTED_EMBEDDING_KEYS.values()):
+            return payload, {}
+        metadata = dict(payload.metadata)
+        embeddings = {
+            kind: metadata.pop(key)
+            for kind, key in PRECOMPUTED_EMBEDDING_KEYS.items()
+            if key in metadata
+        }
+        return payload.model_copy(update={"metadata": metadata}), embeddings
+
+    @staticmethod
+    def _summary_text(payload: DocumentPayload) -> str:
+        return str(payload.metadata.get("chunk_summary", "")).strip()
+
+    @classmethod
+    def _vector_text(cls, payload: DocumentPayload, kind: str) -> str:
+        return payload.content if kind == "content" else cls._summary_text(payload)
+
+    def _bm25_text(self, payload: DocumentPayload) -> str:
+        summary_text = self._summary_text(payload)
+        if self._search_settings.bm25_include_content:
+            return f"{summary_text}\n{payload.content}"
+        return summary_text
+
+    def _hit_to_result(self, hit: FusedHit) -> SearchResult:
+        """Materialize the API response model for a fused hit from the chunk table."""
+
+        metadata = self._chunks.metadata(hit.doc_id)
+        metadata.update(document_id=hit.doc_id, match_type=hit.best_retriever)
+        return SearchResult(
+            document_id=hit.doc_id,
+            score=hit.score,
+            content=self._chunks.content(hit.doc_id),
+            metadata=metadata,
+            scores=hit.sub_scores,
+        )
 
-        return results
+    @property
+    def embed_model(self) -> BaseEmbedding:
+        """Return the embedding model, which may be shared with other collections."""
+
+        return self._embed_model
 
     @property
     def indexed_count(self) -> int:
         """Return the number of documents currently tracked by the service."""
 
-        return len(self._documents)
+        return len(self._chunks)
+
+
+def create_embed_model(settings: DocumentSettings) -> BaseEmbedding:
+    """Load the text embedding model configured in ``settings``."""
+
+    return load_embed_model(settings.embed, Path(settings.store.settings.path) / MODELS_DIRECTORY)
+
+
+def _retriever_depth(depth: int) -> int:
+    """Return how many hits each retriever contributes to fusion for ``depth`` candidates.
+
+    Retrievers always go ``MAX_SEARCH_LIMIT`` deep so fusion sees more than the final top-k,
+    and deeper when rerank or MMR asks for more candidates than that.
+    """
+
+    return max(depth, MAX_SEARCH_LIMIT)
+
+
+def _normalize_query(query: str) -> str:
+    """Collapse whitespace so trivially different spellings share cache entries."""
+
+    return " ".join(query.split())
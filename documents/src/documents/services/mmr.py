@@ -0,0 +1,39 @@
+"""Maximal marginal relevance selection over candidate embeddings."""
+
+from __future__ import annotations
+
+import numpy as np
+
+
+def mmr_select(
+    relevance: np.ndarray, embeddings: np.ndarray, *, limit: int, mmr_lambda: float
+) -> list[int]:
+    """Return the indices of up to ``limit`` candidates picked by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    ``mmr_lambda * relevance - (1 - mmr_lambda) * max cosine similarity to those picked``.
+    ``relevance`` is rescaled to ``[0, 1]`` first so both terms share a scale, and every
+    pairwise similarity comes from one Gram matrix of the L2-normalized ``embeddings``; a
+    step only updates the running maximum similarity with one row of that matrix.
+    """
+
+    count = len(relevance)
+    if count == 0 or limit <= 0:
+        return []
+
+    relevance = np.asarray(relevance, dtype=np.float64)
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(count)
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    similarity = embeddings @ embeddings.T
+
+    redundancy = np.zeros(count)
+    available = np.ones(count, dtype=bool)
+    selected: list[int] = []
+    for _ in range(min(limit, count)):
+        scores = mmr_lambda * relevance - (1.0 - mmr_lambda) * redundancy
+        best = int(np.argmax(np.where(available, scores, -np.inf)))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
@@ -4,22 +4,31 @@ from __future__ import annotations
 
 import pydantic.dataclasses as pydantic_dataclasses
 
-from functools import lru_cache
+import threading
 from pathlib import Path
-from typing import Final
+from typing import TYPE_CHECKING, Any, Final
 from uuid import uuid4
 
 import structlog
 from fastapi import UploadFile
+from llama_index.core.embeddings import BaseEmbedding
 
 from documents.schemas import DocumentPayload
-from documents.services.docling_pdf_pipeline import DoclingPdfPipeline, PdfChunk
+from documents.services.collection_manager import CollectionManager
+from documents.services.embedding_cache import EmbeddingCache, open_embedding_cache
 from documents.services.indexing_service import DocumentIndexService
 from documents.services.settings import DocumentSettings
-from llama_index.llms.openai import OpenAI
+
+if TYPE_CHECKING:
+    # Docling and the LLM clients are heavy imports, deferred to warm-up or the first PDF.
+    from documents.services.docling_pdf_pipeline import DoclingPdfPipeline, PdfChunk
 
 LOGGER: Final = structlog.get_logger(__name__)
 
+_PIPELINES_LOCK: Final = threading.Lock()
+_PIPELINES: dict[tuple[str, int, EmbeddingCache | None], DoclingPdfPipeline] = {}
+
+
 @pydantic_dataclasses.dataclass(frozen=True)
 class DocumentsStore:
     settings: DocumentSettings
@@ -69,7 +78,7 @@ def process_pdf_for_indexing(
     """Extract content from the PDF and index it with the provided service."""
 
     try:
-        pipeline = _get_docling_pipeline(document_settings)
+        pipeline = _get_docling_pipeline(document_settings, service.embed_model)
         chunks = pipeline.process(file_path)
     except Exception as exc:  # pragma: no cover - defensive logging
         LOGGER.exception("Failed to parse PDF %s: %s", file_path, exc)
@@ -96,7 +105,8 @@ def process_pdf_for_indexing(
     ]
 
     try:
-        service.index_documents(payloads)
+        # Replacing drops chunks left over from a previous, longer version of the PDF.
+        service.replace_document(document_id, payloads)
         LOGGER.info(
             "Indexed PDF document %s from %s with %d chunks",
             document_id,
@@ -107,6 +117,27 @@ def process_pdf_for_indexing(
         LOGGER.exception("Failed to index document %s: %s", document_id, exc)
 
 
+def process_pdf_for_collection(
+    file_path: Path,
+    *,
+    document_id: str,
+    collections: CollectionManager,
+    collection: str,
+    original_filename: str | None,
+    document_settings: DocumentSettings,
+) -> None:
+    """Run ``process_pdf_for_indexing`` while keeping ``collection`` loaded."""
+
+    with collections.lease(collection) as service:
+        process_pdf_for_indexing(
+            file_path,
+            document_id=document_id,
+            service=service,
+            original_filename=original_filename,
+            document_settings=document_settings,
+        )
+
+
 def _chunk_to_payload(
     *,
     document_id: str,
@@ -120,8 +151,11 @@ def _chunk_to_payload(
     metadata["chunk_index"] = index
     metadata["chunk_summary"] = chunk.summary
     metadata["images"] = list(chunk.images)
+    metadata["page_numbers"] = _page_numbers(chunk.metadata or {})
     if chunk.embedding:
         metadata["embedding"] = chunk.embedding
+    if chunk.summary_embedding:
+        metadata["summary_embedding"] = chunk.summary_embedding
 
     chunk_document_id = f"{document_id}::chunk-{index:04d}"
     return DocumentPayload(
@@ -131,27 +165,56 @@ def _chunk_to_payload(
     )
 
 
-def _get_docling_pipeline(settings: DocumentSettings) -> DoclingPdfPipeline:
-    return _cached_pipeline(
-        summary_model=settings.summary_model_name,
-        embedding_model=settings.embed.model_name,
-    )
+def _page_numbers(metadata: dict[str, Any]) -> list[int]:
+    """Collect the pages a Docling chunk spans from the provenance of its doc items."""
+
+    pages: set[int] = set()
+    for item in metadata.get("doc_items") or ():
+        if not isinstance(item, dict):
+            continue
+        for provenance in item.get("prov") or ():
+            if isinstance(provenance, dict) and isinstance(provenance.get("page_no"), int):
+                pages.add(provenance["page_no"])
+    return sorted(pages)
+
+
+def _get_docling_pipeline(
+    settings: DocumentSettings, embed_model: BaseEmbedding
+) -> DoclingPdfPipeline:
+    """Return the PDF pipeline embedding chunks with ``embed_model``, building it once.
+
+    ``embed_model`` is the model the index services already share, so ingestion does not
+    load a second copy of it.
+    """
+
+    embedding_cache = open_embedding_cache(settings)
+    # The pipeline keeps ``embed_model`` alive, so its id is not reused while cached.
+    key = (settings.summary_model_name, id(embed_model), embedding_cache)
+    with _PIPELINES_LOCK:
+        pipeline = _PIPELINES.get(key)
+        if pipeline is None:
+            from documents.services.docling_pdf_pipeline import DoclingPdfPipeline
+
+            pipeline = DoclingPdfPipeline(
+                summary_llm=_build_summary_llm(settings.summary_model_name),
+                sentence_transformer=settings.embed.model_name,
+                include_images=True,
+                embedding_cache=embedding_cache,
+                embed_model=embed_model,
+            )
+            _PIPELINES[key] = pipeline
+        return pipeline
+
+
+def warm_up_pdf_pipeline(settings: DocumentSettings, embed_model: BaseEmbedding) -> None:
+    """Build the cached PDF pipeline and load its models before the first upload."""
+
+    _get_docling_pipeline(settings, embed_model).warm_up()
 
 
 def _build_summary_llm(model_name: str):
     if model_name.startswith("openai/"):
+        from llama_index.llms.openai import OpenAI
+
         return OpenAI(model=model_name.split("/", 1)[1])
     raise ValueError(f"Unsupported summary model '{model_name}'")
-
-
-@lru_cache(maxsize=2)
-def _cached_pipeline(
-    *,
-    summary_model: str,
-    embedding_model: str,
-) -> DoclingPdfPipeline:
-    return DoclingPdfPipeline(
-        summary_llm=_build_summary_llm(summary_model),
-        sentence_transformer=embedding_model,
-        include_images=True,
-    )
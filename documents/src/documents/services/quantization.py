@@ -0,0 +1,148 @@
+"""Quantized first-pass search over compressed copies of the stored embeddings.
+
+The full-precision vectors stay in the memory-mapped store on disk; only the compact codes
+are held in memory and scanned per query. The best ``limit * rescore_factor`` rows per
+vector kind are handed to ``PersistentVectorStore.search`` as candidates and re-scored
+exactly, which touches just those pages of the float32 file.
+"""
+
+from __future__ import annotations
+
+from typing import Final
+
+import numpy as np
+import structlog
+
+from documents.services.settings import QuantizationSettings
+from documents.services.vector_store import VECTOR_KINDS, PersistentVectorStore
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+_MIN_ROWS: Final = 1024
+_RECALIBRATE_GROWTH: Final = 4
+_SCAN_BATCH: Final = 16384
+_POPCOUNT: Final = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def build_quantized_index(
+    settings: QuantizationSettings, store: PersistentVectorStore
+) -> QuantizedIndex | None:
+    """Create the quantized first-pass index selected by ``settings`` or ``None``."""
+
+    if settings.mode == "none":
+        return None
+    if settings.mode in {"int8", "binary"}:
+        return QuantizedIndex(store, mode=settings.mode, rescore_factor=settings.rescore_factor)
+    raise ValueError(f"Unsupported quantization mode '{settings.mode}'")
+
+
+class QuantizedIndex:
+    """Int8 scalar or binary sign codes for every stored vector, scanned in batches.
+
+    ``int8`` codes keep one byte per dimension (4x smaller than float32) using per-dimension
+    scales calibrated on the stored vectors; ``binary`` codes keep one bit per dimension
+    (32x smaller) and rank rows by Hamming distance to the query's sign code. Stores
+    smaller than ``_MIN_ROWS`` rows are searched exactly.
+    """
+
+    def __init__(self, store: PersistentVectorStore, *, mode: str, rescore_factor: int) -> None:
+        self._store = store
+        self._mode = mode
+        self._rescore_factor = rescore_factor
+        self._codes: dict[str, np.ndarray] = {}
+        self._scales: dict[str, np.ndarray] = {}
+        self._calibrate_at = _MIN_ROWS
+
+    @property
+    def nbytes(self) -> int:
+        """Return the memory held by the codes."""
+
+        return sum(codes.nbytes for codes in self._codes.values())
+
+    def add(self, start: int, stop: int) -> None:
+        if self._store.rows >= self._calibrate_at:
+            self._calibrate()
+            self._encode_all()
+        elif self._codes:
+            self._encode(start, stop)
+
+    def candidates(self, query: np.ndarray, *, limit: int) -> dict[str, np.ndarray] | None:
+        if not self._codes:
+            return None
+
+        query = np.asarray(query, dtype=np.float32)
+        count = limit * self._rescore_factor
+        return {kind: self._scan(kind, query, count) for kind in VECTOR_KINDS}
+
+    def _scan(self, kind: str, query: np.ndarray, count: int) -> np.ndarray:
+        rows = self._store.rows
+        codes = self._codes[kind]
+        eligible = self._store.eligible(kind)
+        if self._mode == "int8":
+            # Codes are ``v / scale``, so ``code · (q * scale)`` approximates ``v · q``.
+            query_code = query * self._scales[kind]
+        else:
+            query_code = np.packbits(query > 0)
+
+        scores = np.empty(rows, dtype=np.float32)
+        for start in range(0, rows, _SCAN_BATCH):
+            stop = min(rows, start + _SCAN_BATCH)
+            if self._mode == "int8":
+                scores[start:stop] = codes[start:stop].astype(np.float32) @ query_code
+            else:
+                distances = _POPCOUNT[np.bitwise_xor(codes[start:stop], query_code)].sum(axis=1)
+                scores[start:stop] = -distances.astype(np.float32)
+
+        scores[~eligible] = -np.inf
+        if count < rows:
+            selected = np.argpartition(-scores, count - 1)[:count]
+        else:
+            selected = np.arange(rows)
+        return selected[np.isfinite(scores[selected])]
+
+    def _calibrate(self) -> None:
+        if self._mode == "int8":
+            for kind in VECTOR_KINDS:
+                vectors = self._store.vectors(kind)
+                max_abs = np.zeros(vectors.shape[1], dtype=np.float32)
+                for start in range(0, self._store.rows, _SCAN_BATCH):
+                    batch = np.abs(np.asarray(vectors[start : start + _SCAN_BATCH]))
+                    max_abs = np.maximum(max_abs, batch.max(axis=0))
+                self._scales[kind] = np.where(max_abs == 0, 1.0, max_abs / 127.0).astype(np.float32)
+        self._calibrate_at = self._store.rows * _RECALIBRATE_GROWTH
+
+    def _encode_all(self) -> None:
+        self._codes = {kind: self._empty_codes(0) for kind in VECTOR_KINDS}
+        self._encode(0, self._store.rows)
+        LOGGER.info(
+            "Encoded quantized vectors",
+            mode=self._mode,
+            rows=self._store.rows,
+            nbytes=self.nbytes,
+        )
+
+    def _encode(self, start: int, stop: int) -> None:
+        for kind in VECTOR_KINDS:
+            codes = self._codes[kind]
+            if codes.shape[0] < stop:
+                grown = self._empty_codes(max(stop, 2 * codes.shape[0]))
+                grown[: codes.shape[0]] = codes
+                codes = self._codes[kind] = grown
+
+            vectors = self._store.vectors(kind)
+            for batch_start in range(start, stop, _SCAN_BATCH):
+                batch_stop = min(stop, batch_start + _SCAN_BATCH)
+                batch = np.asarray(vectors[batch_start:batch_stop])
+                codes[batch_start:batch_stop] = self._quantize(kind, batch)
+
+    def _quantize(self, kind: str, vectors: np.ndarray) -> np.ndarray:
+        if self._mode == "int8":
+            scaled = np.rint(vectors / self._scales[kind])
+            return np.clip(scaled, -127, 127).astype(np.int8)
+        return np.packbits(vectors > 0, axis=1)
+
+    def _empty_codes(self, rows: int) -> np.ndarray:
+        dim = self._store.dim or 0
+        if self._mode == "int8":
+            return np.zeros((rows, dim), dtype=np.int8)
+        return np.zeros((rows, (dim + 7) // 8), dtype=np.uint8)
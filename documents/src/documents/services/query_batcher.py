@@ -0,0 +1,98 @@
+"""Micro-batching of query embeddings across concurrent search requests."""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from typing import Final
+
+import numpy as np
+import structlog
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+EmbedBatch = Callable[[list[str]], Sequence[Sequence[float]]]
+
+
+class QueryEmbeddingBatcher:
+    """Coalesce queries submitted from concurrent threads into one embedding call.
+
+    The first query to arrive opens a window of ``max_wait_ms``; every query submitted before
+    the window closes or ``max_batch_size`` is reached is embedded in the same forward pass
+    by a background worker, and each caller blocks only until its own vector is ready.
+    With ``max_batch_size <= 1`` queries are embedded inline on the calling thread.
+    """
+
+    def __init__(self, embed_batch: EmbedBatch, *, max_batch_size: int, max_wait_ms: float) -> None:
+        self._embed_batch = embed_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._pending: queue.SimpleQueue[tuple[str, Future[np.ndarray]] | None] = (
+            queue.SimpleQueue()
+        )
+        self._worker: threading.Thread | None = None
+        self._worker_lock = threading.Lock()
+
+    def embed(self, query: str) -> np.ndarray:
+        """Return the embedding of ``query``, batched with concurrently submitted queries."""
+
+        if self._max_batch_size <= 1:
+            return np.asarray(self._embed_batch([query])[0], dtype=np.float32)
+
+        future: Future[np.ndarray] = Future()
+        self._ensure_worker()
+        self._pending.put((query, future))
+        return future.result()
+
+    def close(self) -> None:
+        """Stop the worker once the queries already submitted have been embedded."""
+
+        with self._worker_lock:
+            if self._worker is not None:
+                self._pending.put(None)
+                self._worker = None
+
+    def _ensure_worker(self) -> None:
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="query-embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._pending.get()
+            if first is None:
+                return
+            batch = [first]
+            stopping = False
+            deadline = time.monotonic() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._pending.get(timeout=max(remaining, 0.0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch: list[tuple[str, Future[np.ndarray]]]) -> None:
+        try:
+            vectors = np.asarray(self._embed_batch([query for query, _ in batch]), dtype=np.float32)
+        except Exception as exc:  # noqa: BLE001 - surfaced to every waiting caller
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for (_, future), vector in zip(batch, vectors, strict=True):
+            future.set_result(vector)
+        LOGGER.debug("Embedded query batch", batch_size=len(batch))
@@ -0,0 +1,126 @@
+"""Cross-encoder re-scoring of the best fused search candidates."""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Final
+
+import structlog
+
+from documents.services.cache import CacheStats, LruCache
+from documents.services.settings import RerankSettings
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+ScorePairs = Callable[[list[tuple[str, str]]], Sequence[float]]
+_ScoreKey = tuple[str, bytes]
+
+
+def build_reranker(settings: RerankSettings) -> CrossEncoderReranker | None:
+    """Load the cross-encoder selected by ``settings`` or return ``None`` when disabled."""
+
+    if not settings.model_name:
+        return None
+    return CrossEncoderReranker(
+        load_cross_encoder(settings.model_name),
+        timeout_ms=settings.timeout_ms,
+        cache_size=settings.cache_size,
+    )
+
+
+def load_cross_encoder(model_name: str) -> ScorePairs:
+    """Return a function scoring (query, text) pairs with a sentence-transformers model."""
+
+    from sentence_transformers import CrossEncoder
+
+    model = CrossEncoder(model_name)
+
+    def score_pairs(pairs: list[tuple[str, str]]) -> Sequence[float]:
+        # One batch holding every pair keeps scoring to a single forward pass.
+        return model.predict(pairs, batch_size=max(len(pairs), 1), show_progress_bar=False)
+
+    return score_pairs
+
+
+class CrossEncoderReranker:
+    """Score (query, chunk) pairs with a cross-encoder within a per-request time budget.
+
+    Uncached pairs of a request are scored together in one call on a dedicated worker
+    thread. If the scores are not ready within ``timeout_ms`` (including time spent queued
+    behind other requests) the caller gets ``None`` and keeps the first-stage order; a
+    call already running still finishes and caches the scores, so a retry is served from
+    the cache, but a call whose budget ran out while it was queued is dropped unscored.
+    Scores are cached by query and SHA-256 of the chunk text.
+    """
+
+    def __init__(self, score_pairs: ScorePairs, *, timeout_ms: float, cache_size: int) -> None:
+        self._score_pairs = score_pairs
+        self._timeout = timeout_ms / 1000
+        self._cache: LruCache[_ScoreKey, float] = LruCache(cache_size)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="documents-rerank")
+
+    def score(self, query: str, texts: Sequence[str]) -> list[float] | None:
+        """Return one score per text, or ``None`` if the time budget ran out."""
+
+        return self.score_many([(query, texts)])[0]
+
+    def score_many(self, requests: Sequence[tuple[str, Sequence[str]]]) -> list[list[float] | None]:
+        """Score the texts of several queries with a single cross-encoder call."""
+
+        request_keys = [[(query, _digest(text)) for text in texts] for query, texts in requests]
+        scores: dict[_ScoreKey, float] = {}
+        missing: dict[_ScoreKey, tuple[str, str]] = {}
+        for (query, texts), keys in zip(requests, request_keys, strict=True):
+            for text, key in zip(texts, keys, strict=True):
+                if key in scores or key in missing:
+                    continue
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing[key] = (query, text)
+                else:
+                    scores[key] = cached
+
+        if missing:
+            future = self._pool.submit(self._score, missing, time.monotonic() + self._timeout)
+            try:
+                scores.update(future.result(timeout=self._timeout))
+            except FutureTimeoutError:
+                LOGGER.warning(
+                    "Rerank time budget exceeded; keeping first-stage order",
+                    pairs=len(missing),
+                    timeout_ms=self._timeout * 1000,
+                )
+                return [None] * len(requests)
+        return [[scores[key] for key in keys] for keys in request_keys]
+
+    def stats(self) -> CacheStats:
+        return self._cache.stats()
+
+    def warm_up(self) -> None:
+        """Score one pair directly, outside the cache and time budget, to load the model."""
+
+        self._score_pairs([("warm-up", "warm-up")])
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _score(
+        self, pairs: dict[_ScoreKey, tuple[str, str]], deadline: float
+    ) -> dict[_ScoreKey, float]:
+        if time.monotonic() > deadline:
+            # The caller has already fallen back; scoring now would only delay later requests.
+            LOGGER.debug("Dropping rerank call queued past its time budget", pairs=len(pairs))
+            return {}
+        values = self._score_pairs(list(pairs.values()))
+        scores = {key: float(value) for key, value in zip(pairs, values, strict=True)}
+        for key, value in scores.items():
+            self._cache.put(key, value)
+        return scores
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
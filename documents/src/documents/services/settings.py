@@ -1,3 +1,5 @@
+import dataclasses
+
 import pydantic.dataclasses as pydantic_dataclasses
 
 @pydantic_dataclasses.dataclass(frozen=True)
@@ -13,9 +15,118 @@ class ObjectStoreSettings:
 class EmbedSettings:
     model_name: str = "BAAI/bge-small-en-v1.5"
     chunk_size: int = 384 # may use llamaindex's default instead
+    # concurrent search queries embedded together in one forward pass
+    query_batch_size: int = 32
+    query_batch_wait_ms: float = 2.0
+    # persistent (model, sha256(text)) embedding cache shared by ingestion and indexing;
+    # stored next to the index, evicted LRU, 0 disables
+    cache_max_entries: int = 500000
+    # inference runtime for ingestion and query embedding; onnx runs the model's ONNX graph
+    # on CPU through ONNX Runtime (needs the `onnx` extra)
+    backend: str = "torch" # must be one of: torch, onnx
+    # int8 (onnx only) dynamically quantizes the weights once, stored under <store>/models
+    quantization: str = "none" # must be one of: none, int8
+    # ONNX Runtime quantization target matching the CPU instruction set
+    onnx_quantization_config: str = "avx2" # must be one of: arm64, avx2, avx512, avx512_vnni
+    # intra-op inference threads; 0 keeps the runtime default (all cores)
+    num_threads: int = 0
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class SearchSettings:
+    fusion: str = "rrf" # must be one of: rrf, weighted
+    rrf_k: int = 60
+    # BM25 always covers chunk summaries; optionally the chunk content as well
+    bm25_include_content: bool = False
+    bm25_k1: float = 1.5
+    bm25_b: float = 0.75
+    content_weight: float = 1.0
+    summary_weight: float = 1.0
+    bm25_weight: float = 1.0
+    # fused candidates that maximal-marginal-relevance selection picks from (mmr_lambda)
+    mmr_candidates: int = 20
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class AnnSettings:
+    backend: str = "exact" # must be one of: exact, ivf, hnsw
+    # IVF-flat: number of k-means lists and how many of them each query probes
+    nlist: int = 1024
+    nprobe: int = 16
+    # HNSW (requires the "ann" extra): graph degree and candidate list sizes
+    hnsw_m: int = 16
+    ef_construction: int = 200
+    ef_search: int = 64
+    # HNSW candidates fetched per requested hit before exact re-scoring
+    candidate_factor: int = 4
+    # stored vectors sampled as queries by the recall-vs-exact check
+    recall_sample_size: int = 200
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class QuantizationSettings:
+    # compressed first pass over the embeddings; full-precision vectors stay on disk
+    mode: str = "none" # must be one of: none, int8, binary
+    # first-pass candidates kept per requested hit for full-precision re-scoring
+    rescore_factor: int = 10
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class RerankSettings:
+    # sentence-transformers cross-encoder re-scoring the best fused candidates; empty disables
+    model_name: str = ""
+    # fused candidates re-scored per query (at least the requested limit)
+    candidates: int = 20
+    # per-request budget; when exceeded the first-stage order is returned
+    timeout_ms: float = 250.0
+    # LRU entries of (query, chunk text) scores
+    cache_size: int = 8192
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class CacheSettings:
+    # LRU entries; 0 disables a cache but keeps counting misses
+    query_embedding_size: int = 4096
+    # results are keyed by index generation, so any indexing change invalidates them
+    result_size: int = 1024
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class ExecutorSettings:
+    # threads running embedding, search and indexing calls off the event loop
+    max_workers: int = 4
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class CompactionSettings:
+    # rewrite the vector store in the background once this share of rows is retired
+    tombstone_ratio: float = 0.3
+    min_rows: int = 1024
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class CollectionSettings:
+    # estimated memory of loaded collections before idle least-recently-used ones are
+    # unloaded (they reload from disk on next access); 0 keeps every collection loaded
+    memory_budget_mb: int = 0
+
+@pydantic_dataclasses.dataclass(frozen=True)
+class WarmUpSettings:
+    # load models and open collections in the background at startup; /health/ready reports
+    # 503 until done. When disabled everything loads on first use and the service is ready
+    enabled: bool = True
+    # collections opened (index loaded from disk) during warm-up
+    collections: list[str] = dataclasses.field(default_factory=lambda: ["default"])
+    # also import Docling and build the PDF pipeline with its models and summary LLM client
+    pdf_pipeline: bool = True
+    # extra attempts of a failing step (e.g. a model download hiccup) before giving up
+    retries: int = 3
+    # wait before the first retry; doubled before each further one
+    retry_backoff_seconds: float = 2.0
 
 @pydantic_dataclasses.dataclass(frozen=True)
 class DocumentSettings:
     store: ObjectStoreSettings = ObjectStoreSettings()
     summary_model_name: str = "openai/gpt-4o-mini"
     embed: EmbedSettings = EmbedSettings()
+    search: SearchSettings = SearchSettings()
+    ann: AnnSettings = AnnSettings()
+    quantization: QuantizationSettings = QuantizationSettings()
+    rerank: RerankSettings = RerankSettings()
+    cache: CacheSettings = CacheSettings()
+    executor: ExecutorSettings = ExecutorSettings()
+    compaction: CompactionSettings = CompactionSettings()
+    collections: CollectionSettings = CollectionSettings()
+    warm_up: WarmUpSettings = WarmUpSettings()
@@ -0,0 +1,247 @@
+"""Versioned binary snapshot files made of checksummed array sections."""
+
+from __future__ import annotations
+
+import io
+import json
+import struct
+import zlib
+from collections.abc import Iterable, Sequence
+from typing import Any, BinaryIO, Final
+
+import numpy as np
+
+SNAPSHOT_MAGIC: Final = b"DOCSNAP\x00"
+SNAPSHOT_VERSION: Final = 1
+
+_BLOCK_BYTES: Final = 16 * 1024 * 1024
+_LENGTH: Final = struct.Struct("<H")
+_DIMENSIONS: Final = struct.Struct("<B")
+_EXTENT: Final = struct.Struct("<Q")
+_CHECKSUM: Final = struct.Struct("<I")
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot is truncated, corrupt or of an unsupported version."""
+
+
+class SnapshotWriter:
+    """Stream named sections to a snapshot file.
+
+    The file starts with ``SNAPSHOT_MAGIC`` and the format version. Each section is a
+    header (name, NumPy dtype and shape) followed by the raw C-order array bytes and their
+    CRC-32; an empty name marks the end. Sections are written and read in order, block by
+    block, so neither side needs the whole file in memory.
+    """
+
+    def __init__(self, handle: BinaryIO) -> None:
+        self._handle = handle
+        handle.write(SNAPSHOT_MAGIC)
+        handle.write(_CHECKSUM.pack(SNAPSHOT_VERSION))
+
+    def write_array(self, name: str, array: np.ndarray) -> None:
+        array = np.ascontiguousarray(array)
+        self.write_blocks(name, array.dtype, array.shape, [array])
+
+    def write_blocks(
+        self,
+        name: str,
+        dtype: np.dtype,
+        shape: Sequence[int],
+        blocks: Iterable[np.ndarray],
+    ) -> None:
+        """Write a section whose array arrives as consecutive blocks of leading rows."""
+
+        dtype = np.dtype(dtype)
+        self._write_header(name, dtype, shape)
+        expected = int(np.prod(shape, dtype=np.int64)) * dtype.itemsize
+        written = 0
+        checksum = 0
+        for block in blocks:
+            data = _byte_view(np.ascontiguousarray(block, dtype=dtype))
+            self._handle.write(data)
+            checksum = zlib.crc32(data, checksum)
+            written += len(data)
+        if written != expected:
+            raise ValueError(f"Section '{name}' has {written} bytes, expected {expected}")
+        self._handle.write(_CHECKSUM.pack(checksum))
+
+    def write_bytes(self, name: str, data: bytes) -> None:
+        self.write_array(name, np.frombuffer(data, dtype=np.uint8))
+
+    def write_json(self, name: str, value: Any) -> None:
+        self.write_bytes(name, json.dumps(value).encode("utf-8"))
+
+    def write_strings(self, name: str, strings: Iterable[str]) -> None:
+        """Write ``strings`` as one NUL-terminated UTF-8 blob."""
+
+        parts: list[str] = []
+        for string in strings:
+            if "\0" in string:
+                raise ValueError(f"Section '{name}' cannot store strings containing NUL")
+            parts.append(string)
+            parts.append("\0")
+        self.write_bytes(name, "".join(parts).encode("utf-8"))
+
+    def close(self) -> None:
+        """Write the end marker; the caller still owns (and closes) the file."""
+
+        self._handle.write(_LENGTH.pack(0))
+
+    def _write_header(self, name: str, dtype: np.dtype, shape: Sequence[int]) -> None:
+        if not name:
+            raise ValueError("Section names must not be empty")
+        for text in (name, dtype.str):
+            encoded = text.encode("utf-8")
+            self._handle.write(_LENGTH.pack(len(encoded)))
+            self._handle.write(encoded)
+        self._handle.write(_DIMENSIONS.pack(len(shape)))
+        for extent in shape:
+            self._handle.write(_EXTENT.pack(extent))
+
+
+class SnapshotReader:
+    """Read the sections of a ``SnapshotWriter`` file in the order they were written.
+
+    Every section is verified against its CRC-32 before its data is returned; a wrong
+    section name, dtype or shape, a truncated file or a checksum mismatch raises
+    ``SnapshotError``. Headers come from an untrusted file, so each section must have the
+    dtype its caller expects and fit in the rest of the file before anything is allocated.
+    """
+
+    def __init__(self, handle: BinaryIO) -> None:
+        self._handle = handle
+        start = handle.tell()
+        self._end = handle.seek(0, io.SEEK_END)
+        handle.seek(start)
+        if self._read_exact(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+            raise SnapshotError("Not a document index snapshot")
+        (version,) = _CHECKSUM.unpack(self._read_exact(_CHECKSUM.size))
+        if version != SNAPSHOT_VERSION:
+            raise SnapshotError(f"Unsupported snapshot format {version}")
+
+    def read_array(self, name: str, dtype: np.dtype) -> np.ndarray:
+        dtype = np.dtype(dtype)
+        shape = self._read_header(name, dtype)
+        array = np.empty(shape, dtype=dtype)
+        self._read_payload(name, array)
+        return array
+
+    def read_into(self, name: str, target: np.ndarray) -> None:
+        """Read a section straight into ``target``, e.g. a writable memory map."""
+
+        if not target.flags.c_contiguous:
+            raise ValueError("Snapshot sections can only be read into contiguous arrays")
+        shape = self._read_header(name, target.dtype)
+        if shape != target.shape:
+            raise SnapshotError(
+                f"Section '{name}' holds {list(shape)}, expected {list(target.shape)}"
+            )
+        self._read_payload(name, target)
+
+    def copy_to(self, name: str, handle: BinaryIO) -> int:
+        """Stream a ``uint8`` section into ``handle`` and return how many bytes were copied."""
+
+        (size,) = self._read_header(name, np.dtype(np.uint8), dimensions=1)
+        buffer = memoryview(bytearray(min(size, _BLOCK_BYTES)))
+        checksum = 0
+        for start in range(0, size, _BLOCK_BYTES):
+            block = buffer[: min(size - start, _BLOCK_BYTES)]
+            self._readinto_exact(block)
+            checksum = zlib.crc32(block, checksum)
+            handle.write(block)
+        self._check(name, checksum)
+        return size
+
+    def read_bytes(self, name: str) -> bytes:
+        return self.read_array(name, np.uint8).tobytes()
+
+    def read_json(self, name: str) -> Any:
+        data = self.read_bytes(name)
+        try:
+            return json.loads(data)
+        except ValueError as exc:
+            raise SnapshotError(f"Corrupt snapshot section '{name}': {exc}") from exc
+
+    def read_strings(self, name: str) -> list[str]:
+        return _decode(self.read_bytes(name), f"section '{name}'").split("\0")[:-1]
+
+    def finish(self) -> None:
+        """Check that every section has been read."""
+
+        (length,) = _LENGTH.unpack(self._read_exact(_LENGTH.size))
+        if length != 0:
+            raise SnapshotError("Snapshot has unexpected trailing sections")
+
+    def _read_header(
+        self, name: str, dtype: np.dtype, *, dimensions: int | None = None
+    ) -> tuple[int, ...]:
+        section = self._read_text()
+        if section != name:
+            raise SnapshotError(f"Expected snapshot section '{name}', found '{section}'")
+        # Compared as text: parsing an untrusted dtype could yield e.g. an object array.
+        found = self._read_text()
+        if found != dtype.str:
+            raise SnapshotError(f"Section '{name}' holds {found!r}, expected {dtype.str!r}")
+        (count,) = _DIMENSIONS.unpack(self._read_exact(_DIMENSIONS.size))
+        if dimensions is not None and count != dimensions:
+            raise SnapshotError(f"Section '{name}' has {count} dimensions, expected {dimensions}")
+        shape = tuple(_EXTENT.unpack(self._read_exact(_EXTENT.size))[0] for _ in range(count))
+        size = dtype.itemsize
+        for extent in shape:
+            size *= extent
+        if size + _CHECKSUM.size > self._end - self._handle.tell():
+            raise SnapshotError("Snapshot is truncated")
+        return shape
+
+    def _read_payload(self, name: str, target: np.ndarray) -> None:
+        data = _byte_view(target)
+        checksum = 0
+        for start in range(0, len(data), _BLOCK_BYTES):
+            block = data[start : start + _BLOCK_BYTES]
+            self._readinto_exact(block)
+            checksum = zlib.crc32(block, checksum)
+        self._check(name, checksum)
+
+    def _check(self, name: str, checksum: int) -> None:
+        (expected,) = _CHECKSUM.unpack(self._read_exact(_CHECKSUM.size))
+        if checksum != expected:
+            raise SnapshotError(f"Checksum mismatch in snapshot section '{name}'")
+
+    def _read_text(self) -> str:
+        (length,) = _LENGTH.unpack(self._read_exact(_LENGTH.size))
+        return _decode(self._read_exact(length), "section header")
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self._handle.read(size)
+        if len(data) != size:
+            raise SnapshotError("Snapshot is truncated")
+        return data
+
+    def _readinto_exact(self, block: memoryview) -> None:
+        filled = 0
+        while filled < len(block):
+            count = self._handle.readinto(block[filled:])
+            if not count:
+                raise SnapshotError("Snapshot is truncated")
+            filled += count
+
+
+def _decode(data: bytes, what: str) -> str:
+    # Headers are not checksummed, so a damaged byte surfaces here rather than as a mismatch.
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise SnapshotError(f"Corrupt snapshot {what}: {exc}") from exc
+
+
+def _byte_view(array: np.ndarray) -> memoryview:
+    # Viewing through uint8 (rather than ``memoryview.cast``) also handles empty arrays.
+    return memoryview(array.reshape(-1).view(np.uint8))
+
+
+def offsets(lengths: Iterable[int]) -> np.ndarray:
+    """Return the ``int64`` offsets ``[0, l0, l0 + l1, ...]`` delimiting consecutive parts."""
+
+    bounds = np.zeros(1, dtype=np.int64)
+    return np.concatenate((bounds, np.cumsum(np.fromiter(lengths, dtype=np.int64))))
@@ -0,0 +1,44 @@
+"""Per-stage latency instrumentation of the search path."""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Final
+
+from opentelemetry import metrics, trace
+
+_TRACER: Final = trace.get_tracer(__name__)
+_STAGE_DURATION: Final = metrics.get_meter(__name__).create_histogram(
+    "documents.search.stage.duration",
+    unit="ms",
+    description="Time spent in one stage of a document search",
+)
+
+
+class StageTimer:
+    """Time the stages of one search call.
+
+    Every stage runs in its own span, a child of whatever span is current (the request span
+    when called from a route), and its duration is recorded on the
+    ``documents.search.stage.duration`` histogram with ``operation`` and ``stage``
+    attributes. ``timings`` sums the milliseconds per stage, so a stage entered once per
+    query of a batch reports the batch total. Without a configured tracer or meter provider
+    the spans and records are no-ops.
+    """
+
+    def __init__(self, operation: str) -> None:
+        self._operation = operation
+        self.timings: dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        with _TRACER.start_as_current_span(f"{self._operation}.{name}"):
+            try:
+                yield
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.timings[name] = self.timings.get(name, 0.0) + elapsed_ms
+                _STAGE_DURATION.record(elapsed_ms, {"operation": self._operation, "stage": name})
@@ -0,0 +1,593 @@
+"""Persistent, memory-mapped storage for chunk embeddings and their sidecar records."""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Final
+
+import numpy as np
+import structlog
+
+from documents.services.snapshot import SnapshotError, SnapshotReader, SnapshotWriter
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+FORMAT_VERSION: Final = 2
+VECTOR_KINDS: Final = ("content", "summary")
+
+_MANIFEST_FILE: Final = "manifest.json"
+_VECTORS_STEM: Final = "vectors"
+_RECORDS_STEM: Final = "records"
+_DTYPE: Final = np.dtype(np.float32)
+_MIN_CAPACITY: Final = 1024
+_SCORE_BLOCK_BYTES: Final = 256 * 1024 * 1024
+_COPY_BATCH: Final = 65536
+# Sidecar tombstones are the only entries starting with this key (see ``_encode_tombstone``).
+_TOMBSTONE_PREFIX: Final = b'{"deleted"'
+
+
+@dataclass(frozen=True, slots=True)
+class StoredRecord:
+    """Text and metadata persisted alongside one row of the embedding matrix."""
+
+    document_id: str
+    content: str
+    metadata: dict[str, Any]
+
+
+class PersistentVectorStore:
+    """Append-only on-disk vector store backed by ``np.memmap``.
+
+    Embeddings live in one preallocated float32 file shaped ``(capacity, 2, dim)``: each row
+    holds the L2-normalized content and summary vectors of a chunk, so one matrix-vector
+    product scores both kinds and cosine similarity reduces to a dot product. Capacity
+    doubles when exhausted. Chunk text and metadata go to an append-only JSON-lines sidecar,
+    and a manifest records how many rows were fully written, so startup only maps the files
+    and replays the sidecar; pages of the matrix are loaded by the OS on demand.
+
+    Re-indexing a ``document_id`` appends a new row and retires the previous one, and
+    deleting one appends a tombstone entry to the sidecar, keeping every write an append.
+    ``compact`` rewrites the live rows into files of the next epoch to reclaim retired rows.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._dim: int | None = None
+        self._rows = 0
+        self._capacity = 0
+        self._records_bytes = 0
+        self._epoch = 0
+        self._vectors: np.ndarray = np.zeros((0, len(VECTOR_KINDS), 0), dtype=_DTYPE)
+        self._live = np.zeros(0, dtype=bool)
+        self._has_summary = np.zeros(0, dtype=bool)
+        self._document_ids: list[str] = []
+        self._row_by_id: dict[str, int] = {}
+
+    @property
+    def dim(self) -> int | None:
+        """Return the embedding dimension, or ``None`` before the first append."""
+
+        return self._dim
+
+    @property
+    def rows(self) -> int:
+        """Return the number of rows written, including retired ones."""
+
+        return self._rows
+
+    @property
+    def capacity(self) -> int:
+        """Return the number of rows preallocated in the vectors file."""
+
+        return self._capacity
+
+    @property
+    def nbytes(self) -> int:
+        """Return the size of the written vectors, i.e. the part of the mapping searches scan."""
+
+        return self._rows * len(VECTOR_KINDS) * (self._dim or 0) * _DTYPE.itemsize
+
+    @property
+    def retired_rows(self) -> int:
+        """Return the number of written rows that were replaced or deleted."""
+
+        return self._rows - len(self._row_by_id)
+
+    def __len__(self) -> int:
+        return len(self._row_by_id)
+
+    def __contains__(self, document_id: object) -> bool:
+        return document_id in self._row_by_id
+
+    def row(self, document_id: str) -> int | None:
+        """Return the live row of ``document_id``, or ``None`` if it is not stored."""
+
+        return self._row_by_id.get(document_id)
+
+    def document_id(self, row: int) -> str:
+        """Return the document identifier stored at ``row``."""
+
+        return self._document_ids[row]
+
+    def open(self) -> list[StoredRecord]:
+        """Map the on-disk files and return the live records in row order."""
+
+        manifest_path = self._directory / _MANIFEST_FILE
+        if not manifest_path.exists():
+            self._records_path().write_bytes(b"")
+            self._vectors_path().write_bytes(b"")
+            return []
+
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("version") != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported vector store format {manifest.get('version')!r} in {manifest_path}"
+            )
+
+        self._dim = manifest["dim"]
+        self._rows = manifest["rows"]
+        self._capacity = manifest["capacity"]
+        self._records_bytes = manifest["records_bytes"]
+        self._epoch = manifest.get("epoch", 0)
+        # Drop sidecar bytes written after the last manifest update, e.g. by a crash, and
+        # files of an interrupted or superseded compaction.
+        _truncate(self._records_path(), self._records_bytes)
+        self._remove_files(keep_epoch=self._epoch)
+
+        records: list[StoredRecord] = []
+        self._live = np.zeros(self._capacity, dtype=bool)
+        self._has_summary = np.zeros(self._capacity, dtype=bool)
+        for entry in self._read_entries():
+            if isinstance(entry, str):
+                self._retire(entry)
+                continue
+            record, has_summary = entry
+            self._register(len(records), record.document_id)
+            self._has_summary[len(records)] = has_summary
+            records.append(record)
+
+        self._map_vectors()
+        LOGGER.info("Mapped vector store", directory=str(self._directory), rows=self._rows)
+        return [record for row, record in enumerate(records) if self._live[row]]
+
+    def append(
+        self,
+        records: Sequence[StoredRecord],
+        content_embeddings: np.ndarray,
+        summary_embeddings: np.ndarray,
+    ) -> None:
+        """Append ``records`` and their embeddings, retiring older rows with the same id.
+
+        Rows of ``summary_embeddings`` that are all zeros mark records without a summary.
+        """
+
+        if not records:
+            return
+
+        content_embeddings = _normalize(content_embeddings)
+        summary_embeddings = _normalize(summary_embeddings)
+        dim = content_embeddings.shape[1]
+        if self._dim is None:
+            self._dim = dim
+        elif dim != self._dim:
+            raise ValueError(f"Expected embeddings of dimension {self._dim}, got {dim}")
+
+        first_row = self._rows
+        last_row = first_row + len(records)
+        self._reserve(last_row)
+        self._vectors[first_row:last_row, 0] = content_embeddings
+        self._vectors[first_row:last_row, 1] = summary_embeddings
+        self._vectors.flush()
+
+        has_summary = summary_embeddings.any(axis=1)
+        self._append_entries(
+            _encode_record(record, has_summary=bool(flag))
+            for record, flag in zip(records, has_summary, strict=True)
+        )
+        self._rows = last_row
+        self._write_manifest()
+
+        self._has_summary[first_row:last_row] = has_summary
+        for offset, record in enumerate(records):
+            self._register(first_row + offset, record.document_id)
+
+    def delete(self, document_ids: Iterable[str]) -> int:
+        """Tombstone the rows of ``document_ids`` and return how many were live.
+
+        Deletion only flips the rows' live flags and appends one sidecar entry per id; the
+        rows stay in the vectors file until the next ``compact``.
+        """
+
+        deleted = [
+            document_id for document_id in dict.fromkeys(document_ids) if document_id in self
+        ]
+        if not deleted:
+            return 0
+
+        self._append_entries(_encode_tombstone(document_id) for document_id in deleted)
+        self._write_manifest()
+        for document_id in deleted:
+            self._retire(document_id)
+        return len(deleted)
+
+    def compact(self) -> PersistentVectorStore:
+        """Copy the live rows into files of the next epoch and return a store mapping them.
+
+        This instance and its files stay untouched until the new manifest is committed, so
+        readers can keep searching it meanwhile and a crash leaves the current epoch intact.
+        The caller must not append or delete on this instance during compaction. Rows are
+        renumbered, so row-based indexes have to be rebuilt against the returned store.
+        """
+
+        live_rows = np.flatnonzero(self._live[: self._rows])
+        compacted = PersistentVectorStore(self._directory)
+        compacted._epoch = self._epoch + 1
+        compacted._dim = self._dim
+        compacted._records_path().write_bytes(b"")
+        compacted._vectors_path().write_bytes(b"")
+        compacted._reserve(live_rows.size)
+
+        for start in range(0, live_rows.size, _COPY_BATCH):
+            batch = live_rows[start : start + _COPY_BATCH]
+            compacted._vectors[start : start + batch.size] = self._vectors[batch]
+        if live_rows.size:
+            compacted._vectors.flush()
+
+        live = self._live
+        compacted._append_entries(
+            _encode_record(record, has_summary=has_summary)
+            for row, (record, has_summary) in enumerate(self._read_rows())
+            if live[row]
+        )
+        compacted._rows = live_rows.size
+        compacted._write_manifest()
+
+        compacted._has_summary[: live_rows.size] = self._has_summary[live_rows]
+        for row, previous in enumerate(live_rows):
+            compacted._register(row, self._document_ids[previous])
+        compacted._remove_files(keep_epoch=compacted._epoch)
+        LOGGER.info(
+            "Compacted vector store",
+            directory=str(self._directory),
+            rows=self._rows,
+            live_rows=compacted._rows,
+            epoch=compacted._epoch,
+        )
+        return compacted
+
+    def write_snapshot(self, writer: SnapshotWriter, rows: np.ndarray) -> None:
+        """Write ``rows`` (live rows, in order) as the store sections of a snapshot.
+
+        Vectors are streamed from the mapping in batches and the sidecar lines of the rows
+        are copied verbatim, so neither is decoded or held in memory as a whole.
+        """
+
+        live = np.zeros(self._rows, dtype=bool)
+        live[rows] = True
+        writer.write_array("store.has_summary", self._has_summary[rows])
+        writer.write_blocks(
+            "store.records",
+            np.uint8,
+            (sum(len(line) for line in self._record_lines(live)),),
+            (np.frombuffer(block, dtype=np.uint8) for block in _blocks(self._record_lines(live))),
+        )
+        writer.write_blocks(
+            "store.vectors",
+            _DTYPE,
+            (rows.size, len(VECTOR_KINDS), self._dim or 0),
+            (
+                self._vectors[rows[start : start + _COPY_BATCH]]
+                for start in range(0, rows.size, _COPY_BATCH)
+            ),
+        )
+
+    def restore_snapshot(
+        self, reader: SnapshotReader, document_ids: Sequence[str], *, dim: int
+    ) -> PersistentVectorStore:
+        """Write the store sections of a snapshot into files of the next epoch.
+
+        Returns a store mapping them; like ``compact``, this instance keeps serving until the
+        caller swaps stores, and the new manifest is only committed once every remaining
+        section of ``reader`` has been verified, so the store sections must come last. The
+        sidecar is copied as is and the vectors are read straight into the new mapping.
+        """
+
+        rows = len(document_ids)
+        has_summary = reader.read_array("store.has_summary", np.bool_)
+        if has_summary.shape != (rows,):
+            raise SnapshotError("Store sections do not match the snapshot's chunks")
+
+        restored = PersistentVectorStore(self._directory)
+        restored._epoch = self._epoch + 1
+        restored._vectors_path().write_bytes(b"")
+        with restored._records_path().open("wb") as handle:
+            restored._records_bytes = reader.copy_to("store.records", handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        restored._dim = dim or None
+        restored._reserve(rows)
+        if rows:
+            reader.read_into("store.vectors", restored._vectors[:rows])
+            restored._vectors.flush()
+        else:
+            reader.read_array("store.vectors", _DTYPE)
+        reader.finish()
+
+        restored._rows = rows
+        restored._write_manifest()
+        restored._has_summary[:rows] = has_summary
+        for row, document_id in enumerate(document_ids):
+            restored._register(row, document_id)
+        restored._remove_files(keep_epoch=restored._epoch)
+        LOGGER.info(
+            "Restored vector store from snapshot",
+            directory=str(self._directory),
+            rows=rows,
+            epoch=restored._epoch,
+        )
+        return restored
+
+    def close(self) -> None:
+        """Unmap the vectors file; every write is already flushed, so nothing is lost."""
+
+        self._vectors = np.zeros((0, len(VECTOR_KINDS), 0), dtype=_DTYPE)
+
+    def vectors(self, kind: str) -> np.ndarray:
+        """Return a view of the normalized ``kind`` embeddings for every written row."""
+
+        return self._vectors[: self._rows, VECTOR_KINDS.index(kind)]
+
+    def eligible(self, kind: str) -> np.ndarray:
+        """Return a boolean mask of the rows that may be returned for ``kind`` searches."""
+
+        live = self._live[: self._rows]
+        return live if kind == "content" else live & self._has_summary[: self._rows]
+
+    def search(
+        self,
+        query: np.ndarray,
+        *,
+        limit: int,
+        candidates: Mapping[str, np.ndarray] | None = None,
+    ) -> dict[str, list[tuple[int, float]]]:
+        """Return the top ``limit`` ``(row, cosine similarity)`` pairs for every vector kind.
+
+        Without ``candidates`` content and summary scores come from a single matrix-vector
+        product over the mapped rows (see ``search_many``); the best rows per kind are then
+        selected with ``argpartition``. When an approximate index supplies candidate rows per
+        kind, only those rows are scored exactly.
+        """
+
+        if self._rows == 0 or limit <= 0:
+            return {kind: [] for kind in VECTOR_KINDS}
+
+        query = _normalize(np.asarray(query, dtype=_DTYPE).reshape(1, -1))[0]
+        if candidates is not None:
+            return {
+                kind: self._search_rows(query, kind, candidates[kind], limit)
+                for kind in VECTOR_KINDS
+            }
+        return self.search_many(query.reshape(1, -1), limit=limit)[0]
+
+    def search_many(
+        self, queries: np.ndarray, *, limit: int
+    ) -> list[dict[str, list[tuple[int, float]]]]:
+        """Return exact top-``limit`` hits per vector kind for every row of ``queries``.
+
+        All queries are scored with one matrix-matrix product per block of queries; blocks
+        keep the intermediate score matrix below ``_SCORE_BLOCK_BYTES``.
+        """
+
+        queries = np.atleast_2d(np.asarray(queries, dtype=_DTYPE))
+        if self._rows == 0 or limit <= 0:
+            return [{kind: [] for kind in VECTOR_KINDS} for _ in range(queries.shape[0])]
+        queries = _normalize(queries)
+
+        rows = self._rows
+        matrix = self._vectors[:rows].reshape(rows * len(VECTOR_KINDS), -1)
+        masks = [self.eligible(kind) for kind in VECTOR_KINDS]
+        block = max(1, _SCORE_BLOCK_BYTES // (matrix.shape[0] * _DTYPE.itemsize))
+
+        results: list[dict[str, list[tuple[int, float]]]] = []
+        for start in range(0, queries.shape[0], block):
+            scores = (matrix @ queries[start : start + block].T).reshape(
+                rows, len(VECTOR_KINDS), -1
+            )
+            for column in range(scores.shape[2]):
+                results.append(
+                    {
+                        kind: _top_k(np.where(mask, scores[:, index, column], -np.inf), limit)
+                        for index, (kind, mask) in enumerate(zip(VECTOR_KINDS, masks, strict=True))
+                    }
+                )
+        return results
+
+    def _search_rows(
+        self, query: np.ndarray, kind: str, rows: np.ndarray, limit: int
+    ) -> list[tuple[int, float]]:
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        rows = rows[(rows >= 0) & (rows < self._rows)]
+        rows = rows[self.eligible(kind)[rows]]
+        if rows.size == 0:
+            return []
+        scores = self._vectors[rows, VECTOR_KINDS.index(kind)] @ query
+        return [(int(rows[index]), score) for index, score in _top_k(scores, limit)]
+
+    def _register(self, row: int, document_id: str) -> None:
+        previous = self._row_by_id.get(document_id)
+        if previous is not None:
+            self._live[previous] = False
+        self._row_by_id[document_id] = row
+        self._live[row] = True
+        self._document_ids.append(document_id)
+
+    def _retire(self, document_id: str) -> None:
+        row = self._row_by_id.pop(document_id, None)
+        if row is not None:
+            self._live[row] = False
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the vectors file geometrically so it can hold at least ``rows`` rows."""
+
+        if rows <= self._capacity:
+            return
+
+        capacity = max(rows, 2 * self._capacity, _MIN_CAPACITY)
+        row_bytes = len(VECTOR_KINDS) * (self._dim or 0) * _DTYPE.itemsize
+        with self._vectors_path().open("r+b") as handle:
+            handle.truncate(capacity * row_bytes)
+        self._capacity = capacity
+        self._live = _grow(self._live, capacity)
+        self._has_summary = _grow(self._has_summary, capacity)
+        self._map_vectors()
+
+    def _map_vectors(self) -> None:
+        if self._capacity == 0 or self._dim is None:
+            return
+        self._vectors = np.memmap(
+            self._vectors_path(),
+            dtype=_DTYPE,
+            mode="r+",
+            shape=(self._capacity, len(VECTOR_KINDS), self._dim),
+        )
+
+    def _read_entries(self) -> Iterator[tuple[StoredRecord, bool] | str]:
+        """Yield row records and deleted document ids in sidecar order."""
+
+        with self._records_path().open("rb") as handle:
+            for line in handle:
+                yield _decode_entry(line)
+
+    def _read_rows(self) -> Iterator[tuple[StoredRecord, bool]]:
+        for entry in self._read_entries():
+            if not isinstance(entry, str):
+                yield entry
+
+    def _record_lines(self, live: np.ndarray) -> Iterator[bytes]:
+        """Yield the raw sidecar lines of the rows flagged in ``live``."""
+
+        row = 0
+        with self._records_path().open("rb") as handle:
+            for line in handle:
+                if line.startswith(_TOMBSTONE_PREFIX):
+                    continue
+                if live[row]:
+                    yield line
+                row += 1
+
+    def _append_entries(self, entries: Iterable[bytes]) -> None:
+        with self._records_path().open("ab") as handle:
+            for entry in entries:
+                handle.write(entry)
+            handle.flush()
+            os.fsync(handle.fileno())
+            self._records_bytes = handle.tell()
+
+    def _remove_files(self, *, keep_epoch: int) -> None:
+        keep = {self._file_path(_VECTORS_STEM, ".f32", keep_epoch)}
+        keep.add(self._file_path(_RECORDS_STEM, ".jsonl", keep_epoch))
+        for pattern in (f"{_VECTORS_STEM}*.f32", f"{_RECORDS_STEM}*.jsonl"):
+            for path in self._directory.glob(pattern):
+                if path not in keep:
+                    path.unlink()
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "version": FORMAT_VERSION,
+            "dim": self._dim,
+            "rows": self._rows,
+            "capacity": self._capacity,
+            "records_bytes": self._records_bytes,
+            "epoch": self._epoch,
+        }
+        temporary = self._directory / f"{_MANIFEST_FILE}.tmp"
+        temporary.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(temporary, self._directory / _MANIFEST_FILE)
+
+    def _vectors_path(self) -> Path:
+        return self._file_path(_VECTORS_STEM, ".f32", self._epoch)
+
+    def _records_path(self) -> Path:
+        return self._file_path(_RECORDS_STEM, ".jsonl", self._epoch)
+
+    def _file_path(self, stem: str, suffix: str, epoch: int) -> Path:
+        # Epoch 0 keeps the original file names so existing indexes open unchanged.
+        name = f"{stem}{suffix}" if epoch == 0 else f"{stem}.{epoch}{suffix}"
+        return self._directory / name
+
+
+def _encode_record(record: StoredRecord, *, has_summary: bool) -> bytes:
+    payload = {
+        "document_id": record.document_id,
+        "content": record.content,
+        "metadata": record.metadata,
+        "has_summary": has_summary,
+    }
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+def _encode_tombstone(document_id: str) -> bytes:
+    return json.dumps({"deleted": document_id}, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def _decode_entry(line: bytes) -> tuple[StoredRecord, bool] | str:
+    payload = json.loads(line)
+    if "deleted" in payload:
+        return payload["deleted"]
+    record = StoredRecord(
+        document_id=payload["document_id"],
+        content=payload["content"],
+        metadata=payload["metadata"],
+    )
+    return record, payload["has_summary"]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    """Return ``matrix`` as float32 with unit-length rows; zero rows stay zero."""
+
+    matrix = np.asarray(matrix, dtype=_DTYPE)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1.0, norms).astype(_DTYPE)
+
+
+def _top_k(scores: np.ndarray, limit: int) -> list[tuple[int, float]]:
+    """Return the ``limit`` best finite scores in descending order."""
+
+    if limit < scores.shape[0]:
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+    else:
+        candidates = np.arange(scores.shape[0])
+    ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+    return [(int(row), float(scores[row])) for row in ordered if np.isfinite(scores[row])]
+
+
+def _blocks(lines: Iterable[bytes], size: int = 1 << 20) -> Iterator[bytes]:
+    """Join ``lines`` into blocks of roughly ``size`` bytes."""
+
+    block: list[bytes] = []
+    length = 0
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= size:
+            yield b"".join(block)
+            block, length = [], 0
+    if block:
+        yield b"".join(block)
+
+
+def _grow(flags: np.ndarray, size: int) -> np.ndarray:
+    grown = np.zeros(size, dtype=flags.dtype)
+    grown[: flags.shape[0]] = flags
+    return grown
+
+
+def _truncate(path: Path, size: int) -> None:
+    if path.exists() and path.stat().st_size > size:
+        with path.open("r+b") as handle:
+            handle.truncate(size)
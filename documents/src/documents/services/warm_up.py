@@ -0,0 +1,158 @@
+"""Background warm-up of models and collections before the service takes traffic."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Final, Literal
+
+import structlog
+
+from documents.services.collection_manager import CollectionManager
+from documents.services.pdf_ingestion import warm_up_pdf_pipeline
+from documents.services.settings import DocumentSettings
+
+LOGGER: Final = structlog.get_logger(__name__)
+
+WarmUpState = Literal["warming_up", "ready", "failed"]
+WarmUpStep = tuple[str, Callable[[], object]]
+
+
+@dataclass(frozen=True, slots=True)
+class WarmUpStatus:
+    state: WarmUpState
+    completed: list[str]
+    pending: list[str]
+    error: str | None = None
+
+
+class WarmUp:
+    """Run named warm-up steps once, in order, on a background thread.
+
+    The service is ready once every step has succeeded. A failing step is retried up to
+    ``retries`` times, waiting ``backoff_seconds`` and then twice as long before each further
+    attempt. A step that still fails ends the warm-up with the service left not ready, so
+    the orchestrator keeps routing traffic to healthy instances; anything not yet loaded
+    still loads lazily on first use.
+    """
+
+    def __init__(
+        self, steps: Sequence[WarmUpStep], *, retries: int = 0, backoff_seconds: float = 1.0
+    ) -> None:
+        self._steps = list(steps)
+        self._retries = retries
+        self._backoff = backoff_seconds
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._completed: list[str] = []
+        self._error: str | None = None
+        self._thread: threading.Thread | None = None
+        self._done = threading.Event()
+        if not self._steps:
+            self._done.set()
+
+    def start(self) -> None:
+        """Start the warm-up thread unless it is already running or finished."""
+
+        with self._lock:
+            if self._thread is not None or self._done.is_set():
+                return
+            self._thread = threading.Thread(target=self.run, name="documents-warm-up", daemon=True)
+            self._thread.start()
+
+    def run(self) -> None:
+        """Run the steps on the calling thread."""
+
+        for name, step in self._steps:
+            started = time.perf_counter()
+            if not self._run_step(name, step):
+                return
+            LOGGER.info(
+                "Warm-up step finished",
+                step=name,
+                duration_ms=round((time.perf_counter() - started) * 1000, 1),
+            )
+            with self._lock:
+                self._completed.append(name)
+        self._done.set()
+
+    def stop(self) -> None:
+        """Run no further steps or retries once the current step returns, e.g. on shutdown."""
+
+        self._stopped.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until every step has succeeded and return whether that happened in time."""
+
+        return self._done.wait(timeout)
+
+    @property
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def status(self) -> WarmUpStatus:
+        with self._lock:
+            completed = list(self._completed)
+            error = self._error
+        pending = [name for name, _ in self._steps[len(completed) :]]
+        if self.ready:
+            state: WarmUpState = "ready"
+        elif error is not None:
+            state = "failed"
+        else:
+            state = "warming_up"
+        return WarmUpStatus(state, completed, pending, error)
+
+    def _run_step(self, name: str, step: Callable[[], object]) -> bool:
+        for attempt in range(self._retries + 1):
+            if self._stopped.is_set():
+                return False
+            try:
+                step()
+            except Exception as exc:
+                if attempt == self._retries:
+                    LOGGER.exception("Warm-up step failed", step=name)
+                    with self._lock:
+                        self._error = f"{name}: {exc}"
+                    return False
+                delay = self._backoff * 2**attempt
+                LOGGER.warning(
+                    "Warm-up step failed; retrying",
+                    step=name,
+                    attempt=attempt + 1,
+                    retry_in_s=delay,
+                    error=str(exc),
+                )
+                if self._stopped.wait(delay):
+                    return False
+            else:
+                return True
+        return False
+
+
+def build_warm_up(settings: DocumentSettings, collections: CollectionManager) -> WarmUp:
+    """Return the warm-up configured by ``settings.warm_up``; empty (ready) when disabled."""
+
+    if not settings.warm_up.enabled:
+        return WarmUp([])
+
+    steps: list[WarmUpStep] = [("models", collections.warm_up)]
+    for name in settings.warm_up.collections:
+        steps.append((f"collection:{name}", lambda name=name: _open_collection(collections, name)))
+    if settings.warm_up.pdf_pipeline:
+        steps.append(
+            ("pdf_pipeline", lambda: warm_up_pdf_pipeline(settings, collections.embed_model()))
+        )
+    return WarmUp(
+        steps,
+        retries=settings.warm_up.retries,
+        backoff_seconds=settings.warm_up.retry_backoff_seconds,
+    )
+
+
+def _open_collection(collections: CollectionManager, name: str) -> None:
+    # Leasing loads the collection from disk; it then stays loaded until evicted.
+    with collections.lease(name):
+        pass
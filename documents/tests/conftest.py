@@ -1,14 +1,56 @@
 """Pytest fixtures for the documents API service."""
 
 from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any
 
 import pytest
 from fastapi.testclient import TestClient
+from llama_index.core.embeddings import MockEmbedding
+from llama_index.embeddings import huggingface
 
 from documents.dependencies import get_document_index_service
-from documents.schemas import DocumentPayload, SearchResult
+from documents.schemas import DocumentPayload, SearchFilters, SearchResult
+from documents.services.cache import CacheStats
 from documents.services.indexing_service import DocumentIndexNotReadyError
-from documents.app import create_app
+from documents.services.snapshot import SnapshotError
+from documents.app import AppSettings, create_app
+from documents.services.settings import (
+    DocumentSettings,
+    LocalObjectStoreSettings,
+    ObjectStoreSettings,
+    WarmUpSettings,
+)
+
+
+class CountingEmbedding(MockEmbedding):
+    """Mock embedding model that records how it was loaded and what it embedded."""
+
+    loads: list[dict[str, Any]] = []
+    embedded_texts: int = 0
+    embedded_queries: int = 0
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        self.embedded_queries += 1
+        return super()._get_query_embedding(query)
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        self.embedded_texts += len(texts)
+        return super()._get_text_embeddings(texts)
+
+
+@pytest.fixture()
+def embed_model(monkeypatch) -> CountingEmbedding:
+    """Serve every ``HuggingFaceEmbedding`` load with one mock model, recording the arguments."""
+
+    model = CountingEmbedding(embed_dim=8)
+
+    def load(**kwargs: Any) -> CountingEmbedding:
+        model.loads.append(kwargs)
+        return model
+
+    monkeypatch.setattr(huggingface, "HuggingFaceEmbedding", load)
+    return model
 
 
 class FakeDocumentIndexService:
@@ -16,7 +58,11 @@ class FakeDocumentIndexService:
 
     def __init__(self) -> None:
         self.indexed_documents = []
+        self.replaced_document_id: str | None = None
+        self.deleted_document_ids: list[str] = []
         self.search_calls: list[tuple[str, int]] = []
+        self.search_filters: list[SearchFilters | None] = []
+        self.mmr_lambdas: list[float | None] = []
         self.results: list[SearchResult] = []
         self.raise_not_ready = False
 
@@ -24,12 +70,67 @@ class FakeDocumentIndexService:
         self.indexed_documents = list(documents)
         return len(self.indexed_documents)
 
-    def search(self, query: str, *, limit: int) -> list[SearchResult]:
+    def replace_document(self, document_id: str, documents: Iterable[DocumentPayload]) -> int:
+        self.replaced_document_id = document_id
+        return self.index_documents(documents)
+
+    def delete_document(self, document_id: str) -> int:
+        self.deleted_document_ids.append(document_id)
+        return 0 if document_id == "missing" else 2
+
+    def search(
+        self,
+        query: str,
+        *,
+        limit: int,
+        filters: SearchFilters | None = None,
+        mmr_lambda: float | None = None,
+        expand_window: int = 0,
+        timings: dict[str, float] | None = None,
+    ) -> list[SearchResult]:
         self.search_calls.append((query, limit))
+        self.search_filters.append(filters)
+        self.mmr_lambdas.append(mmr_lambda)
         if self.raise_not_ready:
             raise DocumentIndexNotReadyError("Document index has not been built yet.")
+        if timings is not None:
+            timings["vector_scan"] = 1.5
         return self.results
 
+    def search_many(
+        self,
+        queries: list[str],
+        *,
+        limit: int,
+        filters: SearchFilters | None = None,
+        mmr_lambda: float | None = None,
+        expand_window: int = 0,
+        timings: dict[str, float] | None = None,
+    ) -> list[list[SearchResult]]:
+        return [
+            self.search(
+                query,
+                limit=limit,
+                filters=filters,
+                mmr_lambda=mmr_lambda,
+                expand_window=expand_window,
+                timings=timings,
+            )
+            for query in queries
+        ]
+
+    def cache_stats(self) -> dict[str, CacheStats]:
+        return {"results": CacheStats(hits=3, misses=1, size=1, max_size=8)}
+
+    def export_snapshot(self, path: Path) -> int:
+        Path(path).write_bytes(b"snapshot")
+        return 3
+
+    def import_snapshot(self, path: Path) -> int:
+        if Path(path).read_bytes() != b"snapshot":
+            raise SnapshotError("Not a document index snapshot")
+        return 3
+
 
 @pytest.fixture()
 def fake_service() -> FakeDocumentIndexService:
@@ -37,8 +138,10 @@ def fake_service() -> FakeDocumentIndexService:
 
 
 @pytest.fixture()
-def client(fake_service: FakeDocumentIndexService) -> Iterator[TestClient]:
-    app = create_app()
+def client(fake_service: FakeDocumentIndexService, tmp_path: Path) -> Iterator[TestClient]:
+    store = ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path)))
+    documents = DocumentSettings(store=store, warm_up=WarmUpSettings(enabled=False))
+    app = create_app(AppSettings(documents=documents))
     app.dependency_overrides[get_document_index_service] = lambda: fake_service
 
     with TestClient(app) as test_client:
@@ -0,0 +1,63 @@
+"""Tests for the approximate nearest-neighbour backends."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from documents.services.ann import HnswIndex, IvfFlatIndex, build_ann_index, measure_recall
+from documents.services.settings import AnnSettings
+from documents.services.vector_store import PersistentVectorStore, StoredRecord
+
+
+@pytest.fixture()
+def store(tmp_path: Path) -> PersistentVectorStore:
+    rng = np.random.default_rng(7)
+    centers = rng.normal(size=(32, 16))
+    vectors = centers[rng.integers(0, 32, size=4000)] + 0.3 * rng.normal(size=(4000, 16))
+
+    store = PersistentVectorStore(tmp_path)
+    store.open()
+    store.append(
+        [StoredRecord(document_id=f"doc-{row}", content="", metadata={}) for row in range(4000)],
+        vectors,
+        np.zeros_like(vectors),
+    )
+    return store
+
+
+def test_exact_backend_builds_no_index(store: PersistentVectorStore) -> None:
+    assert build_ann_index(AnnSettings(backend="exact"), store) is None
+
+
+def test_ivf_falls_back_to_exact_until_trained(tmp_path: Path) -> None:
+    store = PersistentVectorStore(tmp_path)
+    store.open()
+    store.append([StoredRecord("a", "", {})], np.ones((1, 4)), np.zeros((1, 4)))
+    index = IvfFlatIndex(store, nlist=16, nprobe=2)
+
+    index.add(0, store.rows)
+
+    assert index.candidates(np.ones(4), limit=5) is None
+
+
+def test_ivf_candidates_reach_high_recall(store: PersistentVectorStore) -> None:
+    index = IvfFlatIndex(store, nlist=64, nprobe=8)
+    index.add(0, store.rows)
+
+    candidates = index.candidates(np.ones(16), limit=10)
+
+    assert index.trained
+    assert candidates is not None and candidates["content"].size < store.rows
+    assert candidates["summary"].size == 0
+    assert measure_recall(store, index, sample_size=50, limit=10) >= 0.9
+
+
+def test_hnsw_candidates_reach_high_recall(store: PersistentVectorStore) -> None:
+    pytest.importorskip("hnswlib")
+    index = HnswIndex(store, m=16, ef_construction=100, ef_search=32, candidate_factor=4)
+    index.add(0, store.rows)
+
+    assert measure_recall(store, index, sample_size=50, limit=10) >= 0.9
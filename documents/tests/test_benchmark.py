@@ -0,0 +1,104 @@
+"""Tests for the synthetic-corpus benchmark harness."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from documents.benchmark import BenchmarkConfig, SyntheticCorpus, main, run_benchmark
+from documents.services.settings import AnnSettings, DocumentSettings
+
+if TYPE_CHECKING:
+    from .conftest import CountingEmbedding
+
+_SMALL = BenchmarkConfig(
+    rows=300,
+    dim=16,
+    vocabulary_size=500,
+    build_batch_size=128,
+    inserts=30,
+    insert_batch_size=10,
+    queries=12,
+    query_batch_size=5,
+    limit=5,
+)
+
+
+def test_corpus_batches_are_deterministic() -> None:
+    corpus = SyntheticCorpus(_SMALL)
+
+    first, again = corpus.payloads(10, 4), corpus.payloads(10, 4)
+    assert [payload.document_id for payload in first] == [f"chunk-{row}" for row in range(10, 14)]
+    assert [payload.content for payload in first] == [payload.content for payload in again]
+    assert np.allclose(np.linalg.norm(first[0].metadata["embedding"]), 1.0)
+    assert set(corpus.queries(5)).isdisjoint(corpus.queries(5, offset=5))
+
+
+def test_run_benchmark_reports_throughput_latency_and_recall(tmp_path: Path) -> None:
+    settings = DocumentSettings(ann=AnnSettings(backend="ivf", nlist=8, nprobe=8))
+
+    report = run_benchmark(_SMALL, settings, tmp_path)
+
+    assert report["indexed_rows"] == 330
+    assert report["build"]["rows"] == 300
+    assert (
+        report["insert"]["batch_latency_ms"]["p99"] >= report["insert"]["batch_latency_ms"]["p50"]
+    )
+    assert report["search"]["queries"] == report["batch_search"]["queries"] == 12
+    assert set(report["search"]["latency_ms"]) == {"p50", "p95", "p99", "mean", "max"}
+    assert report["recall"] == {"limit": 5, "value": 1.0}
+    assert report["peak_rss_mb"] > 0
+
+
+def test_main_writes_a_json_report(tmp_path: Path) -> None:
+    output = tmp_path / "report.json"
+
+    main(
+        [
+            "--rows",
+            "50",
+            "--dim",
+            "8",
+            "--inserts",
+            "0",
+            "--queries",
+            "3",
+            "--embeddings",
+            "fixed",
+            "--directory",
+            str(tmp_path / "index"),
+            "--output",
+            str(output),
+        ]
+    )
+
+    report = json.loads(output.read_text())
+    assert report["config"]["embeddings"] == "fixed"
+    assert report["insert"]["batch_latency_ms"] is None
+    assert report["recall"]["value"] is None
+
+
+def test_embedding_parity_fails_below_the_cosine_threshold(
+    embed_model: CountingEmbedding, tmp_path: Path
+) -> None:
+    texts = tmp_path / "texts.txt"
+    texts.write_text("seatbelt inspection\n\ntyre pressure\n", encoding="utf-8")
+    config = tmp_path / "config.yaml"
+    config.write_text("documents:\n  embed:\n    backend: onnx\n", encoding="utf-8")
+    output = tmp_path / "parity.json"
+    arguments = ["--config", str(config), "--embedding-parity", str(texts), "--output", str(output)]
+
+    main(arguments)
+    report = json.loads(output.read_text())
+    assert [load.get("backend", "torch") for load in embed_model.loads] == ["torch", "onnx"]
+    assert report["settings"]["backend"] == "onnx"
+    assert report["candidate"]["texts"] == 2
+    assert report["cosine"]["min"] == pytest.approx(1.0)
+
+    with pytest.raises(SystemExit) as excinfo:
+        main([*arguments, "--min-cosine", "1.5"])
+    assert excinfo.value.code == 1
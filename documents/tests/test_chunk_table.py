@@ -0,0 +1,103 @@
+"""Tests for the columnar chunk table."""
+
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from documents.schemas import DocumentPayload
+from documents.services import chunk_table
+from documents.services.chunk_table import ChunkTable
+from documents.services.snapshot import SnapshotError, SnapshotReader, SnapshotWriter
+
+
+def _payload(document_id: str, content: str, **metadata: object) -> DocumentPayload:
+    return DocumentPayload(document_id=document_id, content=content, metadata=metadata)
+
+
+def test_add_replaces_rows_and_groups_children_by_parent() -> None:
+    table = ChunkTable()
+    table.add(_payload("a-0", "first", parent_document_id="a", page=1))
+    table.add(_payload("a-1", "second", parent_document_id="a"))
+    table.add(_payload("b", "standalone"))
+    table.add(_payload("a-0", "first v2", parent_document_id="a", page=2))
+
+    assert len(table) == 3
+    assert table.children("a") == {"a-0", "a-1"}
+    assert table.children("b") == {"b"}
+    assert table.payload("a-0") == _payload("a-0", "first v2", parent_document_id="a", page=2)
+    assert table.payload("missing") is None
+
+
+def test_remove_drops_rows_and_empty_parents() -> None:
+    table = ChunkTable()
+    table.add(_payload("a-0", "first", parent_document_id="a"))
+
+    assert table.remove("a-0")
+    assert not table.remove("a-0")
+    assert "a-0" not in table
+    assert table.children("a") == set()
+
+
+def test_matches_compares_content_and_metadata() -> None:
+    table = ChunkTable()
+    table.add(_payload("a", "text", chunk_summary="summary"))
+
+    assert table.matches(_payload("a", "text", chunk_summary="summary"))
+    assert not table.matches(_payload("a", "text", chunk_summary="other"))
+    assert not table.matches(_payload("a", "other", chunk_summary="summary"))
+    assert not table.matches(_payload("b", "text", chunk_summary="summary"))
+
+
+def test_removed_rows_are_reclaimed(monkeypatch) -> None:
+    monkeypatch.setattr(chunk_table, "_MIN_RECLAIM_ROWS", 2)
+    table = ChunkTable()
+    for index in range(4):
+        table.add(_payload(f"doc-{index}", f"text {index} é", index=index))
+    full_size = table.nbytes
+
+    for index in range(3):
+        table.remove(f"doc-{index}")
+
+    assert table.nbytes < full_size
+    assert table.content("doc-3") == "text 3 é"
+    assert table.metadata("doc-3") == {"index": 3}
+
+
+def test_neighbours_follow_chunk_index_within_a_parent() -> None:
+    table = ChunkTable()
+    for index in (0, 1, 2, 4):
+        table.add(_payload(f"a-{index}", "text", parent_document_id="a", chunk_index=index))
+    table.add(_payload("b-0", "text", parent_document_id="b", chunk_index=0))
+    table.add(_payload("loose", "text"))
+
+    assert table.neighbours("a-1", 1) == ["a-0", "a-1", "a-2"]
+    assert table.neighbours("a-2", 2) == ["a-0", "a-1", "a-2", "a-4"]
+    assert table.neighbours("loose", 2) == ["loose"]
+    assert table.neighbours("missing", 2) == []
+
+    table.remove("a-4")
+    table.add(_payload("a-1", "moved", parent_document_id="a", chunk_index=3))
+    assert table.neighbours("a-2", 1) == ["a-2", "a-1"]
+
+
+def test_snapshot_round_trips_and_rejects_out_of_range_chunk_indexes() -> None:
+    table = ChunkTable()
+    table.add(_payload("a-0", "first", parent_document_id="a", chunk_index=0))
+    table.add(_payload("a-1", "second", parent_document_id="a", chunk_index=1))
+
+    def snapshot() -> SnapshotReader:
+        buffer = io.BytesIO()
+        writer = SnapshotWriter(buffer)
+        table.write_snapshot(writer, list(table))
+        writer.close()
+        return SnapshotReader(io.BytesIO(buffer.getvalue()))
+
+    restored = ChunkTable.read_snapshot(snapshot())
+    assert restored.payload("a-1") == table.payload("a-1")
+    assert restored.neighbours("a-0", 1) == ["a-0", "a-1"]
+
+    table._chunk_indexes[1] = 2**40
+    with pytest.raises(SnapshotError, match="Inconsistent chunk table"):
+        ChunkTable.read_snapshot(snapshot())
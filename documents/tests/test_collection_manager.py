@@ -0,0 +1,100 @@
+"""Tests for named index collections and their memory-budgeted unloading."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from documents.schemas import DocumentPayload
+from documents.services.collection_manager import CollectionManager
+from documents.services.indexing_service import DocumentIndexService
+from documents.services.settings import (
+    CollectionSettings,
+    DocumentSettings,
+    LocalObjectStoreSettings,
+    ObjectStoreSettings,
+)
+
+pytestmark = pytest.mark.usefixtures("embed_model")
+
+
+def _settings(tmp_path: Path, *, memory_budget_mb: int = 0) -> DocumentSettings:
+    return DocumentSettings(
+        store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path))),
+        collections=CollectionSettings(memory_budget_mb=memory_budget_mb),
+    )
+
+
+def _index(manager: CollectionManager, name: str, document_id: str) -> None:
+    with manager.lease(name) as service:
+        service.index_documents([DocumentPayload(document_id=document_id, content=document_id)])
+
+
+def test_collections_are_isolated_and_created_on_demand(tmp_path: Path) -> None:
+    manager = CollectionManager(_settings(tmp_path))
+    _index(manager, "default", "shared-doc")
+    _index(manager, "tenant-a", "tenant-doc")
+
+    with manager.lease("tenant-a") as service:
+        assert [result.document_id for result in service.search("doc", limit=5)] == ["tenant-doc"]
+    assert (tmp_path / "index" / "manifest.json").exists()
+    assert (tmp_path / "collections" / "tenant-a" / "manifest.json").exists()
+
+
+def test_idle_collections_are_unloaded_over_budget_and_reloaded(tmp_path: Path) -> None:
+    manager = CollectionManager(_settings(tmp_path, memory_budget_mb=1))
+    manager._budget_bytes = 1
+
+    _index(manager, "tenant-a", "a-doc")
+    assert manager.loaded() == []
+
+    with manager.lease("tenant-a") as first, manager.lease("tenant-b"):
+        assert manager.loaded() == ["tenant-a", "tenant-b"]
+        assert first.indexed_count == 1
+    assert manager.loaded() == []
+
+
+def test_loading_a_collection_does_not_block_the_others(tmp_path: Path) -> None:
+    manager = CollectionManager(_settings(tmp_path))
+    _index(manager, "warm", "warm-doc")
+    open_collection = manager._open
+    release = threading.Event()
+    opened: list[str] = []
+
+    def slow_open(name: str) -> DocumentIndexService:
+        opened.append(name)
+        release.wait(timeout=5)
+        return open_collection(name)
+
+    def warm_count() -> int:
+        with manager.lease("warm") as service:
+            return service.indexed_count
+
+    manager._open = slow_open  # type: ignore[method-assign]
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        cold = [pool.submit(_index, manager, "cold", f"cold-{n}") for n in range(2)]
+        try:
+            while not opened:
+                time.sleep(0.001)
+            assert pool.submit(warm_count).result(timeout=2) == 1
+            assert manager.loaded() == ["warm"]
+        finally:
+            release.set()
+        for future in cold:
+            future.result(timeout=5)
+
+    assert opened == ["cold"]
+    with manager.lease("cold") as service:
+        assert service.indexed_count == 2
+
+
+def test_collection_names_are_validated(tmp_path: Path) -> None:
+    manager = CollectionManager(_settings(tmp_path))
+
+    with pytest.raises(ValueError, match="Invalid collection name"):
+        with manager.lease("../escape"):
+            pass
@@ -0,0 +1,95 @@
+"""Tests for the persistent text-embedding cache."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from documents.services.embedding_cache import EmbeddingCache, open_embedding_cache
+from documents.services.settings import (
+    DocumentSettings,
+    EmbedSettings,
+    LocalObjectStoreSettings,
+    ObjectStoreSettings,
+)
+
+
+class RecordingEmbedder:
+    """Embed texts deterministically and remember every batch it was asked for."""
+
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def __call__(self, texts: list[str]) -> list[list[float]]:
+        self.batches.append(list(texts))
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+
+def _cache(path: Path, *, model_name: str = "model-a", max_entries: int = 100) -> EmbeddingCache:
+    return EmbeddingCache(path / "cache.sqlite3", model_name=model_name, max_entries=max_entries)
+
+
+def test_embed_only_computes_distinct_misses(tmp_path: Path) -> None:
+    cache = _cache(tmp_path)
+    embedder = RecordingEmbedder()
+
+    first = cache.embed(["alpha", "beta", "alpha"], embedder)
+    second = cache.embed(["beta", "gamma"], embedder)
+
+    assert embedder.batches == [["alpha", "beta"], ["gamma"]]
+    np.testing.assert_array_equal(first[0], first[2])
+    np.testing.assert_array_equal(first[1], second[0])
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 4, 3)
+
+
+def test_entries_survive_reopen(tmp_path: Path) -> None:
+    embedder = RecordingEmbedder()
+    cache = _cache(tmp_path)
+    expected = cache.embed(["alpha", "beta"], embedder)
+    cache.close()
+
+    reopened = _cache(tmp_path)
+    restored = reopened.embed(["alpha", "beta"], embedder)
+
+    assert len(embedder.batches) == 1
+    np.testing.assert_array_equal(restored, expected)
+    assert reopened.stats().size == 2
+
+
+def test_models_do_not_share_entries(tmp_path: Path) -> None:
+    embedder = RecordingEmbedder()
+    _cache(tmp_path, model_name="model-a").embed(["alpha"], embedder)
+    _cache(tmp_path, model_name="model-b").embed(["alpha"], embedder)
+
+    assert embedder.batches == [["alpha"], ["alpha"]]
+
+
+def test_backends_do_not_share_entries(tmp_path: Path) -> None:
+    store = ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path)))
+    embedder = RecordingEmbedder()
+    for embed in (
+        EmbedSettings(),
+        EmbedSettings(backend="onnx", quantization="int8"),
+        EmbedSettings(backend="onnx", quantization="int8", onnx_quantization_config="arm64"),
+    ):
+        cache = open_embedding_cache(DocumentSettings(store=store, embed=embed))
+        assert cache is not None
+        cache.embed(["alpha"], embedder)
+
+    assert embedder.batches == [["alpha"], ["alpha"], ["alpha"]]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path) -> None:
+    cache = _cache(tmp_path, max_entries=3)
+    embedder = RecordingEmbedder()
+    cache.embed(["a", "b", "c"], embedder)
+    cache.embed(["a"], embedder)
+
+    cache.embed(["d"], embedder)
+    embedder.batches.clear()
+    cache.embed(["a", "d", "b"], embedder)
+
+    assert cache.stats().size <= 3
+    assert embedder.batches == [["b"]]
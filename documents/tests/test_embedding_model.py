@@ -0,0 +1,82 @@
+"""Tests for loading the embedding model on its inference backend."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from llama_index.core.embeddings import MockEmbedding
+
+from documents.services.embedding_model import load_embed_model, measure_embedding_parity
+from documents.services.settings import EmbedSettings
+
+if TYPE_CHECKING:
+    from .conftest import CountingEmbedding
+
+
+class ShiftedEmbedding(MockEmbedding):
+    """Mock vectors with one component changed, as a lossy backend would."""
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        vector = super()._get_text_embedding(text)
+        vector[0] += 1.0
+        return vector
+
+
+def test_torch_backend_loads_the_published_model(
+    tmp_path: Path, embed_model: CountingEmbedding
+) -> None:
+    load_embed_model(EmbedSettings(), tmp_path)
+
+    assert embed_model.loads == [{"model_name": "BAAI/bge-small-en-v1.5"}]
+
+
+def test_int8_onnx_backend_reuses_the_quantized_export(
+    tmp_path: Path, embed_model: CountingEmbedding
+) -> None:
+    export = tmp_path / "BAAI--bge-small-en-v1.5-onnx-qint8-avx512_vnni"
+    export.mkdir()
+    settings = EmbedSettings(
+        backend="onnx", quantization="int8", onnx_quantization_config="avx512_vnni"
+    )
+
+    load_embed_model(settings, tmp_path)
+
+    [kwargs] = embed_model.loads
+    assert kwargs["model_name"] == str(export)
+    assert kwargs["backend"] == "onnx"
+    assert kwargs["model_kwargs"] == {
+        "provider": "CPUExecutionProvider",
+        "file_name": "onnx/model_qint8_avx512_vnni.onnx",
+    }
+    # The local copy keeps the query instruction of the model it was exported from.
+    assert kwargs["query_instruction"].startswith("Represent this question")
+
+
+@pytest.mark.parametrize(
+    ("settings", "message"),
+    [
+        (EmbedSettings(backend="tensorrt"), "Unsupported embedding backend"),
+        (EmbedSettings(quantization="int4"), "Unsupported embedding quantization"),
+        (EmbedSettings(quantization="int8"), "requires the onnx backend"),
+    ],
+)
+def test_invalid_backend_settings_are_rejected(
+    tmp_path: Path, settings: EmbedSettings, message: str
+) -> None:
+    with pytest.raises(ValueError, match=message):
+        load_embed_model(settings, tmp_path)
+
+
+def test_parity_compares_vectors_row_by_row() -> None:
+    texts = ["seatbelt inspection", "tyre pressure", "brake fluid"]
+
+    same = measure_embedding_parity(MockEmbedding(embed_dim=8), MockEmbedding(embed_dim=8), texts)
+    shifted = measure_embedding_parity(
+        ShiftedEmbedding(embed_dim=8), MockEmbedding(embed_dim=8), texts
+    )
+
+    assert same.texts == 3
+    assert same.min_cosine == pytest.approx(1.0)
+    assert shifted.mean_cosine < 1.0
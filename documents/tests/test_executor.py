@@ -0,0 +1,71 @@
+"""Tests for the CPU executor."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+
+from documents.services.executor import CpuExecutor
+
+
+def test_executor_runs_calls_in_parallel_and_tracks_queue_depth() -> None:
+    executor = CpuExecutor(max_workers=2)
+    release = threading.Event()
+
+    def blocking(value: int) -> int:
+        release.wait(timeout=5)
+        return value
+
+    async def scenario() -> list[int]:
+        tasks = [asyncio.create_task(executor.run(blocking, value)) for value in range(3)]
+        while executor.stats().active < 2:
+            await asyncio.sleep(0.001)
+        assert executor.stats().queued == 1
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    try:
+        assert asyncio.run(scenario()) == [0, 1, 2]
+        assert executor.stats().active == executor.stats().queued == 0
+    finally:
+        executor.shutdown()
+
+
+def test_cancelled_queued_call_leaves_the_queue() -> None:
+    executor = CpuExecutor(max_workers=1)
+    release = threading.Event()
+
+    async def scenario() -> None:
+        running = asyncio.create_task(executor.run(release.wait, 5))
+        queued = asyncio.create_task(executor.run(time.sleep, 0))
+        while executor.stats().queued < 1 or executor.stats().active < 1:
+            await asyncio.sleep(0.001)
+        queued.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await queued
+        await asyncio.sleep(0.01)
+        release.set()
+        await running
+
+    try:
+        asyncio.run(scenario())
+        assert executor.stats().active == executor.stats().queued == 0
+    finally:
+        executor.shutdown()
+
+
+def test_executor_runs_calls_in_the_callers_context() -> None:
+    executor = CpuExecutor(max_workers=1)
+    request_id: contextvars.ContextVar[str] = contextvars.ContextVar("request_id")
+
+    async def scenario() -> str:
+        request_id.set("request-1")
+        return await executor.run(request_id.get)
+
+    try:
+        assert asyncio.run(scenario()) == "request-1"
+    finally:
+        executor.shutdown()
@@ -0,0 +1,77 @@
+"""Tests for the BM25 index and rank fusion helpers."""
+
+from __future__ import annotations
+
+import pytest
+
+from documents.services.bm25 import BM25Index, tokenize
+from documents.services.fusion import reciprocal_rank_fusion, weighted_score_fusion
+
+
+def test_tokenize_lowercases_words() -> None:
+    assert tokenize("Seat-belt INSPECTION, step 2") == ["seat", "belt", "inspection", "step", "2"]
+
+
+def test_bm25_ranks_matching_documents_first() -> None:
+    index = BM25Index()
+    index.add("a", "seatbelt inspection checklist")
+    index.add("b", "tyre pressure checklist")
+    index.add("c", "engine oil")
+
+    results = index.search("seatbelt checklist", limit=5)
+
+    assert [doc_id for doc_id, _ in results] == ["a", "b"]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_bm25_search_only_scores_allowed_documents() -> None:
+    index = BM25Index()
+    index.add("a", "seatbelt inspection checklist")
+    index.add("b", "seatbelt checklist")
+
+    results = index.search("seatbelt checklist", limit=5, allowed={"b"})
+
+    assert [doc_id for doc_id, _ in results] == ["b"]
+
+
+def test_bm25_replace_and_remove_update_postings() -> None:
+    index = BM25Index()
+    index.add("a", "seatbelt inspection")
+    index.add("a", "tyre pressure")
+
+    assert index.search("seatbelt", limit=5) == []
+    assert [doc_id for doc_id, _ in index.search("tyre", limit=5)] == ["a"]
+
+    index.remove("a")
+
+    assert len(index) == 0
+    assert index.search("tyre", limit=5) == []
+
+
+def test_reciprocal_rank_fusion_combines_rankings() -> None:
+    fused = reciprocal_rank_fusion(
+        {
+            "content": [("a", 0.9), ("b", 0.8)],
+            "bm25": [("b", 12.0), ("c", 3.0)],
+        },
+        k=60,
+    )
+
+    assert [hit.doc_id for hit in fused] == ["b", "a", "c"]
+    assert fused[0].score == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[0].sub_scores == {"content": 0.8, "bm25": 12.0}
+    assert fused[0].best_retriever == "bm25"
+
+
+def test_weighted_score_fusion_normalizes_each_retriever() -> None:
+    fused = weighted_score_fusion(
+        {
+            "content": [("a", 0.9), ("b", 0.5)],
+            "bm25": [("b", 40.0), ("a", 20.0)],
+        },
+        weights={"content": 1.0, "bm25": 2.0},
+    )
+
+    assert [hit.doc_id for hit in fused] == ["b", "a"]
+    assert fused[0].score == pytest.approx(2.0)
+    assert fused[1].score == pytest.approx(1.0)
@@ -0,0 +1,420 @@
+"""Unit tests for the document index service."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+
+from documents.schemas import DocumentPayload, SearchFilters
+from documents.services import rerank
+from documents.services.indexing_service import DocumentIndexNotReadyError, DocumentIndexService
+from documents.services.settings import (
+    AnnSettings,
+    CompactionSettings,
+    DocumentSettings,
+    LocalObjectStoreSettings,
+    ObjectStoreSettings,
+    RerankSettings,
+)
+
+if TYPE_CHECKING:
+    from .conftest import CountingEmbedding
+
+
+@pytest.fixture()
+def settings(tmp_path: Path) -> DocumentSettings:
+    return DocumentSettings(
+        store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path)))
+    )
+
+
+@pytest.fixture()
+def service(embed_model: CountingEmbedding, settings: DocumentSettings) -> DocumentIndexService:
+    return DocumentIndexService(settings)
+
+
+def _payload(
+    document_id: str, content: str, summary: str = "", parent: str | None = None
+) -> DocumentPayload:
+    metadata: dict[str, str] = {"chunk_summary": summary} if summary else {}
+    if parent is not None:
+        metadata["parent_document_id"] = parent
+    return DocumentPayload(document_id=document_id, content=content, metadata=metadata)
+
+
+def test_search_before_indexing_raises_not_ready(service: DocumentIndexService) -> None:
+    with pytest.raises(DocumentIndexNotReadyError):
+        service.search("alpha", limit=5)
+    assert service.check_ann_recall() is None
+
+
+def test_index_documents_upserts_by_document_id(service: DocumentIndexService) -> None:
+    assert (
+        service.index_documents([_payload("doc-1", "alpha", "a"), _payload("doc-2", "beta")]) == 2
+    )
+
+    indexed_count = service.index_documents(
+        [_payload("doc-1", "alpha v2"), _payload("doc-3", "gamma")]
+    )
+
+    assert indexed_count == 3
+    results = service.search("alpha", limit=5)
+    assert {result.document_id for result in results} == {"doc-1", "doc-2", "doc-3"}
+    assert next(r for r in results if r.document_id == "doc-1").content == "alpha v2"
+    assert all("summary" not in result.scores for result in results)
+
+
+def test_index_documents_embeds_empty_content(service: DocumentIndexService) -> None:
+    # An image-only PDF chunk has no text but a summary; it must not fail the batch.
+    indexed_count = service.index_documents(
+        [_payload("doc-1", "alpha"), _payload("doc-2", "", "figure of a seatbelt")]
+    )
+
+    assert indexed_count == 2
+    assert "doc-2" in {result.document_id for result in service.search("seatbelt", limit=5)}
+
+
+def test_index_documents_embeds_only_changed_payloads(
+    service: DocumentIndexService, embed_model: CountingEmbedding
+) -> None:
+    service.index_documents([_payload("doc-1", "alpha", "a")])
+    embed_model.embedded_texts = 0
+
+    service.index_documents([_payload("doc-1", "alpha", "a"), _payload("doc-2", "beta")])
+
+    assert embed_model.embedded_texts == 1
+
+
+def test_index_documents_reuses_precomputed_embeddings(
+    service: DocumentIndexService, embed_model: CountingEmbedding
+) -> None:
+    payload = DocumentPayload(
+        document_id="doc-1", content="alpha", metadata={"embedding": [0.1] * 8}
+    )
+
+    service.index_documents([payload])
+
+    assert embed_model.embedded_texts == 0
+    assert "embedding" not in service.search("alpha", limit=1)[0].metadata
+
+
+def test_search_fuses_vector_and_bm25_rankings(service: DocumentIndexService) -> None:
+    service.index_documents(
+        [
+            _payload("doc-1", "alpha", "seatbelt inspection steps"),
+            _payload("doc-2", "beta", "tyre pressure"),
+        ]
+    )
+
+    results = service.search("seatbelt", limit=5)
+
+    assert results[0].document_id == "doc-1"
+    assert set(results[0].scores) == {"content", "summary", "bm25"}
+    assert "bm25" not in results[1].scores
+
+
+def test_index_survives_restart_without_reembedding(
+    service: DocumentIndexService, embed_model: CountingEmbedding, settings: DocumentSettings
+) -> None:
+    service.index_documents([_payload("doc-1", "alpha", "seatbelt"), _payload("doc-2", "beta")])
+    service.index_documents([_payload("doc-2", "beta v2")])
+    embed_model.embedded_texts = 0
+
+    restarted = DocumentIndexService(settings)
+
+    assert embed_model.embedded_texts == 0
+    assert restarted.indexed_count == 2
+    results = restarted.search("seatbelt", limit=5)
+    assert results[0].document_id == "doc-1"
+    assert {result.content for result in results} == {"alpha", "beta v2"}
+
+
+def test_check_ann_recall_reports_ivf_recall(
+    embed_model: CountingEmbedding, tmp_path: Path
+) -> None:
+    settings = DocumentSettings(
+        store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path))),
+        ann=AnnSettings(backend="ivf", nlist=2, nprobe=2, recall_sample_size=5),
+    )
+    service = DocumentIndexService(settings)
+    service.index_documents([_payload(f"doc-{index}", f"text {index}") for index in range(10)])
+
+    assert service.check_ann_recall(limit=3) == 1.0
+    assert service.search("text", limit=3)
+
+
+def test_search_caches_embeddings_and_results_per_generation(
+    service: DocumentIndexService, embed_model: CountingEmbedding
+) -> None:
+    service.index_documents([_payload("doc-1", "alpha", "seatbelt")])
+
+    first = service.search("seatbelt  check", limit=3)
+    assert service.search(" seatbelt check ", limit=3) == first
+    service.index_documents([_payload("doc-2", "beta")])
+    service.search("seatbelt check", limit=3)
+
+    assert embed_model.embedded_queries == 1
+    stats = service.cache_stats()
+    assert (stats["results"].hits, stats["results"].misses) == (1, 2)
+    assert (stats["query_embeddings"].hits, stats["query_embeddings"].misses) == (1, 1)
+
+
+def test_search_reports_stage_timings(service: DocumentIndexService) -> None:
+    service.index_documents([_payload("doc-1", "alpha", "seatbelt")])
+
+    timings: dict[str, float] = {}
+    service.search("seatbelt", limit=3, timings=timings)
+    assert set(timings) == {
+        "result_cache",
+        "query_embedding",
+        "filter",
+        "vector_scan",
+        "bm25",
+        "fusion",
+        "materialize",
+        "rerank",
+        "select",
+        "expand",
+    }
+    assert all(value >= 0 for value in timings.values())
+
+    cached: dict[str, float] = {}
+    service.search("seatbelt", limit=3, timings=cached)
+    assert set(cached) == {"result_cache", "expand"}
+
+
+def test_search_many_matches_individual_searches(
+    service: DocumentIndexService, embed_model: CountingEmbedding
+) -> None:
+    service.index_documents(
+        [_payload("doc-1", "alpha", "seatbelt"), _payload("doc-2", "beta", "tyre pressure")]
+    )
+    expected = [service.search(query, limit=2) for query in ("seatbelt", "tyre")]
+    service._result_cache.clear()
+    service._embedding_cache.clear()
+    embed_model.embedded_queries = 0
+
+    assert service.search_many(["seatbelt", "tyre", "seatbelt"], limit=2) == [
+        expected[0],
+        expected[1],
+        expected[0],
+    ]
+    assert embed_model.embedded_queries == 2
+
+
+def test_replace_and_delete_by_parent_document_id(
+    service: DocumentIndexService, settings: DocumentSettings
+) -> None:
+    service.index_documents(
+        [
+            _payload("pdf::chunk-0000", "alpha", "seatbelt", parent="pdf"),
+            _payload("pdf::chunk-0001", "beta", "seatbelt", parent="pdf"),
+            _payload("other", "gamma"),
+        ]
+    )
+
+    assert service.replace_document("pdf", [_payload("pdf::chunk-0000", "alpha v2")]) == 2
+    results = service.search("seatbelt", limit=5)
+    assert {result.document_id for result in results} == {"pdf::chunk-0000", "other"}
+    assert all(result.scores.get("bm25") is None for result in results)
+
+    assert service.delete_document("pdf") == 1
+    assert service.delete_document("pdf") == 0
+    assert [result.document_id for result in service.search("alpha", limit=5)] == ["other"]
+    assert DocumentIndexService(settings).indexed_count == 1
+
+
+def _pdf_chunk(parent: str, index: int, page: int, filename: str) -> DocumentPayload:
+    return DocumentPayload(
+        document_id=f"{parent}::chunk-{index:04d}",
+        content=f"seatbelt inspection step {index}",
+        metadata={
+            "parent_document_id": parent,
+            "original_filename": filename,
+            "page_numbers": [page],
+        },
+    )
+
+
+def test_search_filters_restrict_candidates_before_ranking(
+    service: DocumentIndexService, settings: DocumentSettings
+) -> None:
+    service.index_documents(
+        [_pdf_chunk("manual", index, page=index + 1, filename="manual.pdf") for index in range(6)]
+        + [_pdf_chunk("memo", index, page=1, filename="memo.pdf") for index in range(6)]
+    )
+
+    def ids(**filters: object) -> set[str]:
+        results = service.search("seatbelt", limit=3, filters=SearchFilters(**filters))
+        return {result.document_id for result in results}
+
+    assert ids(parent_document_id="memo") == {f"memo::chunk-000{index}" for index in range(3)}
+    assert ids(original_filename="manual.pdf", page_from=2, page_to=3) == {
+        "manual::chunk-0001",
+        "manual::chunk-0002",
+    }
+    assert ids(page_from=6) == {"manual::chunk-0005"}
+    assert ids(parent_document_id="unknown") == set()
+
+    service.delete_document("manual")
+    service.compact()
+    assert ids(original_filename="manual.pdf") == set()
+    reopened = DocumentIndexService(settings)
+    [memo_results] = reopened.search_many(
+        ["seatbelt"], limit=5, filters=SearchFilters(original_filename="memo.pdf")
+    )
+    assert len(memo_results) == 5
+
+
+def test_tombstones_trigger_background_compaction(
+    embed_model: CountingEmbedding, tmp_path: Path
+) -> None:
+    settings = DocumentSettings(
+        store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path))),
+        compaction=CompactionSettings(tombstone_ratio=0.5, min_rows=0),
+    )
+    service = DocumentIndexService(settings)
+    service.index_documents([_payload(f"doc-{index}", f"text {index}") for index in range(4)])
+
+    service.delete_document("doc-0")
+    assert service._compaction_thread is None
+    service.delete_document("doc-1")
+    service._compaction_thread.join(timeout=5)
+
+    assert (service._store.rows, service._store.retired_rows) == (2, 0)
+    assert {result.document_id for result in service.search("text", limit=5)} == {
+        "doc-2",
+        "doc-3",
+    }
+    assert DocumentIndexService(settings).indexed_count == 2
+
+
+def test_index_documents_reuses_summary_and_stored_embeddings(
+    service: DocumentIndexService, embed_model: CountingEmbedding
+) -> None:
+    payload = DocumentPayload(
+        document_id="doc-1",
+        content="alpha",
+        metadata={
+            "chunk_summary": "seatbelt",
+            "embedding": [0.1] * 8,
+            "summary_embedding": [0.2] * 8,
+        },
+    )
+    service.index_documents([payload])
+    assert embed_model.embedded_texts == 0
+    assert "summary_embedding" not in service.search("seatbelt", limit=1)[0].metadata
+
+    service.index_documents(
+        [_payload("doc-1", "alpha", "seatbelt", parent="pdf"), _payload("doc-2", "beta", "beta")]
+    )
+
+    assert embed_model.embedded_texts == 1
+    assert service.search("seatbelt", limit=1)[0].metadata["parent_document_id"] == "pdf"
+
+
+def test_deleted_text_is_reembedded_from_the_embedding_cache(
+    service: DocumentIndexService, embed_model: CountingEmbedding
+) -> None:
+    service.index_documents([_payload("a", "shared text")])
+    service.delete_document("a")
+    service.index_documents([_payload("b", "shared text")])
+
+    assert embed_model.embedded_texts == 1
+    assert service.cache_stats()["text_embeddings"].hits == 1
+
+
+def test_reranker_reorders_fused_candidates(
+    embed_model: CountingEmbedding, tmp_path: Path, monkeypatch
+) -> None:
+    # Longer chunks win, whatever their first-stage rank.
+    monkeypatch.setattr(
+        rerank, "load_cross_encoder", lambda model_name: lambda pairs: [len(t) for _, t in pairs]
+    )
+    settings = DocumentSettings(
+        store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path))),
+        rerank=RerankSettings(model_name="cross-encoder/test", candidates=5),
+    )
+    service = DocumentIndexService(settings)
+    service.index_documents(
+        [_payload("short", "seatbelt"), _payload("long", "seatbelt inspection checklist")]
+    )
+
+    results = service.search("seatbelt", limit=1)
+
+    assert [result.document_id for result in results] == ["long"]
+    assert results[0].scores["rerank"] == results[0].score == len("seatbelt inspection checklist")
+    assert "rerank_scores" in service.cache_stats()
+
+
+def test_rerank_candidates_beyond_the_search_limit_cap(
+    embed_model: CountingEmbedding, tmp_path: Path, monkeypatch
+) -> None:
+    scored: list[int] = []
+
+    def score(pairs: list[tuple[str, str]]) -> list[float]:
+        scored.append(len(pairs))
+        return [0.0] * len(pairs)
+
+    monkeypatch.setattr(rerank, "load_cross_encoder", lambda model_name: score)
+    settings = DocumentSettings(
+        store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path))),
+        rerank=RerankSettings(model_name="cross-encoder/test", candidates=30),
+    )
+    service = DocumentIndexService(settings)
+    service.index_documents([_payload(f"doc-{n}", f"seatbelt {n}") for n in range(40)])
+
+    service.search("seatbelt", limit=5)
+    service.search_many(["seatbelt check"], limit=5)
+
+    assert scored == [30, 30]
+
+
+def test_mmr_lambda_trades_duplicates_for_diversity(service: DocumentIndexService) -> None:
+    def chunk(document_id: str, embedding: list[float]) -> DocumentPayload:
+        return DocumentPayload(
+            document_id=document_id, content=document_id, metadata={"embedding": embedding}
+        )
+
+    near_query = [1.0] * 7 + [0.0]
+    service.index_documents(
+        [
+            chunk("dup-a", near_query),
+            chunk("dup-b", near_query),
+            chunk("other", [1.0] * 4 + [0.0] * 4),
+        ]
+    )
+
+    plain = service.search("query", limit=2)
+    diverse = service.search("query", limit=2, mmr_lambda=0.2)
+
+    assert {result.document_id for result in plain} == {"dup-a", "dup-b"}
+    assert diverse[0].document_id in {"dup-a", "dup-b"}
+    assert diverse[1].document_id == "other"
+
+
+def test_expand_window_stitches_neighbouring_chunks(service: DocumentIndexService) -> None:
+    service.index_documents(
+        [
+            DocumentPayload(
+                document_id=f"pdf::chunk-{index}",
+                content=text,
+                metadata={
+                    "parent_document_id": "pdf",
+                    "chunk_index": index,
+                    "chunk_summary": text,
+                },
+            )
+            for index, text in enumerate(["intro", "seatbelt", "outro", "appendix"])
+        ]
+    )
+
+    [hit] = service.search("seatbelt", limit=1, expand_window=1)
+    [cached_hit] = service.search("seatbelt", limit=1)
+
+    assert hit.document_id == "pdf::chunk-1"
+    assert hit.context == "intro\n\nseatbelt\n\noutro"
+    assert hit.context_document_ids == ["pdf::chunk-0", "pdf::chunk-1", "pdf::chunk-2"]
+    assert cached_hit.context is None
@@ -0,0 +1,40 @@
+"""Tests for the index read-write lock."""
+
+from __future__ import annotations
+
+import threading
+
+from documents.services.locks import ReadWriteLock
+
+
+def test_read_write_lock_allows_concurrent_readers_but_exclusive_writer() -> None:
+    lock = ReadWriteLock()
+    inside = threading.Barrier(3, timeout=5)
+    release = threading.Event()
+    written = threading.Event()
+
+    def reader() -> None:
+        with lock.read():
+            # Both readers must hold the lock at once to pass the barrier.
+            inside.wait()
+            release.wait(timeout=5)
+
+    def writer() -> None:
+        with lock.write():
+            written.set()
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for thread in readers:
+        thread.start()
+    inside.wait()
+
+    writing = threading.Thread(target=writer)
+    writing.start()
+    while not lock._waiting_writers:
+        writing.join(timeout=0.001)
+    assert not written.is_set()
+
+    release.set()
+    for thread in [*readers, writing]:
+        thread.join(timeout=5)
+    assert written.is_set()
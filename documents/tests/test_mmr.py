@@ -0,0 +1,23 @@
+"""Tests for maximal marginal relevance selection."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from documents.services.mmr import mmr_select
+
+
+def test_mmr_skips_near_duplicates() -> None:
+    embeddings = np.array([[1.0, 0.0], [0.999, 0.045], [0.6, 0.8]], dtype=np.float32)
+    relevance = np.array([0.9, 0.89, 0.5])
+
+    assert mmr_select(relevance, embeddings, limit=2, mmr_lambda=0.2) == [0, 2]
+    assert mmr_select(relevance, embeddings, limit=2, mmr_lambda=0.9) == [0, 1]
+
+
+def test_mmr_with_lambda_one_keeps_relevance_order() -> None:
+    embeddings = np.eye(3, dtype=np.float32)
+    relevance = np.array([0.2, 0.9, 0.5])
+
+    assert mmr_select(relevance, embeddings, limit=5, mmr_lambda=1.0) == [1, 2, 0]
+    assert mmr_select(relevance[:0], embeddings[:0], limit=5, mmr_lambda=0.5) == []
@@ -0,0 +1,78 @@
+"""Tests for the quantized first-pass index."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from documents.services.ann import measure_recall
+from documents.services.quantization import QuantizedIndex, build_quantized_index
+from documents.services.settings import QuantizationSettings
+from documents.services.vector_store import PersistentVectorStore, StoredRecord
+
+
+@pytest.fixture()
+def store(tmp_path: Path) -> PersistentVectorStore:
+    rng = np.random.default_rng(11)
+    centers = rng.normal(size=(64, 128))
+    vectors = centers[rng.integers(0, 64, size=3000)] + 0.5 * rng.normal(size=(3000, 128))
+
+    store = PersistentVectorStore(tmp_path)
+    store.open()
+    store.append(
+        [StoredRecord(document_id=f"doc-{row}", content="", metadata={}) for row in range(3000)],
+        vectors,
+        np.zeros_like(vectors),
+    )
+    return store
+
+
+def test_mode_none_builds_no_index(store: PersistentVectorStore) -> None:
+    assert build_quantized_index(QuantizationSettings(mode="none"), store) is None
+    with pytest.raises(ValueError):
+        build_quantized_index(QuantizationSettings(mode="pq"), store)
+
+
+def test_small_store_falls_back_to_exact(tmp_path: Path) -> None:
+    store = PersistentVectorStore(tmp_path)
+    store.open()
+    store.append([StoredRecord("a", "", {})], np.ones((1, 4)), np.zeros((1, 4)))
+    index = QuantizedIndex(store, mode="int8", rescore_factor=10)
+
+    index.add(0, store.rows)
+
+    assert index.candidates(np.ones(4), limit=5) is None
+
+
+@pytest.mark.parametrize(("mode", "compression"), [("int8", 4), ("binary", 32)])
+def test_quantized_candidates_rescore_to_high_recall(
+    store: PersistentVectorStore, mode: str, compression: int
+) -> None:
+    index = QuantizedIndex(store, mode=mode, rescore_factor=10)
+    index.add(0, store.rows)
+
+    candidates = index.candidates(np.ones(128), limit=10)
+
+    assert candidates is not None and candidates["content"].size == 100
+    assert candidates["summary"].size == 0
+    assert index.nbytes * compression <= 2 * store.vectors("content").nbytes
+    assert measure_recall(store, index, sample_size=50, limit=10) >= 0.9
+
+
+def test_int8_ranks_well_with_unequal_dimension_scales(tmp_path: Path) -> None:
+    rng = np.random.default_rng(5)
+    spreads = np.geomspace(0.01, 10.0, 64)
+    vectors = rng.normal(size=(2000, 64)) * spreads
+    store = PersistentVectorStore(tmp_path)
+    store.open()
+    store.append(
+        [StoredRecord(document_id=f"doc-{row}", content="", metadata={}) for row in range(2000)],
+        vectors,
+        np.zeros_like(vectors),
+    )
+    index = QuantizedIndex(store, mode="int8", rescore_factor=2)
+    index.add(0, store.rows)
+
+    assert measure_recall(store, index, sample_size=40, limit=10) >= 0.9
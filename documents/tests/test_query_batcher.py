@@ -0,0 +1,71 @@
+"""Tests for query embedding micro-batching."""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from documents.services.query_batcher import QueryEmbeddingBatcher
+
+
+class RecordingEmbedder:
+    def __init__(self) -> None:
+        self.batches: list[list[str]] = []
+
+    def __call__(self, queries: list[str]) -> list[list[float]]:
+        self.batches.append(queries)
+        return [[float(len(query)), 1.0] for query in queries]
+
+
+def test_concurrent_queries_share_one_forward_pass() -> None:
+    embedder = RecordingEmbedder()
+    batcher = QueryEmbeddingBatcher(embedder, max_batch_size=8, max_wait_ms=200)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        vectors = list(pool.map(batcher.embed, ["a", "bb", "ccc", "dddd"]))
+
+    assert [vector[0] for vector in vectors] == [1.0, 2.0, 3.0, 4.0]
+    assert [len(batch) for batch in embedder.batches] == [4]
+
+
+def test_batches_are_capped_at_max_batch_size() -> None:
+    embedder = RecordingEmbedder()
+    batcher = QueryEmbeddingBatcher(embedder, max_batch_size=2, max_wait_ms=200)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        list(pool.map(batcher.embed, ["a", "b", "c", "d", "e"]))
+
+    assert all(len(batch) <= 2 for batch in embedder.batches)
+    assert sum(len(batch) for batch in embedder.batches) == 5
+
+
+def test_batch_size_one_embeds_inline() -> None:
+    embedder = RecordingEmbedder()
+    batcher = QueryEmbeddingBatcher(embedder, max_batch_size=1, max_wait_ms=200)
+
+    np.testing.assert_array_equal(batcher.embed("abc"), [3.0, 1.0])
+    assert embedder.batches == [["abc"]]
+
+
+def test_embedding_errors_reach_every_caller() -> None:
+    def failing(queries: list[str]) -> list[list[float]]:
+        raise RuntimeError("model unavailable")
+
+    batcher = QueryEmbeddingBatcher(failing, max_batch_size=4, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        batcher.embed("query")
+
+
+def test_close_stops_the_worker() -> None:
+    batcher = QueryEmbeddingBatcher(RecordingEmbedder(), max_batch_size=4, max_wait_ms=1)
+    batcher.embed("abc")
+    worker = batcher._worker
+
+    batcher.close()
+    worker.join(timeout=5)
+
+    assert not worker.is_alive()
+    np.testing.assert_array_equal(batcher.embed("ab"), [2.0, 1.0])
@@ -0,0 +1,59 @@
+"""Tests for cross-encoder reranking."""
+
+from __future__ import annotations
+
+import threading
+
+from documents.services.rerank import CrossEncoderReranker
+
+
+class RecordingScorer:
+    """Score pairs by text length and remember every call it received."""
+
+    def __init__(self, release: threading.Event | None = None) -> None:
+        self.calls: list[list[tuple[str, str]]] = []
+        self._release = release
+
+    def __call__(self, pairs: list[tuple[str, str]]) -> list[float]:
+        if self._release is not None:
+            self._release.wait(timeout=5)
+        self.calls.append(list(pairs))
+        return [float(len(text)) for _, text in pairs]
+
+
+def test_pairs_of_a_batch_are_scored_in_one_call_and_cached() -> None:
+    scorer = RecordingScorer()
+    reranker = CrossEncoderReranker(scorer, timeout_ms=5000, cache_size=16)
+
+    assert reranker.score_many([("q1", ["a", "bbb"]), ("q2", ["a"])]) == [[1.0, 3.0], [1.0]]
+    assert reranker.score("q1", ["bbb", "a"]) == [3.0, 1.0]
+
+    assert scorer.calls == [[("q1", "a"), ("q1", "bbb"), ("q2", "a")]]
+    assert reranker.stats().hits == 2
+
+
+def test_exceeding_the_budget_falls_back_and_caches_late_scores() -> None:
+    release = threading.Event()
+    scorer = RecordingScorer(release)
+    reranker = CrossEncoderReranker(scorer, timeout_ms=10, cache_size=16)
+
+    assert reranker.score("q", ["a", "bb"]) is None
+
+    release.set()
+    reranker._pool.submit(lambda: None).result(timeout=5)
+    assert reranker.score("q", ["a", "bb"]) == [1.0, 2.0]
+    assert len(scorer.calls) == 1
+
+
+def test_calls_queued_past_their_budget_are_not_scored() -> None:
+    release = threading.Event()
+    scorer = RecordingScorer(release)
+    reranker = CrossEncoderReranker(scorer, timeout_ms=10, cache_size=16)
+
+    assert reranker.score("q1", ["a"]) is None
+    assert reranker.score("q2", ["bb"]) is None
+
+    release.set()
+    reranker._pool.submit(lambda: None).result(timeout=5)
+    assert scorer.calls == [[("q1", "a")]]
+    assert reranker.score("q2", ["bb"]) == [2.0]
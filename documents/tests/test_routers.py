@@ -7,8 +7,19 @@ from typing import TYPE_CHECKING
 
 from fastapi.testclient import TestClient
 
-from documents.schemas import SearchResult
+from documents.app import AppSettings, create_app
+from documents.dependencies import get_warm_up
+from documents.schemas import SearchFilters, SearchResult
 from documents.services import pdf_ingestion
+from documents.services.collection_manager import CollectionManager
+from documents.services.executor import CpuExecutor
+from documents.services.settings import (
+    DocumentSettings,
+    LocalObjectStoreSettings,
+    ObjectStoreSettings,
+    WarmUpSettings,
+)
+from documents.services.warm_up import WarmUp
 
 if TYPE_CHECKING:
     from .conftest import FakeDocumentIndexService
@@ -34,6 +45,42 @@ def test_index_documents_returns_indexed_count(
     assert [doc.document_id for doc in fake_service.indexed_documents] == ["doc-1"]
 
 
+def test_replace_document_uses_parent_id(
+    client: TestClient, fake_service: FakeDocumentIndexService
+) -> None:
+    payload = {"documents": [{"document_id": "doc-1::chunk-0000", "content": "v2"}]}
+
+    response = client.put("/documents/doc-1", json=payload)
+
+    assert response.status_code == 200
+    assert response.json() == {"indexed_count": 1}
+    assert fake_service.replaced_document_id == "doc-1"
+
+
+def test_delete_document_returns_deleted_count_or_404(
+    client: TestClient, fake_service: FakeDocumentIndexService
+) -> None:
+    response = client.delete("/documents/doc-1")
+    missing = client.delete("/documents/missing")
+
+    assert response.status_code == 200
+    assert response.json() == {"document_id": "doc-1", "deleted_count": 2}
+    assert missing.status_code == 404
+    assert fake_service.deleted_document_ids == ["doc-1", "missing"]
+
+
+def test_index_snapshot_round_trips_through_the_api(client: TestClient) -> None:
+    exported = client.get("/documents/index/snapshot")
+
+    assert exported.status_code == 200
+    assert exported.headers["content-type"] == "application/octet-stream"
+    imported = client.put("/documents/index/snapshot", content=exported.content)
+    assert imported.json() == {"indexed_count": 3}
+    rejected = client.put("/documents/index/snapshot", content=b"garbage")
+    assert rejected.status_code == 400
+    assert rejected.json() == {"detail": "Not a document index snapshot"}
+
+
 def test_search_documents_returns_service_results(
     client: TestClient, fake_service: FakeDocumentIndexService
 ) -> None:
@@ -59,12 +106,44 @@ def test_search_documents_returns_service_results(
                 "score": 0.87,
                 "content": "Snippet",
                 "metadata": {"topic": "demo"},
+                "scores": {},
+                "context": None,
+                "context_document_ids": [],
             }
-        ]
+        ],
+        "timings_ms": None,
     }
     assert fake_service.search_calls[-1] == ("vector", 3)
 
 
+def test_search_documents_reports_stage_timings_in_debug_mode(
+    client: TestClient, fake_service: FakeDocumentIndexService
+) -> None:
+    response = client.post("/documents/search", json={"query": "vector", "debug": True})
+
+    assert response.status_code == 200
+    assert response.json()["timings_ms"] == {"vector_scan": 1.5}
+
+
+def test_search_documents_forwards_filters_and_mmr_lambda(
+    client: TestClient, fake_service: FakeDocumentIndexService
+) -> None:
+    response = client.post(
+        "/documents/search",
+        json={
+            "query": "vector",
+            "filters": {"parent_document_id": "pdf-1", "page_from": 2, "page_to": 4},
+            "mmr_lambda": 0.5,
+        },
+    )
+
+    assert response.status_code == 200
+    assert fake_service.search_filters == [
+        SearchFilters(parent_document_id="pdf-1", page_from=2, page_to=4)
+    ]
+    assert fake_service.mmr_lambdas == [0.5]
+
+
 def test_search_documents_returns_503_when_index_not_ready(
     client: TestClient, fake_service: FakeDocumentIndexService
 ) -> None:
@@ -79,6 +158,65 @@ def test_search_documents_returns_503_when_index_not_ready(
     assert response.json() == {"detail": "Document index has not been built yet."}
 
 
+def test_search_documents_batch_returns_results_per_query(
+    client: TestClient, fake_service: FakeDocumentIndexService
+) -> None:
+    fake_service.results = [SearchResult(document_id="doc-1", score=0.5)]
+
+    response = client.post(
+        "/documents/search/batch",
+        json={"queries": ["vector", "graph"], "limit": 2},
+    )
+
+    assert response.status_code == 200
+    assert [len(entry["results"]) for entry in response.json()["results"]] == [1, 1]
+    assert fake_service.search_calls == [("vector", 2), ("graph", 2)]
+
+
+def test_readiness_follows_the_warm_up(client: TestClient) -> None:
+    assert client.get("/health/live").json() == {"status": "ok"}
+    assert client.get("/health/ready").json()["status"] == "ready"
+
+    warm_up = WarmUp([("models", lambda: None), ("collection:default", lambda: None)])
+    client.app.dependency_overrides[get_warm_up] = lambda: warm_up
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json() == {
+        "status": "warming_up",
+        "completed": [],
+        "pending": ["models", "collection:default"],
+        "error": None,
+    }
+
+    warm_up.run()
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["completed"] == ["models", "collection:default"]
+
+
+def test_shutdown_closes_the_collections_and_the_executor(tmp_path: Path, monkeypatch) -> None:
+    closed: list[str] = []
+    monkeypatch.setattr(CollectionManager, "close", lambda self: closed.append("collections"))
+    monkeypatch.setattr(CpuExecutor, "shutdown", lambda self: closed.append("executor"))
+    store = ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path)))
+    documents = DocumentSettings(store=store, warm_up=WarmUpSettings(enabled=False))
+
+    with TestClient(create_app(AppSettings(documents=documents))):
+        assert closed == []
+
+    assert closed == ["executor", "collections"]
+
+
+def test_search_stats_reports_cache_hit_rates(client: TestClient) -> None:
+    response = client.get("/documents/search/stats")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "caches": {"results": {"hits": 3, "misses": 1, "size": 1, "max_size": 8, "hit_rate": 0.75}},
+        "executor": {"max_workers": 4, "active": 0, "queued": 0},
+    }
+
+
 def test_index_pdf_upload_schedules_background_task(
     client: TestClient,
     fake_service: FakeDocumentIndexService,
@@ -0,0 +1,237 @@
+"""Tests for index snapshot export and import."""
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pytest
+
+from documents.schemas import DocumentPayload, SearchFilters
+from documents.services.filters import MetadataFilterIndex
+from documents.services.indexing_service import DocumentIndexService
+from documents.services.settings import (
+    DocumentSettings,
+    EmbedSettings,
+    LocalObjectStoreSettings,
+    ObjectStoreSettings,
+)
+from documents.services.snapshot import (
+    SNAPSHOT_MAGIC,
+    SnapshotError,
+    SnapshotReader,
+    SnapshotWriter,
+)
+
+if TYPE_CHECKING:
+    from .conftest import CountingEmbedding
+
+
+pytestmark = pytest.mark.usefixtures("embed_model")
+
+
+def _service(path: Path, *, model_name: str = "test-model") -> DocumentIndexService:
+    return DocumentIndexService(
+        DocumentSettings(
+            store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(path))),
+            embed=EmbedSettings(model_name=model_name),
+        )
+    )
+
+
+def _chunk(parent: str, index: int, summary: str, page: int) -> DocumentPayload:
+    return DocumentPayload(
+        document_id=f"{parent}-{index}",
+        content=f"{summary} body {index}",
+        metadata={
+            "parent_document_id": parent,
+            "chunk_index": index,
+            "chunk_summary": summary,
+            "page_numbers": [page],
+        },
+    )
+
+
+@pytest.fixture()
+def source(tmp_path: Path) -> DocumentIndexService:
+    service = _service(tmp_path / "source")
+    service.index_documents(
+        [
+            _chunk("manual", 0, "seatbelt inspection", 1),
+            _chunk("manual", 1, "seatbelt tension check", 2),
+            _chunk("manual", 2, "tyre pressure", 3),
+            _chunk("guide", 0, "seatbelt replacement", 1),
+            _chunk("stale", 0, "seatbelt stale copy", 1),
+        ]
+    )
+    service.delete_document("stale")
+    return service
+
+
+def _searches(service: DocumentIndexService) -> list[object]:
+    return [
+        service.search("seatbelt", limit=5),
+        service.search("seatbelt", limit=5, filters=SearchFilters(page_from=2)),
+        service.search("seatbelt", limit=5, filters=SearchFilters(parent_document_id="guide")),
+        service.search("tension", limit=1, expand_window=1),
+    ]
+
+
+def test_imported_snapshot_serves_the_same_results(
+    source: DocumentIndexService, tmp_path: Path
+) -> None:
+    snapshot = tmp_path / "index.snapshot"
+    assert source.export_snapshot(snapshot) == 4
+
+    replica = _service(tmp_path / "replica")
+    replica.index_documents([_chunk("local", 0, "overwritten", 1)])
+    assert replica.import_snapshot(snapshot) == 4
+
+    assert _searches(replica) == _searches(source)
+    assert "local-0" not in {
+        result.document_id for result in replica.search("overwritten", limit=5)
+    }
+
+    # The imported index is persisted and keeps accepting writes.
+    replica.replace_document("guide", [_chunk("guide", 0, "seatbelt fitting", 1)])
+    replica.close()
+    reopened = _service(tmp_path / "replica")
+    assert reopened.indexed_count == 4
+    assert reopened.search("fitting", limit=1)[0].document_id == "guide-0"
+
+
+def test_corrupt_snapshot_leaves_the_index_intact(
+    source: DocumentIndexService, tmp_path: Path
+) -> None:
+    snapshot = tmp_path / "index.snapshot"
+    source.export_snapshot(snapshot)
+    data = bytearray(snapshot.read_bytes())
+    data[-40] ^= 0xFF
+    snapshot.write_bytes(bytes(data))
+
+    replica = _service(tmp_path / "replica")
+    replica.index_documents([_chunk("local", 0, "kept", 1)])
+    with pytest.raises(SnapshotError, match="Checksum mismatch"):
+        replica.import_snapshot(snapshot)
+
+    assert replica.search("kept", limit=1)[0].document_id == "local-0"
+    replica.close()
+    assert _service(tmp_path / "replica").indexed_count == 1
+
+
+def test_snapshot_of_another_embedding_model_is_rejected(
+    source: DocumentIndexService, tmp_path: Path
+) -> None:
+    snapshot = tmp_path / "index.snapshot"
+    source.export_snapshot(snapshot)
+
+    with pytest.raises(SnapshotError, match="model_name"):
+        _service(tmp_path / "replica", model_name="other-model").import_snapshot(snapshot)
+
+
+def test_snapshot_of_another_embedding_backend_is_rejected(
+    source: DocumentIndexService, embed_model: CountingEmbedding, tmp_path: Path
+) -> None:
+    snapshot = tmp_path / "index.snapshot"
+    source.export_snapshot(snapshot)
+    replica = DocumentIndexService(
+        DocumentSettings(
+            store=ObjectStoreSettings(
+                settings=LocalObjectStoreSettings(path=str(tmp_path / "replica"))
+            ),
+            embed=EmbedSettings(model_name="test-model", backend="onnx", quantization="int8"),
+        ),
+        embed_model=embed_model,
+    )
+
+    with pytest.raises(SnapshotError, match="test-model@onnx-int8-avx2"):
+        replica.import_snapshot(snapshot)
+
+
+def test_sections_are_read_back_in_order_and_validated() -> None:
+    buffer = io.BytesIO()
+    writer = SnapshotWriter(buffer)
+    writer.write_array("matrix", np.arange(6, dtype=np.float32).reshape(2, 3))
+    writer.write_strings("names", ["a", "", "é"])
+    writer.close()
+
+    reader = SnapshotReader(io.BytesIO(buffer.getvalue()))
+    assert reader.read_array("matrix", np.float32).tolist() == [[0, 1, 2], [3, 4, 5]]
+    assert reader.read_strings("names") == ["a", "", "é"]
+    reader.finish()
+
+    with pytest.raises(SnapshotError, match="Expected snapshot section 'names'"):
+        SnapshotReader(io.BytesIO(buffer.getvalue())).read_array("names", np.uint8)
+    with pytest.raises(SnapshotError, match="truncated"):
+        SnapshotReader(io.BytesIO(buffer.getvalue()[:40])).read_array("matrix", np.float32)
+    with pytest.raises(SnapshotError, match="expected '<i8'"):
+        SnapshotReader(io.BytesIO(buffer.getvalue())).read_array("matrix", np.int64)
+
+
+def test_corrupt_header_is_reported_as_a_snapshot_error(
+    source: DocumentIndexService, tmp_path: Path
+) -> None:
+    snapshot = tmp_path / "index.snapshot"
+    source.export_snapshot(snapshot)
+    data = bytearray(snapshot.read_bytes())
+    # The first section's name starts after the magic, the version and the name length.
+    data[len(SNAPSHOT_MAGIC) + 6] = 0xFF
+    snapshot.write_bytes(bytes(data))
+
+    with pytest.raises(SnapshotError, match="Corrupt snapshot section header"):
+        _service(tmp_path / "replica").import_snapshot(snapshot)
+
+
+def test_undecodable_sections_are_reported_as_snapshot_errors() -> None:
+    buffer = io.BytesIO()
+    writer = SnapshotWriter(buffer)
+    writer.write_bytes("manifest", b"{not json")
+    writer.write_bytes("names", b"\xff\x00")
+    writer.close()
+
+    reader = SnapshotReader(io.BytesIO(buffer.getvalue()))
+    with pytest.raises(SnapshotError, match="Corrupt snapshot section 'manifest'"):
+        reader.read_json("manifest")
+    with pytest.raises(SnapshotError, match="Corrupt snapshot section 'names'"):
+        reader.read_strings("names")
+
+
+def test_untrusted_section_headers_are_rejected_before_allocating() -> None:
+    buffer = io.BytesIO()
+    writer = SnapshotWriter(buffer)
+    writer.write_array("rows", np.arange(2, dtype=np.int64))
+    writer.close()
+    forged = buffer.getvalue()
+
+    with pytest.raises(SnapshotError, match="holds '|O8'"):
+        SnapshotReader(io.BytesIO(forged.replace(b"<i8", b"|O8"))).read_array("rows", np.int64)
+    huge = forged.replace(np.array([2], "<u8").tobytes(), np.array([2**60], "<u8").tobytes(), 1)
+    with pytest.raises(SnapshotError, match="truncated"):
+        SnapshotReader(io.BytesIO(huge)).read_array("rows", np.int64)
+
+
+def test_filter_postings_beyond_the_chunk_count_are_rejected() -> None:
+    buffer = io.BytesIO()
+    writer = SnapshotWriter(buffer)
+    for field in ("parents", "filenames"):
+        writer.write_strings(f"filters.{field}.values", ["value"])
+        writer.write_array(f"filters.{field}.offsets", np.array([0, 1], dtype=np.int64))
+        writer.write_array(f"filters.{field}.rows", np.array([2], dtype=np.int64))
+    writer.close()
+
+    reader = SnapshotReader(io.BytesIO(buffer.getvalue()))
+    with pytest.raises(SnapshotError, match="parents filter"):
+        MetadataFilterIndex.read_snapshot(reader, 2)
+
+
+def test_snapshot_without_a_dimension_is_rejected(tmp_path: Path) -> None:
+    snapshot = tmp_path / "index.snapshot"
+    with snapshot.open("wb") as handle:
+        writer = SnapshotWriter(handle)
+        writer.write_json("manifest", {"model_name": "test-model"})
+        writer.close()
+
+    with pytest.raises(SnapshotError, match="dim"):
+        _service(tmp_path / "replica").import_snapshot(snapshot)
@@ -0,0 +1,126 @@
+"""Tests for the memory-mapped persistent vector store."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from documents.services.vector_store import PersistentVectorStore, StoredRecord
+
+
+def _record(document_id: str, content: str = "text") -> StoredRecord:
+    return StoredRecord(document_id=document_id, content=content, metadata={"k": document_id})
+
+
+def _open(path: Path) -> tuple[PersistentVectorStore, list[StoredRecord]]:
+    store = PersistentVectorStore(path)
+    return store, store.open()
+
+
+def test_append_and_search_by_kind(tmp_path: Path) -> None:
+    store, records = _open(tmp_path)
+    assert records == []
+
+    content = np.array([[1.0, 0.0], [0.0, 1.0]])
+    summary = np.array([[0.0, 0.0], [1.0, 0.0]])
+    store.append([_record("a"), _record("b")], content, summary)
+
+    assert store.search(np.array([2.0, 0.0]), limit=2) == {
+        "content": [(0, 1.0), (1, 0.0)],
+        "summary": [(1, 1.0)],
+    }
+
+
+def test_reopen_maps_rows_and_retires_replaced_records(tmp_path: Path) -> None:
+    store, _ = _open(tmp_path)
+    store.append([_record("a"), _record("b")], np.eye(2), np.zeros((2, 2)))
+    store.append([_record("a", "updated")], np.array([[0.6, 0.8]]), np.zeros((1, 2)))
+
+    reopened, records = _open(tmp_path)
+
+    assert [(record.document_id, record.content) for record in records] == [
+        ("b", "text"),
+        ("a", "updated"),
+    ]
+    assert reopened.rows == 3
+    assert len(reopened) == 2
+    hits = reopened.search(np.array([0.0, 1.0]), limit=3)["content"]
+    assert [reopened.document_id(row) for row, _ in hits] == ["b", "a"]
+    assert [score for _, score in hits] == pytest.approx([1.0, 0.8])
+    assert isinstance(reopened._vectors, np.memmap)
+
+
+def test_append_preallocates_and_grows_capacity(tmp_path: Path) -> None:
+    store, _ = _open(tmp_path)
+    store.append([_record("a")], np.ones((1, 4)), np.zeros((1, 4)))
+    initial_capacity = store.capacity
+
+    rows = initial_capacity + 1
+    store.append(
+        [_record(f"doc-{row}") for row in range(rows)],
+        np.random.default_rng(0).normal(size=(rows, 4)),
+        np.zeros((rows, 4)),
+    )
+
+    assert store.capacity == 2 * initial_capacity
+    assert (tmp_path / "vectors.f32").stat().st_size == store.capacity * 2 * 4 * 4
+    hits = store.search(np.ones(4), limit=1)["content"]
+    assert hits == [(0, pytest.approx(1.0))]
+
+
+def test_reopen_discards_writes_after_last_manifest(tmp_path: Path) -> None:
+    store, _ = _open(tmp_path)
+    store.append([_record("a")], np.ones((1, 2)), np.zeros((1, 2)))
+    with (tmp_path / "records.jsonl").open("ab") as handle:
+        handle.write(b'{"document_id": "partial"')
+
+    reopened, records = _open(tmp_path)
+
+    assert [record.document_id for record in records] == ["a"]
+    reopened.append([_record("b")], np.ones((1, 2)), np.zeros((1, 2)))
+    assert [record.document_id for record in _open(tmp_path)[1]] == ["a", "b"]
+
+
+def test_delete_tombstones_rows_until_compaction(tmp_path: Path) -> None:
+    store, _ = _open(tmp_path)
+    store.append([_record("a"), _record("b"), _record("c")], np.eye(3), np.zeros((3, 3)))
+
+    assert store.delete(["b", "missing", "b"]) == 1
+    assert "b" not in store
+    assert store.retired_rows == 1
+    hits = store.search(np.array([0.0, 1.0, 0.0]), limit=3)["content"]
+    assert [store.document_id(row) for row, _ in hits] == ["a", "c"]
+
+    reopened, records = _open(tmp_path)
+    assert [record.document_id for record in records] == ["a", "c"]
+    assert reopened.rows == 3
+
+
+def test_compact_rewrites_live_rows_into_next_epoch(tmp_path: Path) -> None:
+    store, _ = _open(tmp_path)
+    store.append([_record("a"), _record("b"), _record("c")], np.eye(3), np.eye(3))
+    store.append([_record("a", "updated")], np.array([[0.0, 0.0, 1.0]]), np.zeros((1, 3)))
+    store.delete(["b"])
+
+    compacted = store.compact()
+
+    assert (compacted.rows, compacted.retired_rows) == (2, 0)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "manifest.json",
+        "records.1.jsonl",
+        "vectors.1.f32",
+    ]
+    hits = compacted.search(np.array([0.0, 0.0, 1.0]), limit=2)
+    assert [compacted.document_id(row) for row, _ in hits["content"]] == ["c", "a"]
+    assert [compacted.document_id(row) for row, _ in hits["summary"]] == ["c"]
+
+    compacted.append([_record("d")], np.ones((1, 3)), np.zeros((1, 3)))
+    reopened, records = _open(tmp_path)
+    assert [(record.document_id, record.content) for record in records] == [
+        ("c", "text"),
+        ("a", "updated"),
+        ("d", "text"),
+    ]
+    assert reopened.rows == 3
@@ -0,0 +1,103 @@
+"""Tests for the startup warm-up."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from documents.services.collection_manager import CollectionManager
+from documents.services.settings import (
+    DocumentSettings,
+    LocalObjectStoreSettings,
+    ObjectStoreSettings,
+    WarmUpSettings,
+)
+from documents.services.warm_up import WarmUp, build_warm_up
+
+if TYPE_CHECKING:
+    from .conftest import CountingEmbedding
+
+
+def _settings(tmp_path: Path, **warm_up: object) -> DocumentSettings:
+    return DocumentSettings(
+        store=ObjectStoreSettings(settings=LocalObjectStoreSettings(path=str(tmp_path))),
+        warm_up=WarmUpSettings(**warm_up),
+    )
+
+
+def test_warm_up_loads_models_and_collections_once(
+    tmp_path: Path, embed_model: CountingEmbedding
+) -> None:
+    settings = _settings(tmp_path, collections=["default", "tenant"], pdf_pipeline=False)
+    manager = CollectionManager(settings)
+    warm_up = build_warm_up(settings, manager)
+    assert embed_model.loads == []
+    assert warm_up.status().state == "warming_up"
+
+    warm_up.start()
+    assert warm_up.wait(timeout=10)
+
+    status = warm_up.status()
+    assert status.state == "ready"
+    assert status.completed == ["models", "collection:default", "collection:tenant"]
+    assert status.pending == []
+    assert embed_model.loads == [{"model_name": settings.embed.model_name}]
+    assert embed_model.embedded_queries == 1
+    assert manager.loaded() == ["default", "tenant"]
+
+
+def test_failed_step_leaves_the_service_not_ready() -> None:
+    def fail() -> None:
+        raise RuntimeError("model download failed")
+
+    ran: list[str] = []
+    warm_up = WarmUp([("models", fail), ("pdf_pipeline", lambda: ran.append("pdf"))])
+    warm_up.run()
+
+    status = warm_up.status()
+    assert not warm_up.ready
+    assert status.state == "failed"
+    assert status.pending == ["models", "pdf_pipeline"]
+    assert status.error == "models: model download failed"
+    assert ran == []
+
+
+def test_failed_step_is_retried_with_backoff() -> None:
+    attempts: list[str] = []
+
+    def flaky() -> None:
+        attempts.append("models")
+        if len(attempts) < 3:
+            raise RuntimeError("model download failed")
+
+    warm_up = WarmUp([("models", flaky)], retries=2, backoff_seconds=0)
+    warm_up.run()
+
+    assert warm_up.ready
+    assert warm_up.status().completed == ["models"]
+    assert len(attempts) == 3
+
+
+def test_stop_abandons_pending_retries() -> None:
+    def fail() -> None:
+        raise RuntimeError("model download failed")
+
+    warm_up = WarmUp([("models", fail)], retries=1, backoff_seconds=60)
+    warm_up.start()
+    warm_up.stop()
+    warm_up._thread.join(timeout=5)
+
+    assert not warm_up._thread.is_alive()
+    assert warm_up.status().state == "warming_up"
+
+
+def test_disabled_warm_up_is_ready_without_loading_anything(
+    tmp_path: Path, embed_model: CountingEmbedding
+) -> None:
+    settings = _settings(tmp_path, enabled=False)
+    warm_up = build_warm_up(settings, CollectionManager(settings))
+    warm_up.start()
+
+    assert warm_up.ready
+    assert warm_up.status().state == "ready"
+    assert embed_model.loads == []